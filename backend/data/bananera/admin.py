@@ -2,16 +2,26 @@
 Admin para la app Bananera - Interfaz optimizada y fácil de usar
 """
 
+import csv
+
+from django import forms
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from django.db.models import Sum, Count
+from django.db.models import Max, Sum, Count
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
+from . import busqueda, conteo_alertas, geo
 from .models import (
     Finca, Usuario, Enfunde, Cosecha, RecuperacionCinta,
     Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta,
-    PasswordResetCode
+    PasswordResetCode, EstadisticaProduccion, CorreoSaliente, TemporadaArchivada, GeometriaFinca
 )
+from .versiones import invalidar_datos
 
 # ============================================
 # CONFIGURACIÓN GLOBAL DEL ADMIN
@@ -21,9 +31,167 @@ admin.site.site_title = "Bananera Admin"
 admin.site.index_title = "Panel de Control"
 
 
+# ============================================
+# TABLAS GRANDES (producción, nómina, inventario)
+# ============================================
+UMBRAL_CONTEO_EXACTO = 10000
+
+
+def conteo_estimado(modelo, using):
+    """Filas de la tabla según las estadísticas del motor, o None si no las hay"""
+    tabla = modelo._meta.db_table
+    conexion = connections[using]
+    try:
+        with conexion.cursor() as cursor:
+            if conexion.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [tabla])
+            elif conexion.vendor == 'sqlite':
+                # sqlite_stat1 solo existe después de ANALYZE / PRAGMA optimize
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabla])
+            else:
+                return None
+            fila = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not fila or fila[0] is None:
+        return None
+    estimado = int(str(fila[0]).split()[0])
+    return estimado if estimado > 0 else None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Sin filtros cuenta exacto hasta UMBRAL_CONTEO_EXACTO filas y por encima
+    usa la estimación del motor. Con filtros el conteo es siempre exacto: la
+    estimación es de la tabla entera y el admin muestra el total como exacto.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return queryset.order_by().count()
+        # COUNT sobre un LIMIT sin ORDER BY: nunca recorre más que el umbral
+        exacto = queryset.order_by().values('pk')[:UMBRAL_CONTEO_EXACTO + 1].count()
+        if exacto <= UMBRAL_CONTEO_EXACTO:
+            return exacto
+        return max(conteo_estimado(queryset.model, queryset.db) or 0, exacto)
+
+
+class _Eco:
+    """Pseudo-archivo para que csv.writer devuelva cada línea en vez de escribirla"""
+
+    def write(self, valor):
+        return valor
+
+
+class TablaGrandeAdmin(admin.ModelAdmin):
+    """Changelist sin COUNT(*) completo ni barrido de fechas, con exportación CSV en streaming"""
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    campos_csv = []
+
+    @admin.action(description='⬇ Exportar a CSV')
+    def exportar_csv(self, request, queryset):
+        campos = self.campos_csv or [campo.attname for campo in self.model._meta.concrete_fields]
+        escritor = csv.writer(_Eco())
+
+        def lineas():
+            yield escritor.writerow(campos)
+            for fila in queryset.values_list(*campos).iterator(chunk_size=2000):
+                yield escritor.writerow(fila)
+
+        respuesta = StreamingHttpResponse(lineas(), content_type='text/csv; charset=utf-8')
+        respuesta['Content-Disposition'] = f'attachment; filename="{self.model._meta.model_name}.csv"'
+        return respuesta
+
+
+class FincaEditableMixin:
+    """list_editable con finca: las opciones se consultan una vez por petición, no por fila"""
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        campo = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'finca' and request is not None:
+            if not hasattr(request, '_opciones_finca'):
+                request._opciones_finca = list(campo.choices)
+            campo.choices = request._opciones_finca
+        return campo
+
+
+class BusquedaIndexadaMixin:
+    """La caja de búsqueda usa el índice FTS5 (ver busqueda.py) en vez de icontains"""
+
+    def get_search_results(self, request, queryset, search_term):
+        terminos = search_term.split()
+        resultado = busqueda.filtrar(queryset, terminos, self.get_search_fields(request),
+                                     relevancia=False) if terminos else None
+        if resultado is None:
+            return super().get_search_results(request, queryset, search_term)
+        return resultado, False
+
+
+class AñoFilter(admin.SimpleListFilter):
+    """Años de la tabla caliente sin SELECT DISTINCT: los anteriores ya están archivados"""
+    title = 'año'
+    parameter_name = 'año'
+
+    def lookups(self, request, model_admin):
+        actual = timezone.now().year
+        archivado = TemporadaArchivada.objects.aggregate(ultimo=Max('año'))['ultimo']
+        desde = archivado + 1 if archivado else actual - 4
+        return [(str(año), str(año)) for año in range(actual, desde - 1, -1)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(año=self.value())
+
+
+class SemanaFilter(admin.SimpleListFilter):
+    title = 'semana'
+    parameter_name = 'semana'
+
+    def lookups(self, request, model_admin):
+        return [(str(semana), f'S{semana}') for semana in range(1, 54)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(semana=self.value())
+
+
 # ============================================
 # FINCAS
 # ============================================
+class GeometriaFincaForm(forms.ModelForm):
+    class Meta:
+        model = GeometriaFinca
+        fields = ['contorno', 'lotes']
+
+    def clean_contorno(self):
+        contorno = self.cleaned_data['contorno']
+        if contorno is not None:
+            try:
+                geo.validar(contorno)
+            except ValueError as e:
+                raise forms.ValidationError(str(e))
+        return contorno
+
+    def clean_lotes(self):
+        lotes = self.cleaned_data['lotes'] or {}
+        try:
+            geo.validar_lotes(lotes)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        return lotes
+
+
+class GeometriaFincaInline(admin.StackedInline):
+    model = GeometriaFinca
+    form = GeometriaFincaForm
+    can_delete = True
+    classes = ['collapse']
+    verbose_name = '🗺️ Geometría (GeoJSON)'
+
+
 @admin.register(Finca)
 class FincaAdmin(admin.ModelAdmin):
     list_display = ['nombre_con_icono', 'ubicacion', 'hectareas_format', 'responsable', 'estado_badge']
@@ -31,6 +199,7 @@ class FincaAdmin(admin.ModelAdmin):
     search_fields = ['nombre', 'ubicacion', 'responsable']
     list_editable = ['responsable']
     list_per_page = 20
+    inlines = [GeometriaFincaInline]
     
     fieldsets = (
         ('📍 Información General', {
@@ -61,9 +230,10 @@ class FincaAdmin(admin.ModelAdmin):
 # USUARIOS
 # ============================================
 @admin.register(Usuario)
-class UsuarioAdmin(admin.ModelAdmin):
+class UsuarioAdmin(BusquedaIndexadaMixin, admin.ModelAdmin):
     list_display = ['email', 'nombre', 'rol_badge', 'finca_asignada', 'estado_badge', 'is_staff']
     list_filter = ['rol', 'activo', 'finca_asignada', 'is_staff']
+    list_select_related = ['finca_asignada']
     search_fields = ['email', 'nombre', 'telefono']
     ordering = ['nombre']
     readonly_fields = ['last_login', 'fecha_creacion']
@@ -109,13 +279,13 @@ class UsuarioAdmin(admin.ModelAdmin):
     
     @admin.action(description='✓ Activar usuarios seleccionados')
     def activar_usuarios(self, request, queryset):
-        queryset.update(activo=True)
-        self.message_user(request, f'{queryset.count()} usuarios activados')
+        n = queryset.update(activo=True)
+        self.message_user(request, f'{n} usuarios activados')
     
     @admin.action(description='✗ Desactivar usuarios seleccionados')
     def desactivar_usuarios(self, request, queryset):
-        queryset.update(activo=False)
-        self.message_user(request, f'{queryset.count()} usuarios desactivados')
+        n = queryset.update(activo=False)
+        self.message_user(request, f'{n} usuarios desactivados')
     
     def save_model(self, request, obj, form, change):
         if 'password' in form.changed_data:
@@ -127,12 +297,15 @@ class UsuarioAdmin(admin.ModelAdmin):
 # PRODUCCIÓN - ENFUNDES
 # ============================================
 @admin.register(Enfunde)
-class EnfundeAdmin(admin.ModelAdmin):
+class EnfundeAdmin(TablaGrandeAdmin):
     list_display = ['finca', 'fecha', 'semana_año', 'color_badge', 'cantidad_format']
-    list_filter = ['finca', 'color_cinta', 'año', 'semana']
-    date_hierarchy = 'fecha'
+    list_filter = ['finca', 'color_cinta', AñoFilter, SemanaFilter, 'fecha']
+    list_select_related = ['finca']
     list_per_page = 30
     ordering = ['-fecha']
+    actions = ['exportar_csv']
+    campos_csv = ['fecha', 'semana', 'año', 'finca__nombre', 'color_cinta',
+                  'cantidad_enfundes', 'matas_caidas', 'observaciones']
     
     fieldsets = (
         ('📍 Ubicación', {'fields': ('finca',)}),
@@ -164,12 +337,15 @@ class EnfundeAdmin(admin.ModelAdmin):
 # PRODUCCIÓN - COSECHAS
 # ============================================
 @admin.register(Cosecha)
-class CosechaAdmin(admin.ModelAdmin):
+class CosechaAdmin(TablaGrandeAdmin):
     list_display = ['finca', 'fecha', 'semana_año', 'cajas_format', 'peso_promedio', 'ratio_badge']
-    list_filter = ['finca', 'año']
-    date_hierarchy = 'fecha'
+    list_filter = ['finca', AñoFilter, 'fecha']
+    list_select_related = ['finca']
     list_per_page = 30
     ordering = ['-fecha']
+    actions = ['exportar_csv']
+    campos_csv = ['fecha', 'semana', 'año', 'finca__nombre', 'lote', 'cajas_producidas',
+                  'racimos_recuperados', 'peso_promedio', 'calibracion', 'manos', 'ratio']
     
     @admin.display(description='Semana/Año')
     def semana_año(self, obj):
@@ -190,11 +366,17 @@ class CosechaAdmin(admin.ModelAdmin):
 # RECUPERACIÓN DE CINTAS
 # ============================================
 @admin.register(RecuperacionCinta)
-class RecuperacionCintaAdmin(admin.ModelAdmin):
+class RecuperacionCintaAdmin(TablaGrandeAdmin):
     list_display = ['enfunde', 'fecha', 'cintas_recuperadas', 'porcentaje_badge']
     list_filter = ['fecha']
-    date_hierarchy = 'fecha'
+    # El enfunde se muestra con el nombre de su finca
+    list_select_related = ['enfunde__finca']
+    raw_id_fields = ['enfunde']
     list_per_page = 30
+    ordering = ['-fecha']
+    actions = ['exportar_csv']
+    campos_csv = ['fecha', 'enfunde__finca__nombre', 'enfunde__fecha', 'enfunde__color_cinta',
+                  'cintas_recuperadas', 'porcentaje_recuperacion', 'observaciones']
     
     @admin.display(description='% Recuperación')
     def porcentaje_badge(self, obj):
@@ -207,9 +389,10 @@ class RecuperacionCintaAdmin(admin.ModelAdmin):
 # NÓMINA - EMPLEADOS
 # ============================================
 @admin.register(Empleado)
-class EmpleadoAdmin(admin.ModelAdmin):
+class EmpleadoAdmin(BusquedaIndexadaMixin, FincaEditableMixin, admin.ModelAdmin):
     list_display = ['nombre_completo', 'cedula', 'finca', 'cargo_badge', 'salario_format', 'estado_badge']
     list_filter = ['finca', 'cargo', 'activo']
+    list_select_related = ['finca']
     search_fields = ['nombre', 'cedula', 'telefono']
     list_editable = ['finca']
     list_per_page = 30
@@ -252,24 +435,30 @@ class EmpleadoAdmin(admin.ModelAdmin):
     @admin.action(description='✓ Activar empleados')
     def activar_empleados(self, request, queryset):
         queryset.update(activo=True)
+        invalidar_datos()
     
     @admin.action(description='✗ Desactivar empleados')
     def desactivar_empleados(self, request, queryset):
         queryset.update(activo=False)
+        invalidar_datos()
 
 
 # ============================================
 # NÓMINA - ROLES DE PAGO
 # ============================================
 @admin.register(RolPago)
-class RolPagoAdmin(admin.ModelAdmin):
+class RolPagoAdmin(TablaGrandeAdmin):
     list_display = ['empleado', 'fecha_pago', 'salario_format', 'total_format', 'estado_badge']
     list_filter = ['estado', 'fecha_pago', 'empleado__finca']
-    date_hierarchy = 'fecha_pago'
+    list_select_related = ['empleado']
+    autocomplete_fields = ['empleado']
     list_per_page = 30
     ordering = ['-fecha_pago']
     
-    actions = ['marcar_pagado', 'marcar_pendiente']
+    actions = ['marcar_pagado', 'marcar_pendiente', 'exportar_csv']
+    campos_csv = ['fecha_pago', 'empleado__cedula', 'empleado__nombre', 'empleado__finca__nombre',
+                  'periodo_inicio', 'periodo_fin', 'salario_base', 'horas_extras',
+                  'bonificaciones', 'deducciones', 'total_pagar', 'estado']
     
     @admin.display(description='Salario Base')
     def salario_format(self, obj):
@@ -288,25 +477,33 @@ class RolPagoAdmin(admin.ModelAdmin):
     
     @admin.action(description='✓ Marcar como pagado')
     def marcar_pagado(self, request, queryset):
-        queryset.update(estado='pagado')
-        self.message_user(request, f'{queryset.count()} roles marcados como pagados')
+        # update() ya devuelve las filas afectadas: no se vuelve a contar
+        n = queryset.update(estado='pagado')
+        invalidar_datos()
+        self.message_user(request, f'{n} roles marcados como pagados')
     
     @admin.action(description='⏳ Marcar como pendiente')
     def marcar_pendiente(self, request, queryset):
-        queryset.update(estado='pendiente')
+        n = queryset.update(estado='pendiente')
+        invalidar_datos()
+        self.message_user(request, f'{n} roles marcados como pendientes')
 
 
 # ============================================
 # PRÉSTAMOS
 # ============================================
 @admin.register(Prestamo)
-class PrestamoAdmin(admin.ModelAdmin):
+class PrestamoAdmin(TablaGrandeAdmin):
     list_display = ['empleado', 'monto_format', 'pagado_format', 'cuotas_progreso', 'estado_badge']
     list_filter = ['estado', 'empleado__finca']
+    list_select_related = ['empleado']
+    autocomplete_fields = ['empleado']
     search_fields = ['empleado__nombre']
     list_per_page = 30
     
-    actions = ['marcar_activo', 'marcar_pagado']
+    actions = ['marcar_activo', 'marcar_pagado', 'exportar_csv']
+    campos_csv = ['fecha_solicitud', 'empleado__cedula', 'empleado__nombre', 'monto', 'monto_pagado',
+                  'cuotas', 'cuotas_pagadas', 'fecha_aprobacion', 'estado', 'motivo']
     
     @admin.display(description='Monto')
     def monto_format(self, obj):
@@ -329,20 +526,25 @@ class PrestamoAdmin(admin.ModelAdmin):
     
     @admin.action(description='Marcar como activo')
     def marcar_activo(self, request, queryset):
-        queryset.update(estado='activo')
+        n = queryset.update(estado='activo')
+        invalidar_datos()
+        self.message_user(request, f'{n} préstamos marcados como activos')
     
     @admin.action(description='✓ Marcar como pagado')
     def marcar_pagado(self, request, queryset):
-        queryset.update(estado='pagado')
+        n = queryset.update(estado='pagado')
+        invalidar_datos()
+        self.message_user(request, f'{n} préstamos marcados como pagados')
 
 
 # ============================================
 # INVENTARIO - INSUMOS
 # ============================================
 @admin.register(Insumo)
-class InsumoAdmin(admin.ModelAdmin):
+class InsumoAdmin(BusquedaIndexadaMixin, FincaEditableMixin, admin.ModelAdmin):
     list_display = ['nombre', 'finca', 'categoria_badge', 'stock_visual', 'precio_format']
     list_filter = ['finca', 'categoria']
+    list_select_related = ['finca']
     search_fields = ['nombre']
     list_editable = ['finca']
     list_per_page = 30
@@ -379,12 +581,17 @@ class InsumoAdmin(admin.ModelAdmin):
 # INVENTARIO - MOVIMIENTOS
 # ============================================
 @admin.register(MovimientoInventario)
-class MovimientoInventarioAdmin(admin.ModelAdmin):
+class MovimientoInventarioAdmin(TablaGrandeAdmin):
     list_display = ['insumo', 'finca', 'tipo_badge', 'cantidad_format', 'fecha', 'responsable']
     list_filter = ['tipo', 'finca', 'fecha']
-    date_hierarchy = 'fecha'
+    # El insumo se muestra con el nombre de su finca
+    list_select_related = ['insumo__finca', 'finca', 'responsable']
+    autocomplete_fields = ['insumo']
     list_per_page = 30
     ordering = ['-fecha']
+    actions = ['exportar_csv']
+    campos_csv = ['fecha', 'finca__nombre', 'insumo__nombre', 'tipo', 'cantidad',
+                  'responsable__email', 'observaciones']
     
     @admin.display(description='Tipo')
     def tipo_badge(self, obj):
@@ -404,9 +611,10 @@ class MovimientoInventarioAdmin(admin.ModelAdmin):
 # ALERTAS
 # ============================================
 @admin.register(Alerta)
-class AlertaAdmin(admin.ModelAdmin):
+class AlertaAdmin(BusquedaIndexadaMixin, admin.ModelAdmin):
     list_display = ['titulo_con_icono', 'tipo_badge', 'prioridad_badge', 'finca', 'leida_badge', 'fecha_creacion']
     list_filter = ['tipo', 'prioridad', 'leida', 'finca']
+    list_select_related = ['finca']
     search_fields = ['titulo', 'mensaje']
     list_per_page = 30
     ordering = ['-fecha_creacion']
@@ -438,12 +646,85 @@ class AlertaAdmin(admin.ModelAdmin):
     
     @admin.action(description='✓ Marcar como leídas')
     def marcar_leida(self, request, queryset):
-        queryset.update(leida=True)
-        self.message_user(request, f'{queryset.count()} alertas marcadas como leídas')
+        n = conteo_alertas.marcar(queryset, leida=True)
+        invalidar_datos()
+        self.message_user(request, f'{n} alertas marcadas como leídas')
     
     @admin.action(description='○ Marcar como no leídas')
     def marcar_no_leida(self, request, queryset):
-        queryset.update(leida=False)
+        n = conteo_alertas.marcar(queryset, leida=False)
+        invalidar_datos()
+        self.message_user(request, f'{n} alertas marcadas como no leídas')
+
+
+# ============================================
+# ESTADÍSTICAS DE PRODUCCIÓN (detección de anomalías)
+# ============================================
+@admin.register(EstadisticaProduccion)
+class EstadisticaProduccionAdmin(admin.ModelAdmin):
+    list_display = ['finca', 'metrica', 'mediana', 'mad', 'ultima_semana_format', 'fecha_actualizacion']
+    list_filter = ['metrica', 'finca']
+    list_select_related = ['finca']
+    readonly_fields = ['valores', 'mediana', 'mad', 'ultimo_año', 'ultima_semana', 'fecha_actualizacion']
+    list_per_page = 30
+
+    @admin.display(description='Última semana')
+    def ultima_semana_format(self, obj):
+        return format_html('S{} / {}', obj.ultima_semana, obj.ultimo_año)
+
+
+# ============================================
+# BANDEJA DE SALIDA DE CORREOS
+# ============================================
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ['asunto', 'destinatarios', 'estado_badge', 'intentos', 'proximo_intento', 'fecha_envio']
+    list_filter = ['estado', 'fecha_creacion']
+    search_fields = ['asunto', 'destinatarios']
+    exclude = ['mensaje']
+    readonly_fields = ['asunto', 'contenido', 'remitente', 'destinatarios', 'sensible', 'intentos',
+                       'ultimo_error', 'fecha_creacion', 'fecha_envio']
+    list_per_page = 30
+
+    actions = ['reintentar']
+
+    @admin.display(description='Mensaje')
+    def contenido(self, obj):
+        # Los de recuperación llevan el código en claro hasta que se envían
+        if obj.sensible:
+            return '— Oculto: contiene un código de recuperación —'
+        return obj.mensaje
+
+    @admin.display(description='Estado')
+    def estado_badge(self, obj):
+        colors = {'pendiente': '#f59e0b', 'enviado': '#10b981', 'fallido': '#ef4444'}
+        return format_html('<span style="color:{};font-weight:600;">● {}</span>',
+            colors.get(obj.estado, '#6b7280'), obj.get_estado_display())
+
+    @admin.action(description='↻ Reintentar envío')
+    def reintentar(self, request, queryset):
+        # Un sensible fallido ya no tiene cuerpo: hay que pedir otro código
+        n = queryset.exclude(estado='enviado').exclude(sensible=True, estado='fallido').update(
+            estado='pendiente', intentos=0, proximo_intento=timezone.now()
+        )
+        self.message_user(request, f'{n} correos reprogramados')
+
+
+# ============================================
+# TEMPORADAS ARCHIVADAS (se gestionan con archivar_temporada)
+# ============================================
+@admin.register(TemporadaArchivada)
+class TemporadaArchivadaAdmin(admin.ModelAdmin):
+    list_display = ['año', 'enfundes', 'cosechas', 'recuperaciones', 'fecha_archivo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 # ============================================
@@ -451,11 +732,18 @@ class AlertaAdmin(admin.ModelAdmin):
 # ============================================
 @admin.register(PasswordResetCode)
 class PasswordResetCodeAdmin(admin.ModelAdmin):
-    list_display = ['usuario', 'codigo', 'usado_badge', 'fecha_creacion', 'fecha_expiracion']
+    list_display = ['usuario', 'usado_badge', 'fecha_creacion', 'fecha_expiracion']
     list_filter = ['usado', 'fecha_creacion']
-    search_fields = ['usuario__email', 'codigo']
-    readonly_fields = ['codigo', 'fecha_creacion']
+    list_select_related = ['usuario']
+    search_fields = ['usuario__email']
+    # Solo se guarda el HMAC del código; no sirve de nada mostrarlo
+    exclude = ['codigo']
+    readonly_fields = ['fecha_creacion']
     list_per_page = 20
+
+    def has_add_permission(self, request):
+        # Los crea la API de recuperación, que es la única que conoce el código
+        return False
     
     @admin.display(description='Usado')
     def usado_badge(self, obj):
@@ -0,0 +1,90 @@
+"""
+Alcance por finca de los datos de la API
+
+Los supervisores de finca y los bodegueros solo ven los datos de su
+``finca_asignada``. El filtro se aplica en ``get_queryset``, antes de los
+filtros de la petición, de modo que todas las consultas (listados, detalle,
+acciones y reportes) parten de ``finca_id = ?`` y usan los índices
+``(finca, ...)``. Los demás roles conservan la vista de todas las fincas.
+"""
+
+from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied
+
+from .choices import RolUsuario
+
+ROLES_POR_FINCA = {RolUsuario.SUPERVISOR_FINCA, RolUsuario.BODEGUERO}
+
+
+class SinFincaAsignada(PermissionDenied):
+    default_detail = 'Tu usuario no tiene una finca asignada.'
+
+
+def restringido_a_finca(usuario):
+    return getattr(usuario, 'rol', None) in ROLES_POR_FINCA
+
+
+def finca_de(usuario, solicitada=None):
+    """
+    Finca con la que filtrar: la asignada para los roles por finca (ignorando
+    la solicitada) o la solicitada en la petición para el resto.
+    """
+    if not restringido_a_finca(usuario):
+        return solicitada
+    if usuario.finca_asignada_id is None:
+        raise SinFincaAsignada()
+    return usuario.finca_asignada_id
+
+
+def limitar_a_finca(queryset, usuario, campo='finca', incluir_sin_finca=False):
+    """Restringe el queryset a la finca del usuario; vacío si no tiene una asignada"""
+    if not restringido_a_finca(usuario):
+        return queryset
+    if usuario.finca_asignada_id is None:
+        return queryset.none()
+    filtro = Q(**{campo: usuario.finca_asignada_id})
+    if incluir_sin_finca:
+        filtro |= Q(**{f'{campo}__isnull': True})
+    return queryset.filter(filtro)
+
+
+class AlcanceFincaMixin:
+    """
+    Mixin de ViewSet: ``campo_finca`` es la ruta ORM hasta la finca
+    (``'finca'``, ``'empleado__finca'``, ``'pk'`` para la propia Finca...).
+    También impide crear o mover registros a otra finca.
+    """
+    campo_finca = 'finca'
+    incluir_sin_finca = False
+
+    def get_queryset(self):
+        return limitar_a_finca(
+            super().get_queryset(), self.request.user, self.campo_finca, self.incluir_sin_finca
+        )
+
+    def validar_finca(self, serializer):
+        usuario = self.request.user
+        if not restringido_a_finca(usuario) or self.campo_finca == 'pk':
+            return
+        primero, *resto = self.campo_finca.split('__')
+        if primero in serializer.validated_data:
+            objeto = serializer.validated_data[primero]
+        elif serializer.instance is not None:
+            objeto = getattr(serializer.instance, primero)
+        else:
+            return
+        for nombre in resto:
+            objeto = getattr(objeto, nombre, None)
+        finca_id = getattr(objeto, 'pk', None)
+        if finca_id is None and self.incluir_sin_finca:
+            return
+        if finca_id != finca_de(usuario):
+            raise PermissionDenied('Solo puedes registrar datos de tu finca.')
+
+    def perform_create(self, serializer):
+        self.validar_finca(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.validar_finca(serializer)
+        super().perform_update(serializer)
@@ -0,0 +1,181 @@
+"""
+Detección incremental de anomalías en la producción semanal
+
+Cada finca mantiene, por métrica, una ventana de sus últimas semanas cerradas
+con su mediana y MAD. Al procesar un nuevo lote solo se leen las semanas
+posteriores a la última marca guardada, nunca el histórico completo.
+"""
+
+from statistics import median
+
+from django.db import transaction
+from django.db.models import Avg, Q, Sum
+from django.utils import timezone
+
+from .busqueda import indexar
+from .conteo_alertas import sumar_nuevas
+from .eventos import publicar_alertas
+from .models import Alerta, Cosecha, Enfunde, EstadisticaProduccion, Finca
+from .versiones import invalidar_datos
+
+# Semanas que conserva cada ventana y mínimo necesario para evaluar
+VENTANA_SEMANAS = 26
+MIN_SEMANAS = 6
+
+# Puntaje robusto (0.6745 * |x - mediana| / MAD) a partir del cual se alerta
+UMBRAL_PUNTAJE = 3.5
+
+# (puntaje mínimo, prioridad) de mayor a menor severidad
+SEVERIDADES = [
+    (8.0, 'critica'),
+    (5.0, 'alta'),
+    (UMBRAL_PUNTAJE, 'media'),
+]
+
+# métrica -> (modelo, agregado semanal, dirección anómala, etiqueta)
+METRICAS = {
+    'cajas_producidas': (Cosecha, Sum('cajas_producidas'), 'baja', 'Caída de cajas producidas'),
+    'ratio': (Cosecha, Avg('ratio'), 'baja', 'Caída del ratio de cosecha'),
+    'matas_caidas': (Enfunde, Sum('matas_caidas'), 'alta', 'Aumento de matas caídas'),
+}
+
+
+def puntaje_robusto(valor, mediana, mad):
+    """Puntaje z modificado de Iglewicz-Hoaglin"""
+    if mad == 0:
+        # Serie constante: cualquier desviación relevante es anómala
+        mad = max(abs(mediana) * 0.01, 1e-9)
+    return 0.6745 * (valor - mediana) / mad
+
+
+def prioridad_por_puntaje(puntaje):
+    for minimo, prioridad in SEVERIDADES:
+        if puntaje >= minimo:
+            return prioridad
+    return None
+
+
+def _actualizar_ventana(estadistica, valor):
+    valores = (estadistica.valores + [valor])[-VENTANA_SEMANAS:]
+    estadistica.valores = valores
+    estadistica.mediana = median(valores)
+    estadistica.mad = median(abs(v - estadistica.mediana) for v in valores)
+
+
+def _posterior(año, semana):
+    """Semanas estrictamente posteriores a (año, semana)"""
+    return Q(año__gt=año) | Q(año=año, semana__gt=semana)
+
+
+def _semanas_nuevas(metrica, modelo, agregado, estadisticas, corte):
+    """Agregados semanales por finca posteriores a la marca de cada finca y anteriores al corte"""
+    marcas = {
+        finca_id: (e.ultimo_año, e.ultima_semana)
+        for (finca_id, m), e in estadisticas.items() if m == metrica
+    }
+    # Las fincas sin estadística se leen desde el principio; el resto desde su marca
+    pendientes = ~Q(finca_id__in=marcas)
+    for finca_id, (año, semana) in marcas.items():
+        pendientes |= Q(finca_id=finca_id) & _posterior(año, semana)
+    cerradas = Q(año__lt=corte[0]) | Q(año=corte[0], semana__lt=corte[1])
+
+    return (
+        modelo.objects.filter(pendientes, cerradas)
+        .values('finca_id', 'año', 'semana')
+        .annotate(valor=agregado)
+        .order_by('finca_id', 'año', 'semana')
+    )
+
+
+def detectar_anomalias(fecha=None):
+    """
+    Procesa las semanas cerradas pendientes y crea las alertas de producción.
+
+    Solo se consideran semanas ISO anteriores a la de ``fecha`` (hoy por
+    defecto), para no fijar la marca sobre una semana aún en registro.
+    """
+    fecha = fecha or timezone.localdate()
+    corte = tuple(fecha.isocalendar())[:2]
+
+    estadisticas = {
+        (e.finca_id, e.metrica): e
+        for e in EstadisticaProduccion.objects.all()
+    }
+    existentes = set(estadisticas)
+    fincas = dict(Finca.objects.values_list('id', 'nombre'))
+
+    candidatas = []
+    actualizadas = set()
+    semanas_procesadas = 0
+
+    for metrica, (modelo, agregado, direccion, etiqueta) in METRICAS.items():
+        for fila in _semanas_nuevas(metrica, modelo, agregado, estadisticas, corte):
+            semana = (fila['año'], fila['semana'])
+            if semana >= corte or fila['valor'] is None:
+                continue
+
+            clave_estadistica = (fila['finca_id'], metrica)
+            estadistica = estadisticas.get(clave_estadistica)
+            if estadistica is None:
+                estadistica = EstadisticaProduccion(finca_id=fila['finca_id'], metrica=metrica)
+                estadisticas[clave_estadistica] = estadistica
+            elif semana <= (estadistica.ultimo_año, estadistica.ultima_semana):
+                continue
+
+            valor = float(fila['valor'])
+            if len(estadistica.valores) >= MIN_SEMANAS:
+                puntaje = puntaje_robusto(valor, estadistica.mediana, estadistica.mad)
+                if direccion == 'baja':
+                    puntaje = -puntaje
+                prioridad = prioridad_por_puntaje(puntaje)
+                if prioridad:
+                    nombre = fincas.get(fila['finca_id'], '')
+                    candidatas.append(Alerta(
+                        tipo='cosecha',
+                        prioridad=prioridad,
+                        titulo=f'{etiqueta} - {nombre} S{semana[1]}/{semana[0]}',
+                        mensaje=(
+                            f'{metrica} = {valor:.2f} frente a una mediana de '
+                            f'{estadistica.mediana:.2f} (MAD {estadistica.mad:.2f}, '
+                            f'puntaje {puntaje:.1f}) en las últimas '
+                            f'{len(estadistica.valores)} semanas.'
+                        ),
+                        finca_id=fila['finca_id'],
+                        clave=f'anomalia:{metrica}:{fila["finca_id"]}:{semana[0]}-{semana[1]:02d}',
+                    ))
+
+            _actualizar_ventana(estadistica, valor)
+            estadistica.ultimo_año, estadistica.ultima_semana = semana
+            actualizadas.add(clave_estadistica)
+            semanas_procesadas += 1
+
+    with transaction.atomic():
+        nuevas_estadisticas = [estadisticas[k] for k in actualizadas - existentes]
+        modificadas = [estadisticas[k] for k in actualizadas & existentes]
+        ahora = timezone.now()
+        for estadistica in modificadas:
+            estadistica.fecha_actualizacion = ahora
+        EstadisticaProduccion.objects.bulk_create(nuevas_estadisticas)
+        EstadisticaProduccion.objects.bulk_update(
+            modificadas,
+            ['valores', 'mediana', 'mad', 'ultimo_año', 'ultima_semana', 'fecha_actualizacion'],
+        )
+
+        claves_abiertas = set(
+            Alerta.objects.filter(clave__in=[a.clave for a in candidatas])
+            .values_list('clave', flat=True)
+        )
+        alertas = [a for a in candidatas if a.clave not in claves_abiertas]
+        Alerta.objects.bulk_create(alertas)
+        sumar_nuevas(alertas)
+        publicar_alertas(alertas)
+        indexar(*alertas)
+
+    if alertas:
+        invalidar_datos()
+
+    return {
+        'semanas_procesadas': semanas_procesadas,
+        'alertas_creadas': len(alertas),
+        'alertas_duplicadas': len(candidatas) - len(alertas),
+    }
@@ -6,8 +6,5 @@ class BananeraConfig(AppConfig):
     name = 'bananera'
     verbose_name = 'Sistema Bananera'
 
-
-
-
-
-
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,148 @@
+"""
+Archivo de temporadas cerradas (particionado caliente/frío por año)
+
+``archivar_temporada`` mueve los enfundes, cosechas y recuperaciones de un
+año cerrado a las tablas ``*_archivo`` con ``INSERT ... SELECT`` + ``DELETE``
+en una transacción. Las tablas calientes solo guardan las temporadas abiertas.
+
+Las lecturas usan ``consulta(modelo, ...)``: si el rango pedido no alcanza
+ningún año archivado devuelve el queryset de la tabla caliente; si lo alcanza,
+el de la vista ``*_historico`` (``UNION ALL`` de ambas tablas), de modo que
+los filtros, agregados y ``values()`` funcionan igual sobre las dos.
+"""
+
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from .models import (
+    Cosecha, CosechaArchivo, CosechaHistorico, Enfunde, EnfundeArchivo, EnfundeHistorico,
+    RecuperacionCinta, RecuperacionCintaArchivo, RecuperacionCintaHistorico, TemporadaArchivada,
+)
+from .versiones import invalidar_datos
+
+CLAVE_AÑOS = 'bananera:temporadas_archivadas'
+
+HISTORICOS = {
+    Enfunde: EnfundeHistorico,
+    Cosecha: CosechaHistorico,
+    RecuperacionCinta: RecuperacionCintaHistorico,
+}
+
+
+def años_archivados():
+    años = cache.get(CLAVE_AÑOS)
+    if años is None:
+        años = frozenset(TemporadaArchivada.objects.values_list('año', flat=True))
+        cache.set(CLAVE_AÑOS, años, None)
+    return años
+
+
+def _año(valor):
+    if isinstance(valor, date):
+        return valor.year
+    try:
+        return int(str(valor)[:4])
+    except ValueError:
+        return None
+
+
+def alcanza_archivo(fecha_inicio=None, fecha_fin=None, año=None):
+    """True si el año o el rango de fechas incluye alguna temporada archivada"""
+    archivados = años_archivados()
+    if not archivados:
+        return False
+    if año not in (None, ''):
+        return _año(año) in archivados
+    desde = _año(fecha_inicio) if fecha_inicio else None
+    hasta = _año(fecha_fin) if fecha_fin else None
+    return any(
+        (desde is None or a >= desde) and (hasta is None or a <= hasta)
+        for a in archivados
+    )
+
+
+def consulta(modelo, fecha_inicio=None, fecha_fin=None, año=None):
+    """Queryset del modelo caliente o de su vista histórica según el rango"""
+    if alcanza_archivo(fecha_inicio, fecha_fin, año):
+        return HISTORICOS[modelo].objects.all()
+    return modelo.objects.all()
+
+
+class ArchivoTemporadaMixin:
+    """
+    Mixin de ViewSet: las lecturas con ``?año=`` de una temporada archivada
+    se sirven desde la vista histórica. Las escrituras siempre van a la
+    tabla caliente.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS and alcanza_archivo(año=self.request.query_params.get('año')):
+            historico = HISTORICOS[queryset.model].objects.all()
+            historico.query.select_related = queryset.query.select_related
+            return historico
+        return queryset
+
+
+# ==================== Mover temporadas ====================
+
+def _copiar(cursor, origen, destino, condicion, año):
+    columnas = ', '.join(connection.ops.quote_name(f.column) for f in origen._meta.concrete_fields)
+    cursor.execute(
+        f'INSERT INTO {destino._meta.db_table} ({columnas}) '
+        f'SELECT {columnas} FROM {origen._meta.db_table} WHERE {condicion}', [año]
+    )
+
+
+def _borrar(cursor, origen, condicion, año):
+    cursor.execute(f'DELETE FROM {origen._meta.db_table} WHERE {condicion}', [año])
+    return cursor.rowcount
+
+
+def _mover_temporada(año, hacia_archivo):
+    enfundes, recuperaciones, cosechas = (
+        (Enfunde, EnfundeArchivo), (RecuperacionCinta, RecuperacionCintaArchivo), (Cosecha, CosechaArchivo)
+    )
+    if not hacia_archivo:
+        enfundes, recuperaciones, cosechas = (par[::-1] for par in (enfundes, recuperaciones, cosechas))
+
+    por_año = f"{connection.ops.quote_name('año')} = %s"
+    por_enfunde = f'enfunde_id IN (SELECT id FROM {enfundes[0]._meta.db_table} WHERE {por_año})'
+    with connection.cursor() as cursor:
+        # Los enfundes se copian antes y se borran después que sus recuperaciones
+        _copiar(cursor, *enfundes, por_año, año)
+        _copiar(cursor, *recuperaciones, por_enfunde, año)
+        movidos = {'recuperaciones': _borrar(cursor, recuperaciones[0], por_enfunde, año)}
+        movidos['enfundes'] = _borrar(cursor, enfundes[0], por_año, año)
+        _copiar(cursor, *cosechas, por_año, año)
+        movidos['cosechas'] = _borrar(cursor, cosechas[0], por_año, año)
+    return movidos
+
+
+def archivar_temporada(año):
+    """
+    Mueve la temporada al archivo. Puede repetirse para mover registros
+    cargados después de archivarla. Devuelve los registros movidos por tabla.
+    """
+    with transaction.atomic():
+        movidos = _mover_temporada(año, hacia_archivo=True)
+        temporada, _ = TemporadaArchivada.objects.select_for_update().get_or_create(año=año)
+        for campo, cantidad in movidos.items():
+            setattr(temporada, campo, getattr(temporada, campo) + cantidad)
+        temporada.save()
+    cache.delete(CLAVE_AÑOS)
+    invalidar_datos()
+    return movidos
+
+
+def restaurar_temporada(año):
+    """Devuelve la temporada a las tablas calientes"""
+    with transaction.atomic():
+        movidos = _mover_temporada(año, hacia_archivo=False)
+        TemporadaArchivada.objects.filter(año=año).delete()
+    cache.delete(CLAVE_AÑOS)
+    invalidar_datos()
+    return movidos
@@ -0,0 +1,302 @@
+"""
+Vistas asíncronas de reportes y tableros
+
+Pensadas para servirse con ASGI (``data.asgi``). Cada consulta independiente
+de un reporte se ejecuta en su propio hilo y conexión mediante
+``asyncio.gather``, de modo que el tiempo de respuesta es el de la consulta
+más lenta y el worker sigue atendiendo otras peticiones mientras esperan.
+
+Los ``a*`` del ORM asíncrono de Django se ejecutan en el hilo
+``thread_sensitive`` de la petición, por lo que ``gather`` sobre ellos las
+seguiría serializando; por eso aquí se usa ``thread_sensitive=False``.
+"""
+
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import eventos, formatos, reportes
+from .alcance import finca_de, restringido_a_finca
+from .autenticacion import JWTAuthenticationCacheada
+from .compresion import respuesta_cacheada
+from .enrutador import lectura_replica
+from .models import Finca
+
+autenticacion = JWTAuthenticationCacheada()
+
+
+def _respuesta(datos, status=200, **kwargs):
+    # Mismo codificador que DRF para que Decimal/UUID/fechas salgan igual
+    return JsonResponse(datos, status=status, encoder=JSONEncoder, safe=False, **kwargs)
+
+
+def _aislada(consulta, *args):
+    """Ejecuta la consulta en un hilo del pool cerrando su conexión al terminar"""
+    def ejecutar():
+        close_old_connections()
+        try:
+            return consulta(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(ejecutar, thread_sensitive=False)()
+
+
+async def en_paralelo(*consultas):
+    """Recibe tuplas ``(funcion, *args)`` y devuelve sus resultados en orden"""
+    return await asyncio.gather(*(_aislada(*consulta) for consulta in consultas))
+
+
+def jwt_requerido(vista):
+    """Equivalente asíncrono de ``IsAuthenticated`` con la autenticación JWT de la API"""
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        try:
+            resultado = await sync_to_async(autenticacion.authenticate)(request)
+        except AuthenticationFailed as exc:
+            detalle = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+            return _respuesta(detalle, status=401, headers={
+                'WWW-Authenticate': autenticacion.authenticate_header(request),
+            })
+        if resultado is None:
+            return _respuesta(
+                {'detail': 'Las credenciales de autenticación no se proveyeron.'},
+                status=401,
+                headers={'WWW-Authenticate': autenticacion.authenticate_header(request)},
+            )
+        request.user, request.auth = resultado
+        try:
+            return await vista(request, *args, **kwargs)
+        except PermissionDenied as exc:
+            return _respuesta({'detail': exc.detail}, status=403)
+    return envoltura
+
+
+def ticket_o_jwt(vista):
+    """``EventSource`` no permite cabeceras: acepta un ticket de un solo uso en ``?ticket=`` o el JWT"""
+    con_jwt = jwt_requerido(vista)
+
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        ticket = request.GET.get('ticket')
+        if not ticket:
+            return await con_jwt(request, *args, **kwargs)
+        usuario = await sync_to_async(eventos.canjear_ticket)(ticket)
+        if usuario is None:
+            return _respuesta({'detail': 'Ticket de eventos inválido, vencido o ya usado.'}, status=401)
+        request.user = usuario
+        return await vista(request, *args, **kwargs)
+    return envoltura
+
+
+# ==================== Reportes ====================
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def reporte_produccion(request):
+    """Reporte de producción"""
+    queryset = reportes.cosechas_filtradas(
+        request.GET.get('fecha_inicio'),
+        request.GET.get('fecha_fin'),
+        finca_de(request.user, request.GET.get('finca')),
+    )
+    resumen, por_finca = await en_paralelo(
+        (reportes.resumen_produccion, queryset),
+        (reportes.produccion_por_finca, queryset),
+    )
+    return formatos.respuesta(request, {'resumen': resumen, 'por_finca': por_finca})
+
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def reporte_nomina(request):
+    """Reporte de nómina"""
+    queryset = reportes.roles_filtrados(
+        request.GET.get('mes'),
+        request.GET.get('año'),
+        finca_de(request.user, request.GET.get('finca')),
+    )
+    resumen, por_finca = await en_paralelo(
+        (reportes.resumen_nomina, queryset),
+        (reportes.nomina_por_finca, queryset),
+    )
+    return formatos.respuesta(request, {'resumen': resumen, 'por_finca': por_finca})
+
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def reporte_inventario(request):
+    """Reporte de inventario"""
+    queryset = reportes.insumos_filtrados(finca_de(request.user, request.GET.get('finca')))
+    resumen, stock_bajo, por_categoria = await en_paralelo(
+        (reportes.resumen_inventario, queryset),
+        (reportes.insumos_stock_bajo, queryset),
+        (reportes.inventario_por_categoria, queryset),
+    )
+    return formatos.respuesta(request, {
+        'resumen': {
+            'total_insumos': resumen['total_insumos'],
+            'stock_bajo': stock_bajo,
+            'valor_total': resumen['valor_total'],
+        },
+        'por_categoria': por_categoria,
+    })
+
+
+# ==================== Tableros ====================
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def cosechas_tendencias(request):
+    """Tendencias de cosecha por semana"""
+    tendencias, = await en_paralelo((
+        reportes.tendencias_cosecha,
+        request.GET.get('año', timezone.now().year),
+        finca_de(request.user, request.GET.get('finca')),
+    ))
+    return formatos.respuesta(request, tendencias)
+
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def cosechas_comparativo(request):
+    """Comparativo de producción entre fincas"""
+    comparativo, = await en_paralelo((
+        reportes.comparativo_fincas,
+        request.GET.get('año', timezone.now().year),
+        finca_de(request.user, request.GET.get('finca')),
+    ))
+    return formatos.respuesta(request, comparativo)
+
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+async def finca_estadisticas(request, pk):
+    """Estadísticas de una finca específica"""
+    if finca_de(request.user, pk) != pk:
+        return _respuesta({'detail': 'No encontrado.'}, status=404)
+    existe, cosechas, enfundes = await en_paralelo(
+        (Finca.objects.filter(pk=pk).exists,),
+        (reportes.cosechas_finca, pk),
+        (reportes.enfundes_finca, pk),
+    )
+    if not existe:
+        return _respuesta({'detail': 'No encontrado.'}, status=404)
+    return formatos.respuesta(request, reportes.estadisticas_finca(cosechas, enfundes))
+
+
+@lectura_replica
+@require_GET
+@jwt_requerido
+@respuesta_cacheada
+async def dashboard(request):
+    """Indicadores del tablero principal en una sola petición"""
+    año = request.GET.get('año', timezone.now().year)
+    finca = finca_de(request.user, request.GET.get('finca'))
+    cosechas = reportes.cosechas_filtradas(finca=finca)
+    insumos = reportes.insumos_filtrados(finca)
+    produccion, tendencias, inventario, stock_bajo, nomina, alertas = await en_paralelo(
+        (reportes.resumen_produccion, cosechas),
+        (reportes.tendencias_cosecha, año, finca),
+        (reportes.resumen_inventario, insumos),
+        (reportes.insumos_stock_bajo, insumos),
+        (reportes.resumen_nomina, reportes.roles_filtrados(año=año, finca=finca)),
+        (reportes.alertas_pendientes, finca),
+    )
+    return formatos.respuesta(request, {
+        'produccion': produccion,
+        'tendencias': tendencias,
+        'inventario': {**inventario, 'stock_bajo': stock_bajo},
+        'nomina': nomina,
+        'alertas': alertas,
+    })
+
+
+# ==================== Eventos (SSE) ====================
+
+LATIDO = 15
+
+
+def _evento_sse(evento):
+    datos = json.dumps(evento['datos'], cls=JSONEncoder)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n"
+
+
+@csrf_exempt  # autenticado por cabecera (JWT), como la API de DRF
+@require_POST
+@jwt_requerido
+async def eventos_ticket(request):
+    """Ticket de un solo uso para abrir ``eventos_stream`` desde un ``EventSource``"""
+    ticket = await sync_to_async(eventos.emitir_ticket)(request.user)
+    return _respuesta({'ticket': ticket, 'expira_en': eventos.TTL_TICKET})
+
+
+@require_GET
+@ticket_o_jwt
+async def eventos_stream(request):
+    """
+    Server-Sent Events con alertas nuevas, cruces de stock mínimo y
+    registros de producción. Con ``Last-Event-ID`` o ``?desde=`` (el cliente
+    reconecta con un ticket nuevo y el último id recibido) se reenvían
+    primero los eventos perdidos.
+    """
+    finca = finca_de(request.user) if restringido_a_finca(request.user) else None
+    try:
+        visto = int(request.headers.get('Last-Event-ID') or request.GET.get('desde') or 0)
+    except ValueError:
+        visto = 0
+
+    async def flujo():
+        # Suscribirse antes de recuperar para no perder eventos entre ambos pasos
+        suscripcion = await eventos.difusor.suscribir(finca)
+        try:
+            yield f'retry: {eventos.INTERVALO * 3000:.0f}\n\n'
+            ultimo = visto
+            recuperados = set()
+            while ultimo:
+                perdidos = await eventos.en_hilo(eventos.eventos_desde, ultimo)
+                for evento in perdidos:
+                    ultimo = evento['id']
+                    recuperados.add(evento['id'])
+                    if suscripcion.acepta(evento):
+                        yield _evento_sse(evento)
+                if len(perdidos) < eventos.MAX_POR_CONSULTA:
+                    break
+            while True:
+                try:
+                    evento = await asyncio.wait_for(suscripcion.cola.get(), LATIDO)
+                except asyncio.TimeoutError:
+                    yield ': latido\n\n'
+                    continue
+                if evento is None:
+                    break
+                # Los tardíos llegan con un id menor: solo se omiten los ya recuperados
+                if evento['id'] in recuperados:
+                    continue
+                yield _evento_sse(evento)
+        finally:
+            eventos.difusor.cancelar(suscripcion)
+
+    return StreamingHttpResponse(flujo(), content_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
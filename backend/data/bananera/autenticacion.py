@@ -0,0 +1,96 @@
+"""
+Autenticación JWT con el usuario cacheado
+
+``JWTAuthentication`` consulta el ``Usuario`` en cada petición. Aquí se
+resuelve primero en un LRU del proceso (TTL corto) y luego en la caché
+compartida, bajo una clave con la versión del usuario; guardar o eliminar el
+usuario cambia la versión (ver ``signals.py``), de modo que las copias viejas
+dejan de usarse en todos los procesos.
+"""
+
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Usuario
+
+TTL_LOCAL = 5
+TTL_COMPARTIDA = 300
+MAX_LOCAL = 1024
+
+_local = OrderedDict()
+_bloqueo = threading.Lock()
+
+
+def _clave_version(usuario_id):
+    return f'bananera:usuario:{usuario_id}:version'
+
+
+def invalidar_usuario(usuario_id):
+    usuario_id = str(usuario_id)
+    with _bloqueo:
+        _local.pop(usuario_id, None)
+    cache.set(_clave_version(usuario_id), uuid.uuid4().hex[:12], None)
+
+
+def obtener_usuario(usuario_id):
+    """Usuario con ``finca_asignada`` precargada, o None si no existe"""
+    usuario_id = str(usuario_id)
+    ahora = time.monotonic()
+    with _bloqueo:
+        entrada = _local.get(usuario_id)
+        if entrada and entrada[0] > ahora:
+            _local.move_to_end(usuario_id)
+            return copy.copy(entrada[1])
+
+    version = cache.get(_clave_version(usuario_id))
+    if version is None:
+        # add() para no pisar una invalidación concurrente
+        cache.add(_clave_version(usuario_id), uuid.uuid4().hex[:12], None)
+        version = cache.get(_clave_version(usuario_id))
+    clave = f'bananera:usuario:{usuario_id}:{version}'
+
+    usuario = cache.get(clave)
+    if usuario is None:
+        usuario = Usuario.objects.select_related('finca_asignada').filter(pk=usuario_id).first()
+        if usuario is None:
+            return None
+        cache.set(clave, usuario, TTL_COMPARTIDA)
+
+    with _bloqueo:
+        _local[usuario_id] = (ahora + TTL_LOCAL, usuario)
+        _local.move_to_end(usuario_id)
+        while len(_local) > MAX_LOCAL:
+            _local.popitem(last=False)
+    # Copia por petición para que nadie modifique la instancia compartida
+    return copy.copy(usuario)
+
+
+class JWTAuthenticationCacheada(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        usuario = obtener_usuario(usuario_id)
+        if usuario is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not (usuario.is_active and usuario.activo):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(usuario.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return usuario
@@ -0,0 +1,200 @@
+"""
+Búsqueda de texto indexada (SQLite FTS5)
+
+Cada modelo de ``INDICES`` tiene una tabla virtual FTS5 con tokenizador
+trigram (``bananera_<modelo>_fts``) que guarda sus campos de búsqueda
+normalizados: en minúsculas y sin tildes, así "nunez" encuentra "Núñez". El
+trigram de SQLite 3.40 no admite ``remove_diacritics``, por eso la
+normalización se hace en Python al indexar y al consultar.
+
+El índice se mantiene con señales (``signals.py``) y tras los
+``bulk_create``; ``manage.py reindexar_busqueda`` lo reconstruye. El rowid de
+la tabla FTS se deriva del UUID, de modo que actualizar o borrar una fila es
+una búsqueda por clave y no un recorrido.
+
+La consulta une la tabla FTS al queryset ya limitado (alcance por finca y
+filtros de la petición), sin tope previo. En PostgreSQL (o si la tabla no
+existe) ``BusquedaIndexadaFilter`` se comporta como el ``SearchFilter`` de
+DRF.
+"""
+
+import unicodedata
+from functools import reduce
+from operator import or_
+
+from django.db import DatabaseError, connections, router
+from django.db.models import Q
+from rest_framework import filters
+
+from .models import Alerta, Empleado, Insumo, Usuario
+
+INDICES = {
+    Empleado: ['nombre', 'cedula', 'telefono'],
+    Insumo: ['nombre'],
+    Usuario: ['nombre', 'email', 'telefono'],
+    Alerta: ['titulo', 'mensaje'],
+}
+
+MIN_CARACTERES = 3  # trigram no encuentra términos más cortos
+
+_MASCARA_ROWID = (1 << 63) - 1
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ni diéresis ('Núñez' -> 'nunez')"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def tabla(modelo):
+    return f'{modelo._meta.db_table}_fts'
+
+
+def rowid(pk):
+    return pk.int & _MASCARA_ROWID
+
+
+def sql_crear(modelo):
+    columnas = ', '.join(INDICES[modelo])
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabla(modelo)} "
+        f"USING fts5(objeto UNINDEXED, {columnas}, tokenize='trigram')"
+    )
+
+
+def _conexion(modelo, using=None):
+    conexion = connections[using or router.db_for_write(modelo)]
+    return conexion if conexion.vendor == 'sqlite' else None
+
+
+# ==================== Mantenimiento ====================
+
+def _filas(modelo, objetos):
+    campos = INDICES[modelo]
+    return [
+        [rowid(obj.pk), obj.pk.hex, *(normalizar(getattr(obj, campo)) for campo in campos)]
+        for obj in objetos
+    ]
+
+
+def indexar(*objetos):
+    """Inserta o reemplaza los objetos (de un mismo modelo) en su índice"""
+    if not objetos:
+        return
+    modelo = type(objetos[0])
+    conexion = _conexion(modelo)
+    if conexion is None:
+        return
+    filas = _filas(modelo, objetos)
+    marcas = ', '.join(['%s'] * (len(INDICES[modelo]) + 2))
+    with conexion.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {tabla(modelo)} WHERE rowid = %s', [[fila[0]] for fila in filas])
+        cursor.executemany(
+            f"INSERT INTO {tabla(modelo)} (rowid, objeto, {', '.join(INDICES[modelo])}) VALUES ({marcas})",
+            filas,
+        )
+
+
+def desindexar(objeto):
+    conexion = _conexion(type(objeto))
+    if conexion is None:
+        return
+    with conexion.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla(type(objeto))} WHERE rowid = %s', [rowid(objeto.pk)])
+
+
+def reconstruir(modelo, lote=2000):
+    """Vacía y vuelve a llenar el índice del modelo; devuelve las filas indexadas"""
+    conexion = _conexion(modelo)
+    if conexion is None:
+        return 0
+    with conexion.cursor() as cursor:
+        cursor.execute(sql_crear(modelo))
+        cursor.execute(f'DELETE FROM {tabla(modelo)}')
+    total = 0
+    pendientes = []
+    for objeto in modelo._base_manager.only('pk', *INDICES[modelo]).iterator(chunk_size=lote):
+        pendientes.append(objeto)
+        if len(pendientes) == lote:
+            indexar(*pendientes)
+            total += len(pendientes)
+            pendientes = []
+    indexar(*pendientes)
+    return total + len(pendientes)
+
+
+def limpiar_huerfanos(modelo):
+    """Quita del índice las filas borradas sin señales (purga de retencion.py)"""
+    conexion = _conexion(modelo)
+    if conexion is None:
+        return 0
+    with conexion.cursor() as cursor:
+        cursor.execute(
+            # SQLite guarda el UUID como 32 caracteres hexadecimales
+            f'DELETE FROM {tabla(modelo)} WHERE objeto NOT IN (SELECT id FROM {modelo._meta.db_table})'
+        )
+        return cursor.rowcount
+
+
+# ==================== Consulta ====================
+
+def expresion(terminos, campos):
+    """Cada término como frase entre comillas (FTS5 los combina con AND), solo en ``campos``"""
+    frases = ' '.join('"{}"'.format(normalizar(t).replace('"', '""')) for t in terminos)
+    return f"{{{' '.join(campos)}}} : ({frases})"
+
+
+def _indice_disponible(modelo, using):
+    conexion = _conexion(modelo, using)
+    if conexion is None:
+        return False
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [tabla(modelo)])
+            return cursor.fetchone() is not None
+    except DatabaseError:
+        return False
+
+
+def filtrar(queryset, terminos, campos, relevancia=True):
+    """
+    Une el índice FTS5 al queryset (con su alcance y filtros ya aplicados) y,
+    con ``relevancia``, lo ordena por bm25. Sin tope de resultados: la
+    paginación de la vista o del admin se aplica después. Devuelve None si
+    debe usarse la búsqueda ``icontains`` de siempre.
+    """
+    modelo = queryset.model
+    if modelo not in INDICES or not set(campos) <= set(INDICES[modelo]):
+        return None
+    largos = [t for t in terminos if len(normalizar(t)) >= MIN_CARACTERES]
+    if not largos or not _indice_disponible(modelo, queryset.db):
+        return None
+
+    indice = tabla(modelo)
+    clave = f'{connections[queryset.db].ops.quote_name(modelo._meta.db_table)}.{modelo._meta.pk.column}'
+    queryset = queryset.extra(
+        tables=[indice],
+        # SQLite guarda el UUID como 32 caracteres hexadecimales, igual que ``objeto``
+        where=[f'{indice}.objeto = {clave}', f'{indice} MATCH %s'],
+        params=[expresion(largos, campos)],
+        order_by=[f'{indice}.rank'] if relevancia else None,
+    )
+    # Los términos cortos se filtran con icontains sobre los candidatos
+    for termino in terminos:
+        if termino not in largos:
+            queryset = queryset.filter(reduce(or_, (Q(**{f'{campo}__icontains': termino}) for campo in campos)))
+    return queryset
+
+
+class BusquedaIndexadaFilter(filters.SearchFilter):
+    """SearchFilter sobre el índice FTS5, ordenado por relevancia salvo ?ordering="""
+
+    def filter_queryset(self, request, queryset, view):
+        campos = self.get_search_fields(view, request)
+        terminos = self.get_search_terms(request)
+        if not campos or not terminos:
+            return queryset
+        resultado = filtrar(queryset, terminos, campos, relevancia=not request.query_params.get('ordering'))
+        if resultado is None:
+            return super().filter_queryset(request, queryset, view)
+        return resultado
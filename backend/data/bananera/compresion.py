@@ -0,0 +1,268 @@
+"""
+Compresión de respuestas y caché de respuestas precomprimidas
+
+``CompresionMiddleware`` comprime con brotli (si el paquete ``brotli`` está
+instalado) o gzip según ``Accept-Encoding``, solo respuestas de texto/JSON de
+al menos ``COMPRESION_MINIMA_BYTES``. Las respuestas en streaming (SSE,
+exportaciones CSV) salen tal cual.
+
+Las lecturas pesadas marcadas con ``@respuesta_cacheada`` (reportes,
+tableros, digest y listados grandes) guardan en la caché el cuerpo ya
+renderizado junto a sus variantes comprimidas, con la versión de datos en la
+clave: cada variante se comprime una vez y se sirve muchas. Llevan además un
+``ETag`` para que el cliente revalide con ``If-None-Match`` y reciba un 304.
+
+La versión de datos es la de la primaria. Una respuesta calculada en la
+réplica puede ir por detrás de esa versión, así que se sirve sin guardarla
+y sin ``ETag``; sí puede servirse una entrada que guardó antes la primaria.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import re
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from rest_framework.request import Request
+
+from . import formatos
+from .alcance import restringido_a_finca
+from .enrutador import leyendo_de_replica
+from .versiones import version_datos
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MINIMA_POR_DEFECTO = 1024
+TTL_RESPUESTA = 600
+# Al vuelo se prioriza la latencia; lo que va a la caché se comprime más
+NIVELES = {'br': 5, 'gzip': 6}
+NIVELES_CACHE = {'br': 9, 'gzip': 9}
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', '+json', 'application/javascript',
+                      'application/xml', 'image/svg+xml', formatos.TIPO_MSGPACK)
+
+_CODIFICACION = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*')
+
+
+# ==================== Negociación ====================
+
+def disponibles():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def codificacion(request):
+    """'br', 'gzip' o None según ``Accept-Encoding`` (a igual peso, brotli)"""
+    pesos = {}
+    for parte in request.headers.get('Accept-Encoding', '').split(','):
+        coincidencia = _CODIFICACION.fullmatch(parte)
+        if not coincidencia:
+            continue
+        nombre, q = coincidencia.group(1).lower(), coincidencia.group(2)
+        try:
+            pesos[nombre] = float(q) if q is not None else 1.0
+        except ValueError:
+            continue
+    comodin = pesos.get('*', 0.0)
+    candidatas = [(pesos.get(c, comodin), c) for c in disponibles()]
+    peso, elegida = max(candidatas, key=lambda c: c[0])
+    return elegida if peso > 0 else None
+
+
+def comprimible(response):
+    tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return any(t in tipo for t in TIPOS_COMPRIMIBLES)
+
+
+def minima():
+    return getattr(settings, 'COMPRESION_MINIMA_BYTES', MINIMA_POR_DEFECTO)
+
+
+def comprimir(contenido, cod, niveles=NIVELES):
+    if cod == 'br':
+        return brotli.compress(contenido, quality=niveles['br'])
+    # mtime=0: mismo cuerpo, mismos bytes
+    return gzip.compress(contenido, compresslevel=niveles['gzip'], mtime=0)
+
+
+def etag_coincide(request, etag):
+    """Comparación débil de ``If-None-Match``: la versión comprimida lleva ``W/``"""
+    pedidos = request.headers.get('If-None-Match', '')
+    if not pedidos:
+        return False
+    valor = etag.removeprefix('W/')
+    return any(p.strip() == '*' or p.strip().removeprefix('W/') == valor for p in pedidos.split(','))
+
+
+def aplicar(request, response):
+    """Comprime la respuesta si corresponde; usa la variante cacheada si la hay"""
+    if response.streaming or response.has_header('Content-Encoding') or not comprimible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    cod = codificacion(request)
+    if cod is None or len(response.content) < minima():
+        return response
+
+    cacheada = getattr(response, 'respuesta_cacheada', None)
+    if cacheada is not None:
+        cuerpo = cacheada.variante(cod)
+    else:
+        cuerpo = comprimir(response.content, cod)
+        if len(cuerpo) >= len(response.content):
+            return response
+    response.content = cuerpo
+    response['Content-Length'] = str(len(cuerpo))
+    response['Content-Encoding'] = cod
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        # Otros bytes con la misma representación: el validador pasa a ser débil
+        response['ETag'] = f'W/{etag}'
+    return response
+
+
+# ==================== Caché de respuestas ====================
+
+class RespuestaCacheada:
+    """Cuerpo renderizado, cabeceras y variantes comprimidas guardados bajo una clave"""
+
+    def __init__(self, clave, entrada, ttl):
+        self.clave = clave
+        self.entrada = entrada
+        self.ttl = ttl
+
+    @classmethod
+    def desde(cls, clave, response, ttl):
+        return cls(clave, {
+            'contenido': response.content,
+            'tipo': response['Content-Type'],
+            'etag': response['ETag'],
+            'cache_control': response.get('Cache-Control'),
+            'variantes': {},
+        }, ttl)
+
+    def guardar(self):
+        cache.set(self.clave, self.entrada, self.ttl)
+
+    def variante(self, cod):
+        variantes = self.entrada['variantes']
+        if cod not in variantes:
+            variantes[cod] = comprimir(self.entrada['contenido'], cod, NIVELES_CACHE)
+            self.guardar()
+        return variantes[cod]
+
+    def respuesta(self):
+        response = HttpResponse(self.entrada['contenido'], content_type=self.entrada['tipo'])
+        response['ETag'] = self.entrada['etag']
+        if self.entrada['cache_control']:
+            response['Cache-Control'] = self.entrada['cache_control']
+        response.respuesta_cacheada = self
+        return response
+
+
+def _alcance(usuario):
+    # Los roles por finca ven solo la suya; el resto comparte la entrada
+    return str(usuario.finca_asignada_id) if restringido_a_finca(usuario) else 'todas'
+
+
+def _formato(request):
+    tipo = getattr(request, 'accepted_media_type', None)
+    return tipo or formatos.pedido(request) or 'json'
+
+
+def _clave(request, version):
+    ruta = request.get_full_path()
+    resumen = hashlib.sha1(f'{_alcance(request.user)}|{_formato(request)}|{ruta}'.encode()).hexdigest()
+    return f'bananera:respuesta:{version}:{resumen}', f'"{version}-{resumen[:12]}"'
+
+
+def _cacheable(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    # La API navegable incluye el usuario y el token CSRF en el HTML
+    return request.method == 'GET' and getattr(renderer, 'format', None) != 'api'
+
+
+def _no_modificada(etag, cache_control):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
+
+
+def _buscar(request, version, ttl):
+    clave, etag = _clave(request, version())
+    entrada = cache.get(clave)
+    if entrada is None:
+        return clave, etag, None
+    if etag_coincide(request, entrada['etag']):
+        return clave, etag, _no_modificada(entrada['etag'], entrada['cache_control'])
+    return clave, etag, RespuestaCacheada(clave, entrada, ttl)
+
+
+def _preparar(request, response, clave, etag, ttl):
+    """Guarda la respuesta recién generada (al renderizarse, si es de DRF) y la devuelve"""
+    if response.status_code != 200 or response.streaming or leyendo_de_replica():
+        return response
+    if not response.has_header('ETag'):
+        response['ETag'] = etag
+    if not response.has_header('Cache-Control'):
+        response['Cache-Control'] = 'private, no-cache'
+
+    def guardar(renderizada):
+        cacheada = RespuestaCacheada.desde(clave, renderizada, ttl)
+        renderizada.respuesta_cacheada = cacheada
+        cod = codificacion(request)
+        if cod and len(renderizada.content) >= minima() and comprimible(renderizada):
+            cacheada.variante(cod)
+        else:
+            cacheada.guardar()
+
+    if getattr(response, 'is_rendered', True):
+        guardar(response)
+    else:
+        response.add_post_render_callback(guardar)
+    return response
+
+
+def respuesta_cacheada(vista=None, *, ttl=TTL_RESPUESTA, version=version_datos):
+    """
+    Cachea la respuesta de una acción de ViewSet, una ``@api_view`` o una vista
+    asíncrona (debajo de ``@jwt_requerido``) por versión de datos, alcance del
+    usuario, formato y URL completa. ``version`` cambia la función que da la
+    versión (p. ej. la del digest, que también cambia con el día). Respeta el
+    ``ETag`` y el ``Cache-Control`` que fije la vista.
+    """
+    def decorador(vista):
+        def solicitud(args):
+            return next(a for a in args if isinstance(a, (Request, HttpRequest)))
+
+        if asyncio.iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura(*args, **kwargs):
+                request = solicitud(args)
+                if not _cacheable(request):
+                    return await vista(*args, **kwargs)
+                clave, etag, encontrada = await sync_to_async(_buscar)(request, version, ttl)
+                if encontrada is not None:
+                    return encontrada if isinstance(encontrada, HttpResponse) else encontrada.respuesta()
+                response = await vista(*args, **kwargs)
+                return await sync_to_async(_preparar)(request, response, clave, etag, ttl)
+        else:
+            @wraps(vista)
+            def envoltura(*args, **kwargs):
+                request = solicitud(args)
+                if not _cacheable(request):
+                    return vista(*args, **kwargs)
+                clave, etag, encontrada = _buscar(request, version, ttl)
+                if encontrada is not None:
+                    return encontrada if isinstance(encontrada, HttpResponse) else encontrada.respuesta()
+                return _preparar(request, vista(*args, **kwargs), clave, etag, ttl)
+        return envoltura
+
+    return decorador(vista) if vista is not None else decorador
@@ -0,0 +1,18 @@
+"""
+Ajustes aplicados a cada conexión nueva de base de datos
+"""
+
+from django.conf import settings
+
+
+def configurar_sqlite(sender, connection, **kwargs):
+    """
+    Aplica ``settings.SQLITE_PRAGMAS`` a las conexiones SQLite. Son solo los
+    PRAGMA que valen por conexión; ``journal_mode = wal`` queda guardado en
+    el archivo y lo fija la migración 0015.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nombre, valor in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
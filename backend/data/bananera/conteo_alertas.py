@@ -0,0 +1,97 @@
+"""
+Contadores de alertas no leídas por finca y prioridad
+
+``ConteoAlertas`` se actualiza con ``F()`` al crear, leer, modificar o borrar
+una alerta (señales en ``signals.py``) y tras las escrituras masivas
+(``sumar_nuevas`` después de ``bulk_create``; ``marcar`` para leer o
+desleer en bloque). ``recalcular`` reconstruye la tabla si se desajusta
+(p. ej. tras un ``update`` hecho a mano). El indicador del encabezado lee esta tabla (unas pocas filas) en
+vez de serializar todas las alertas no leídas.
+"""
+
+import logging
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .alcance import limitar_a_finca
+from .models import Alerta, ConteoAlertas
+
+logger = logging.getLogger('bananera.conteo_alertas')
+
+
+def ajustar(finca_id, prioridad, delta):
+    if not delta:
+        return
+    filtro = {'finca_id': finca_id, 'prioridad': prioridad}
+    if ConteoAlertas.objects.filter(**filtro).update(no_leidas=F('no_leidas') + delta):
+        return
+    if delta < 0:
+        logger.warning('Contador de alertas inexistente al restar %s (finca %s, %s); ejecutar recalcular()',
+                       -delta, finca_id, prioridad)
+    try:
+        with transaction.atomic():
+            ConteoAlertas.objects.create(no_leidas=max(delta, 0), **filtro)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el update y el create
+        ConteoAlertas.objects.filter(**filtro).update(no_leidas=F('no_leidas') + delta)
+
+
+def sumar_nuevas(alertas):
+    """Suma las alertas creadas con ``bulk_create``"""
+    for (finca_id, prioridad), cantidad in Counter(
+        (a.finca_id, a.prioridad) for a in alertas if not a.leida
+    ).items():
+        ajustar(finca_id, prioridad, cantidad)
+
+
+def marcar(queryset, leida=True):
+    """
+    Marca las alertas del queryset como leídas (o no leídas) y ajusta los
+    contadores solo por las que cambiaron. Devuelve cuántas cambiaron.
+    """
+    with transaction.atomic():
+        cambian = list(
+            queryset.filter(leida=not leida).select_for_update()
+            .values_list('id', 'finca_id', 'prioridad')
+        )
+        if not cambian:
+            return 0
+        Alerta.objects.filter(id__in=[id_ for id_, _, _ in cambian]).update(leida=leida)
+        signo = -1 if leida else 1
+        for (finca_id, prioridad), cantidad in Counter((f, p) for _, f, p in cambian).items():
+            ajustar(finca_id, prioridad, signo * cantidad)
+    return len(cambian)
+
+
+def recalcular():
+    """Reconstruye los contadores desde las alertas no leídas"""
+    filas = (
+        Alerta.objects.filter(leida=False)
+        .values('finca_id', 'prioridad')
+        .annotate(no_leidas=Count('id'))
+        .order_by()
+    )
+    with transaction.atomic():
+        ConteoAlertas.objects.all().delete()
+        ConteoAlertas.objects.bulk_create(ConteoAlertas(**fila) for fila in filas)
+
+
+def no_leidas(usuario):
+    """Total y desglose por prioridad de las alertas no leídas visibles para el usuario"""
+    filas = (
+        limitar_a_finca(ConteoAlertas.objects.all(), usuario, incluir_sin_finca=True)
+        .values('prioridad')
+        .annotate(total=Sum('no_leidas', filter=Q(no_leidas__gt=0)),
+                  negativos=Count('id', filter=Q(no_leidas__lt=0)))
+        .order_by()
+    )
+    por_prioridad = {prioridad: 0 for prioridad, _ in Alerta.PRIORIDADES}
+    for fila in filas:
+        if fila['negativos']:
+            # Un contador bajo cero es un desajuste: no se resta de las demás fincas
+            logger.warning('%s contadores de alertas negativos (prioridad %s); ejecutar recalcular()',
+                           fila['negativos'], fila['prioridad'])
+        por_prioridad[fila['prioridad']] = fila['total'] or 0
+    return {'total': sum(por_prioridad.values()), 'por_prioridad': por_prioridad}
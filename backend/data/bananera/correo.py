@@ -0,0 +1,107 @@
+"""
+Envío de correos a través de la bandeja de salida
+
+Las vistas solo insertan filas en ``CorreoSaliente`` (una escritura local, sin
+SMTP). El comando ``enviar_correos`` toma lotes de pendientes, los envía por
+una única conexión SMTP reutilizada y reprograma los fallidos con espera
+exponencial.
+
+Los correos ``sensible`` (códigos de recuperación) pierden el cuerpo en cuanto
+se envían o fallan definitivamente: el secreto no queda en la base.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+TAMAÑO_LOTE = 50
+MAX_INTENTOS = 5
+CUERPO_ELIMINADO = '[Contenido eliminado: incluía un código de recuperación]'
+ESPERA_BASE = timedelta(seconds=30)
+# Tiempo que un lote queda reservado para el proceso que lo tomó
+RESERVA = timedelta(minutes=5)
+
+
+def encolar_correo(asunto, mensaje, destinatarios, remitente=None, sensible=False):
+    return CorreoSaliente.objects.create(
+        asunto=asunto,
+        mensaje=mensaje,
+        destinatarios=list(destinatarios),
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        sensible=sensible,
+    )
+
+
+def _tomar_lote(tamaño, ahora):
+    """Reserva hasta ``tamaño`` correos vencidos sin mantener la transacción durante el envío"""
+    with transaction.atomic():
+        pendientes = CorreoSaliente.objects.filter(estado='pendiente', proximo_intento__lte=ahora)
+        if connection.features.has_select_for_update_skip_locked:
+            pendientes = pendientes.select_for_update(skip_locked=True)
+        lote = list(pendientes.order_by('proximo_intento')[:tamaño])
+        CorreoSaliente.objects.filter(id__in=[c.id for c in lote]).update(proximo_intento=ahora + RESERVA)
+    return lote
+
+
+def _registrar_fallo(correo, error, ahora, max_intentos):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:1000]
+    if correo.intentos >= max_intentos:
+        correo.estado = 'fallido'
+    else:
+        correo.proximo_intento = ahora + ESPERA_BASE * 2 ** (correo.intentos - 1)
+
+
+def enviar_pendientes(tamaño=TAMAÑO_LOTE, max_intentos=MAX_INTENTOS):
+    """Envía un lote de la bandeja de salida. Devuelve {'enviados', 'reintentos', 'fallidos'}"""
+    ahora = timezone.now()
+    lote = _tomar_lote(tamaño, ahora)
+    if not lote:
+        return {'enviados': 0, 'reintentos': 0, 'fallidos': 0}
+
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as exc:
+        # Sin servidor no se intenta ninguno: todo el lote se reprograma
+        for correo in lote:
+            _registrar_fallo(correo, exc, ahora, max_intentos)
+    else:
+        try:
+            for correo in lote:
+                mensaje = EmailMessage(
+                    subject=correo.asunto,
+                    body=correo.mensaje,
+                    from_email=correo.remitente,
+                    to=correo.destinatarios,
+                    connection=conexion,
+                )
+                try:
+                    conexion.send_messages([mensaje])
+                except Exception as exc:
+                    _registrar_fallo(correo, exc, ahora, max_intentos)
+                else:
+                    correo.estado = 'enviado'
+                    correo.intentos += 1
+                    correo.fecha_envio = timezone.now()
+        finally:
+            conexion.close()
+
+    for correo in lote:
+        if correo.estado == 'enviado':
+            correo.proximo_intento = correo.fecha_envio
+        if correo.sensible and correo.estado != 'pendiente':
+            correo.mensaje = CUERPO_ELIMINADO
+    CorreoSaliente.objects.bulk_update(
+        lote, ['estado', 'intentos', 'ultimo_error', 'proximo_intento', 'fecha_envio', 'mensaje']
+    )
+    return {
+        'enviados': sum(c.estado == 'enviado' for c in lote),
+        'reintentos': sum(c.estado == 'pendiente' for c in lote),
+        'fallidos': sum(c.estado == 'fallido' for c in lote),
+    }
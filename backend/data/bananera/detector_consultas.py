@@ -0,0 +1,108 @@
+"""
+Detector de consultas N+1 y repetidas
+
+Agrupa las consultas de una petición (o de un bloque ``with``) por su forma
+SQL y señala las que se repiten ``UMBRAL`` veces o más, indicando el campo
+del serializador y la línea de código de la app que las originó. En pruebas
+lanza ``ConsultasRepetidasError``; en desarrollo solo registra una advertencia.
+"""
+
+import logging
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger('bananera.consultas')
+
+UMBRAL = 5
+SIN_ORIGEN = {'campo': None, 'codigo': None}
+
+_LISTA_IN = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMEROS = re.compile(r'\b\d+\b')
+_ESPACIOS = re.compile(r'\s+')
+
+
+class ConsultasRepetidasError(AssertionError):
+    pass
+
+
+def huella(sql):
+    """Forma de la consulta sin valores concretos"""
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    sql = _NUMEROS.sub('N', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+def _origen():
+    """Campo de serializador y línea de código de la app que ejecutan la consulta"""
+    campo = codigo = None
+    for frame, linea in traceback.walk_stack(None):
+        if campo is None:
+            propio = frame.f_locals.get('self')
+            if isinstance(propio, Field) and propio.field_name and propio.parent is not None:
+                campo = f'{type(propio.parent).__name__}.{propio.field_name}'
+        modulo = frame.f_globals.get('__name__', '')
+        if codigo is None and modulo.startswith('bananera.') and modulo not in (__name__, 'bananera.middleware'):
+            codigo = f'{frame.f_code.co_filename}:{linea} ({frame.f_code.co_name})'
+        if campo and codigo:
+            break
+    return {'campo': campo, 'codigo': codigo}
+
+
+class Detector:
+    def __init__(self, umbral=None):
+        self.umbral = umbral or getattr(settings, 'DETECTOR_CONSULTAS_UMBRAL', UMBRAL)
+        self.conteo = Counter()
+        self.ejemplos = {}
+        self.origenes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        forma = huella(sql)
+        self.conteo[forma] += 1
+        if self.conteo[forma] == 1:
+            self.ejemplos[forma] = sql
+        if self.conteo[forma] == min(self.umbral, 2):
+            # Solo se inspecciona la pila cuando la consulta empieza a repetirse
+            # (o en la primera, si el umbral es 1)
+            self.origenes[forma] = _origen()
+        return execute(sql, params, many, context)
+
+    def repetidas(self):
+        return [
+            {'veces': n, 'sql': self.ejemplos[forma], **self.origenes.get(forma, SIN_ORIGEN)}
+            for forma, n in self.conteo.most_common() if n >= self.umbral
+        ]
+
+    def informe(self, contexto=''):
+        lineas = [f'Consultas repetidas{f" en {contexto}" if contexto else ""}:']
+        for r in self.repetidas():
+            lineas.append(f"  {r['veces']}x {r['sql'][:200]}")
+            if r['campo']:
+                lineas.append(f"     campo: {r['campo']}")
+            if r['codigo']:
+                lineas.append(f"     código: {r['codigo']}")
+        return '\n'.join(lineas)
+
+
+@contextmanager
+def detectar_consultas(umbral=None, fallar=True, contexto=''):
+    """
+    ``with detectar_consultas():`` falla si el bloque repite una consulta
+    ``umbral`` veces o más; con ``fallar=False`` solo registra la advertencia.
+    """
+    detector = Detector(umbral)
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(detector))
+        yield detector
+
+    if detector.repetidas():
+        mensaje = detector.informe(contexto)
+        if fallar:
+            raise ConsultasRepetidasError(mensaje)
+        logger.warning(mensaje)
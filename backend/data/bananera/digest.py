@@ -0,0 +1,213 @@
+"""
+Resumen compacto de datos para el agente de notificaciones IA
+
+Calcula en SQL los mismos indicadores que ``buildPrompt()`` del frontend
+(stock bajo/crítico, producción promedio, matas caídas, recuperación de cintas,
+nómina y préstamos pendientes, alertas críticas) para que el agente no tenga
+que descargar las listas completas.
+
+Con ``finca`` (supervisores y bodegueros) cada sección se limita a esa finca,
+con los mismos criterios que ``alcance.py``: insumos y alertas generales
+(sin finca) incluidos.
+"""
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from .models import (
+    Finca, Enfunde, Cosecha, RecuperacionCinta,
+    Empleado, RolPago, Prestamo, Insumo, Alerta
+)
+from .versiones import version_datos
+
+UMBRAL_MATAS_CAIDAS = 3  # % sobre enfundes
+UMBRAL_RECUPERACION = 80  # % de cintas recuperadas
+TTL_DIGEST = 600
+
+
+def _float(valor):
+    return float(valor) if valor is not None else 0.0
+
+
+def _porcentaje(parte, total):
+    return Cast(Sum(parte), FloatField()) * 100 / NullIf(Sum(total), 0)
+
+
+def _de_finca(queryset, finca, campo='finca', incluir_sin_finca=False):
+    if finca is None:
+        return queryset
+    filtro = Q(**{campo: finca})
+    if incluir_sin_finca:
+        filtro |= Q(**{f'{campo}__isnull': True})
+    return queryset.filter(filtro)
+
+
+def _inventario(finca=None):
+    insumos = _de_finca(Insumo.objects.all(), finca, incluir_sin_finca=True)
+    bajo = Q(stock_actual__lte=F('stock_minimo'))
+    critico = Q(stock_actual__lte=F('stock_minimo') * 0.5)
+    resumen = insumos.aggregate(
+        total=Count('id'),
+        stock_bajo=Count('id', filter=bajo),
+        stock_critico=Count('id', filter=critico),
+    )
+
+    def lista(filtro, limite):
+        filas = (
+            insumos.filter(filtro)
+            .annotate(
+                cobertura=Cast('stock_actual', FloatField()) / NullIf(Cast('stock_minimo', FloatField()), 0),
+                finca_nombre=F('finca__nombre'),
+            )
+            .order_by('cobertura')
+            .values('nombre', 'stock_actual', 'stock_minimo', 'unidad_medida', 'finca_nombre')[:limite]
+        )
+        return [
+            {**f, 'stock_actual': _float(f['stock_actual']), 'stock_minimo': _float(f['stock_minimo'])}
+            for f in filas
+        ]
+
+    resumen['bajo'] = lista(bajo, 5)
+    resumen['critico'] = lista(critico, 3)
+    return resumen
+
+
+def _produccion(año, finca=None):
+    cosechas = _de_finca(Cosecha.objects.all(), finca)
+    ultimas = list(
+        cosechas.order_by('-fecha')
+        .values('semana', 'cajas_producidas', finca_nombre=F('finca__nombre'))[:10]
+    )
+    promedio = sum(c['cajas_producidas'] for c in ultimas) / len(ultimas) if ultimas else 0
+    por_finca = cosechas.filter(año=año).values(finca_nombre=F('finca__nombre')).annotate(
+        promedio_cajas=Avg('cajas_producidas'),
+        promedio_ratio=Avg('ratio'),
+    ).order_by('finca_nombre')
+
+    return {
+        'total_cosechas': cosechas.count(),
+        'promedio_cajas': round(promedio, 1),
+        'ultimas': ultimas[:5],
+        'por_finca': [
+            {
+                'finca_nombre': f['finca_nombre'],
+                'promedio_cajas': round(_float(f['promedio_cajas']), 1),
+                'promedio_ratio': round(_float(f['promedio_ratio']), 2),
+            }
+            for f in por_finca
+        ],
+    }
+
+
+def _enfundes(finca=None):
+    queryset = _de_finca(Enfunde.objects.all(), finca)
+    totales = queryset.aggregate(
+        registros=Count('id'),
+        enfundes=Sum('cantidad_enfundes'),
+        matas=Sum('matas_caidas'),
+    )
+    elevadas = (
+        queryset.values(finca_nombre=F('finca__nombre'))
+        .annotate(porcentaje=_porcentaje('matas_caidas', 'cantidad_enfundes'))
+        .filter(porcentaje__gt=UMBRAL_MATAS_CAIDAS)
+        .order_by('-porcentaje')
+    )
+    enfundes, matas = totales['enfundes'] or 0, totales['matas'] or 0
+    resumen = {
+        'registros': totales['registros'],
+        'total_enfundes': enfundes,
+        'matas_caidas': matas,
+        'porcentaje_matas_caidas': round(matas * 100 / enfundes, 2) if enfundes else 0,
+    }
+    resumen['fincas_elevadas'] = [
+        {'finca_nombre': f['finca_nombre'], 'porcentaje': round(f['porcentaje'], 2)}
+        for f in elevadas
+    ]
+    return resumen
+
+
+def _recuperacion(finca=None):
+    recuperaciones = _de_finca(RecuperacionCinta.objects.all(), finca, 'enfunde__finca')
+    baja = Q(porcentaje_recuperacion__lt=UMBRAL_RECUPERACION)
+    resumen = recuperaciones.aggregate(
+        registros=Count('id'),
+        bajas=Count('id', filter=baja),
+        promedio=Avg('porcentaje_recuperacion'),
+    )
+    resumen['promedio'] = round(_float(resumen['promedio']), 1)
+    resumen['peores'] = [
+        {'finca_nombre': r['finca_nombre'], 'porcentaje': _float(r['porcentaje_recuperacion'])}
+        for r in recuperaciones.filter(baja).order_by('porcentaje_recuperacion')
+        .values('porcentaje_recuperacion', finca_nombre=F('enfunde__finca__nombre'))[:3]
+    ]
+    return resumen
+
+
+def _personal(finca=None):
+    empleados = _de_finca(Empleado.objects.all(), finca).aggregate(
+        activos=Count('id', filter=Q(activo=True)),
+        inactivos=Count('id', filter=Q(activo=False)),
+    )
+    roles = _de_finca(RolPago.objects.all(), finca, 'empleado__finca').filter(estado='pendiente').aggregate(
+        cantidad=Count('id'), total=Sum('total_pagar'),
+    )
+    prestamos = _de_finca(Prestamo.objects.all(), finca, 'empleado__finca').filter(estado__in=['pendiente', 'aprobado']).aggregate(
+        cantidad=Count('id'), deuda=Sum(F('monto') - F('monto_pagado')),
+    )
+    return {
+        **empleados,
+        'roles_pendientes': roles['cantidad'],
+        'total_por_pagar': _float(roles['total']),
+        'prestamos_activos': prestamos['cantidad'],
+        'deuda_prestamos': round(_float(prestamos['deuda']), 2),
+    }
+
+
+def _alertas(finca=None):
+    criticas = _de_finca(Alerta.objects.all(), finca, incluir_sin_finca=True).filter(leida=False, prioridad__in=['critica', 'alta'])
+    return {
+        'criticas': criticas.count(),
+        'recientes': list(criticas.values('titulo', 'mensaje', 'prioridad')[:3]),
+    }
+
+
+def construir_digest(hoy=None, finca=None):
+    hoy = hoy or timezone.localdate()
+    return {
+        'fecha': hoy.isoformat(),
+        'fincas': [
+            {'nombre': f['nombre'], 'hectareas': _float(f['hectareas'])}
+            for f in _de_finca(Finca.objects.all(), finca, 'pk').values('nombre', 'hectareas')
+        ],
+        'inventario': _inventario(finca),
+        'produccion': _produccion(hoy.year, finca),
+        'enfundes': _enfundes(finca),
+        'recuperacion': _recuperacion(finca),
+        'personal': _personal(finca),
+        'alertas': _alertas(finca),
+    }
+
+
+def version_digest(hoy=None):
+    """La versión de datos y el día: el digest cambia aunque no cambien los datos"""
+    return f'{version_datos()}-{hoy or timezone.localdate():%Y%m%d}'
+
+
+def obtener_digest(finca=None):
+    """
+    Devuelve ``(version, digest)`` desde la caché compartida o recalculado;
+    con ``finca``, el de esa finca (la versión la incluye, y por tanto el ETag).
+    """
+    hoy = timezone.localdate()
+    version = version_digest(hoy)
+    if finca is not None:
+        version = f'{version}-{finca}'
+    clave = f'bananera:digest:{version}'
+    digest = cache.get(clave)
+    if digest is None:
+        digest = construir_digest(hoy, finca)
+        digest['version'] = version
+        cache.set(clave, digest, TTL_DIGEST)
+    return version, digest
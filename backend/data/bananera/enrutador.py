@@ -0,0 +1,70 @@
+"""
+Enrutamiento de lecturas a la réplica
+
+Las escrituras siempre van a ``default``. Las lecturas van a ``replica`` solo
+cuando la petición en curso lo permite (ver ``LecturaReplicaMiddleware``) y
+el alias está configurado; en cualquier otro caso, a la primaria.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARIA = 'default'
+REPLICA = 'replica'
+
+_base_lectura = ContextVar('base_lectura', default=None)
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+def leyendo_de_replica():
+    """True si las lecturas del contexto actual van a la réplica"""
+    return _base_lectura.get() == REPLICA and replica_configurada()
+
+
+def fijar_lectura(alias):
+    """Fija la base de lectura del contexto actual; devuelve el token para restaurarla"""
+    return _base_lectura.set(alias)
+
+
+def restaurar_lectura(token):
+    _base_lectura.reset(token)
+
+
+@contextmanager
+def leer_de(alias):
+    """``with leer_de('default'):`` fuerza la base de lectura dentro del bloque"""
+    token = fijar_lectura(alias)
+    try:
+        yield
+    finally:
+        restaurar_lectura(token)
+
+
+def lectura_replica(vista):
+    """Marca una vista de función como apta para leer de la réplica"""
+    vista.usar_replica = True
+    return vista
+
+
+class EnrutadorReplica:
+    def db_for_read(self, model, **hints):
+        alias = _base_lectura.get()
+        if alias == REPLICA and not replica_configurada():
+            return PRIMARIA
+        return alias or PRIMARIA
+
+    def db_for_write(self, model, **hints):
+        return PRIMARIA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación/copia, no por migraciones
+        return db == PRIMARIA
@@ -0,0 +1,226 @@
+"""
+Eventos en tiempo real: alertas nuevas, cruces de stock mínimo y registros de
+producción
+
+Las escrituras publican una fila en ``EventoCambio``, cuyo id autoincremental
+es la secuencia de cambios. En cada worker ASGI un único ``Difusor`` consulta
+la secuencia una vez por intervalo y reparte los eventos nuevos entre las
+colas en memoria de todos sus suscriptores SSE: cientos de tableros abiertos
+cuestan una consulta por intervalo y worker, no una por cliente.
+
+En PostgreSQL los ids se asignan al insertar pero se ven al confirmar, de
+modo que un id menor puede aparecer después de uno mayor. ``Secuencia``
+recuerda los huecos que deja cada lectura y los vuelve a consultar durante
+``ESPERA_HUECOS`` segundos antes de darlos por perdidos (rollback).
+
+``EventSource`` no admite cabeceras: el cliente pide con su JWT un ticket de
+un solo uso y corta vida (``emitir_ticket``) y lo pasa en ``?ticket=``, en
+vez de dejar el JWT en la URL y en los logs.
+"""
+
+import asyncio
+import logging
+import secrets
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Max
+
+from .models import EventoCambio, Usuario
+
+INTERVALO = 1.0
+MAX_POR_CONSULTA = 500
+MAX_PENDIENTES = 1000
+ESPERA_HUECOS = 10.0
+MAX_HUECOS = 1000
+TTL_TICKET = 30
+
+logger = logging.getLogger('bananera.eventos')
+
+
+# ==================== Publicación ====================
+
+def _datos_alerta(alerta):
+    return {
+        'id': alerta.id, 'tipo': alerta.tipo, 'prioridad': alerta.prioridad,
+        'titulo': alerta.titulo, 'finca': alerta.finca_id,
+    }
+
+
+def publicar_alertas(alertas):
+    EventoCambio.objects.bulk_create(
+        EventoCambio(tipo='alerta', finca_id=a.finca_id, datos=_datos_alerta(a)) for a in alertas
+    )
+
+
+def publicar_registro(tipo, registro, **datos):
+    """Cosecha o enfunde nuevo"""
+    EventoCambio.objects.create(tipo=tipo, finca_id=registro.finca_id, datos={
+        'id': registro.id, 'finca': registro.finca_id, 'fecha': registro.fecha,
+        'semana': registro.semana, 'año': registro.año, **datos,
+    })
+
+
+def publicar_cruce_stock(insumo, stock_anterior):
+    """Publica si el movimiento llevó el stock por debajo del mínimo o lo repuso"""
+    antes = stock_anterior < insumo.stock_minimo
+    ahora = insumo.stock_actual < insumo.stock_minimo
+    if antes == ahora:
+        return
+    EventoCambio.objects.create(tipo='stock', finca_id=insumo.finca_id, datos={
+        'id': insumo.id, 'nombre': insumo.nombre, 'finca': insumo.finca_id,
+        'stock_actual': insumo.stock_actual, 'stock_minimo': insumo.stock_minimo,
+        'estado': 'bajo' if ahora else 'repuesto',
+    })
+
+
+# ==================== Difusión ====================
+
+def en_hilo(consulta, *args):
+    """Ejecuta la consulta en un hilo del pool cerrando su conexión al terminar"""
+    def ejecutar():
+        close_old_connections()
+        try:
+            return consulta(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(ejecutar, thread_sensitive=False)()
+
+
+# ==================== Tickets de conexión ====================
+
+def _clave_ticket(ticket):
+    return f'bananera:ticket_eventos:{ticket}'
+
+
+def emitir_ticket(usuario):
+    ticket = secrets.token_urlsafe(32)
+    cache.set(_clave_ticket(ticket), usuario.pk, TTL_TICKET)
+    return ticket
+
+
+def canjear_ticket(ticket):
+    """Usuario del ticket, o None si no existe, venció o ya se usó"""
+    clave = _clave_ticket(ticket)
+    usuario_id = cache.get(clave)
+    # Solo quien logra borrarlo lo usa
+    if usuario_id is None or not cache.delete(clave):
+        return None
+    usuario = Usuario.objects.filter(pk=usuario_id).select_related('finca_asignada').first()
+    if usuario is None or not (usuario.is_active and usuario.activo):
+        return None
+    return usuario
+
+
+def ultimo_id():
+    return EventoCambio.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+
+def eventos_desde(desde, limite=MAX_POR_CONSULTA):
+    return list(
+        EventoCambio.objects.filter(id__gt=desde).order_by('id')
+        .values('id', 'tipo', 'finca_id', 'datos')[:limite]
+    )
+
+
+class Secuencia:
+    """Lectura de eventos por id que no se salta los confirmados fuera de orden"""
+
+    def __init__(self, ultimo):
+        self.ultimo = ultimo
+        # id que falta -> instante (monotónico) hasta el que se sigue esperando
+        self.huecos = {}
+
+    def leer(self, ahora=None):
+        """Devuelve (eventos tardíos y nuevos, cantidad de nuevos leídos)"""
+        ahora = time.monotonic() if ahora is None else ahora
+        self.huecos = {id_: limite for id_, limite in self.huecos.items() if limite > ahora}
+        tardios = []
+        if self.huecos:
+            tardios = list(
+                EventoCambio.objects.filter(id__in=list(self.huecos)).order_by('id')
+                .values('id', 'tipo', 'finca_id', 'datos')
+            )
+            for evento in tardios:
+                del self.huecos[evento['id']]
+
+        nuevos = eventos_desde(self.ultimo)
+        esperado = self.ultimo + 1
+        for evento in nuevos:
+            for faltante in range(max(esperado, evento['id'] - MAX_HUECOS), evento['id']):
+                self.huecos[faltante] = ahora + ESPERA_HUECOS
+            esperado = evento['id'] + 1
+        if nuevos:
+            self.ultimo = nuevos[-1]['id']
+        if len(self.huecos) > MAX_HUECOS:
+            self.huecos = dict(sorted(self.huecos.items())[-MAX_HUECOS:])
+        return tardios + nuevos, len(nuevos)
+
+
+class Suscripcion:
+    def __init__(self, finca=None):
+        # Sin finca recibe todo; con finca, los de su finca y los generales
+        self.finca = finca
+        self.cola = asyncio.Queue(MAX_PENDIENTES)
+        self.cerrada = False
+
+    def acepta(self, evento):
+        return not self.finca or evento['finca_id'] in (None, self.finca)
+
+    def entregar(self, evento):
+        if self.cerrada or not self.acepta(evento):
+            return
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente demasiado lento: se cierra y al reconectar recupera con Last-Event-ID
+            self.cerrada = True
+            self.cola.get_nowait()
+            self.cola.put_nowait(None)
+
+
+class Difusor:
+    def __init__(self):
+        self.suscripciones = set()
+        self.secuencia = None
+        self.tarea = None
+
+    async def suscribir(self, finca=None):
+        suscripcion = Suscripcion(finca)
+        self.suscripciones.add(suscripcion)
+        if self.secuencia is None:
+            ultimo = await en_hilo(ultimo_id)
+            if self.secuencia is None:
+                self.secuencia = Secuencia(ultimo)
+        if self.tarea is None:
+            self.tarea = asyncio.create_task(self._sondear())
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        self.suscripciones.discard(suscripcion)
+
+    async def _sondear(self):
+        try:
+            while self.suscripciones:
+                try:
+                    eventos, nuevos = await en_hilo(self.secuencia.leer)
+                except Exception:
+                    # Base caída o bloqueada: se reintenta en el siguiente intervalo
+                    logger.exception('Error al consultar los eventos; se reintenta en %ss', INTERVALO)
+                    await asyncio.sleep(INTERVALO)
+                    continue
+                for suscripcion in list(self.suscripciones):
+                    for evento in eventos:
+                        suscripcion.entregar(evento)
+                if nuevos < MAX_POR_CONSULTA:
+                    await asyncio.sleep(INTERVALO)
+        finally:
+            self.tarea = None
+            if not self.suscripciones:
+                # Al volver a suscribirse se parte del último evento, no de lo ocurrido sin clientes
+                self.secuencia = None
+
+
+difusor = Difusor()
@@ -0,0 +1,226 @@
+"""
+Formatos de respuesta: columnar, MessagePack y JSON con orjson
+
+Los reportes devuelven ``Tabla``: los nombres de columna y las tuplas tal
+cual salen de ``values_list()``, sin un diccionario por fila. En JSON normal
+se sigue respondiendo una lista de objetos (``tolist``, que usa el
+``JSONEncoder`` de DRF); con ``Accept: application/vnd.bananera.columnar+json``
+o ``?format=columnar`` cada tabla sale como ``{columns: [...], data: {col:
+[...]}}``, y con ``application/msgpack`` / ``?format=msgpack`` lo mismo en
+MessagePack (solo si el paquete ``msgpack`` está instalado).
+
+``OrjsonRenderer`` y ``OrjsonParser`` sustituyen al JSON de DRF usando
+``orjson`` si está instalado: el JSON de ``JSONRenderer`` (compacto, UTF-8,
+fechas, UUID y Decimal como los convierte el ``JSONEncoder`` de DRF) y vuelta
+al ``json`` de la biblioteca estándar para lo que orjson no reproduce igual
+(``indent``, ``UNICODE_JSON = False``, ``STRICT_JSON = False``, enteros de
+más de 64 bits). Los bytes coinciden salvo en los floats que ``json`` escribe
+con exponente: orjson da ``1e16``, ``1e-6`` y ``0.00001`` donde ``json`` da
+``1e+16``, ``1e-06`` y ``1e-05``; el valor es el mismo. orjson escribe NaN e
+infinito como ``null``; si la salida tiene algún ``null`` se buscan floats no
+finitos y, como DRF, se lanza ``ValueError``. ``manage.py benchmark_json``
+compara ambos.
+"""
+
+import codecs
+import json
+import math
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import json as drf_json
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+TIPO_COLUMNAR = 'application/vnd.bananera.columnar+json'
+TIPO_MSGPACK = 'application/msgpack'
+
+
+class Tabla:
+    """Resultado tabular de una consulta: columnas y filas como tuplas"""
+    __slots__ = ('columnas', 'filas')
+
+    def __init__(self, columnas, filas):
+        self.columnas = list(columnas)
+        self.filas = filas
+
+    @classmethod
+    def desde(cls, queryset, *columnas):
+        return cls(columnas, list(queryset.values_list(*columnas)))
+
+    def __len__(self):
+        return len(self.filas)
+
+    def tolist(self):
+        """Lista de objetos, el formato JSON de siempre"""
+        return [dict(zip(self.columnas, fila)) for fila in self.filas]
+
+    def columnar(self):
+        valores = zip(*self.filas) if self.filas else [()] * len(self.columnas)
+        return {'columns': self.columnas, 'data': {c: list(v) for c, v in zip(self.columnas, valores)}}
+
+
+def a_columnas(datos):
+    """Sustituye cada Tabla, y cada lista de objetos con las mismas claves, por su forma columnar"""
+    if isinstance(datos, Tabla):
+        return datos.columnar()
+    if isinstance(datos, dict):
+        return {clave: a_columnas(valor) for clave, valor in datos.items()}
+    if isinstance(datos, list) and datos and all(isinstance(fila, dict) for fila in datos):
+        columnas = list(datos[0])
+        if all(len(fila) == len(columnas) and all(c in fila for c in columnas) for fila in datos):
+            return {'columns': columnas, 'data': {c: [fila[c] for fila in datos] for c in columnas}}
+    return datos
+
+
+def _por_defecto(obj):
+    # Mismas conversiones que el JSON de DRF (Decimal, fechas, UUID, ...)
+    return JSONEncoder().default(obj)
+
+
+# ==================== JSON con orjson ====================
+
+# UTC como "Z" igual que DRF; claves no str (int, UUID) como hace json
+OPCIONES_ORJSON = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_SEPARADORES_JS = ('\u2028'.encode(), '\u2029'.encode())
+# orjson 3.8 lee como float los enteros fuera de 64 bits, que tienen 19 cifras
+# o más. Con las cifras pasadas a 0 basta buscar 19 ceros seguidos (una
+# búsqueda de bytes, mucho más rápida que una expresión regular)
+_CIFRAS_A_CERO = bytes.maketrans(b'123456789', b'000000000')
+_ENTERO_GRANDE = b'0' * 19
+
+
+def _no_finitos(datos):
+    """True si hay algún float NaN o infinito en los datos"""
+    pendientes = [datos]
+    while pendientes:
+        valor = pendientes.pop()
+        if isinstance(valor, float):
+            if not math.isfinite(valor):
+                return True
+        elif isinstance(valor, dict):
+            pendientes.extend(valor.values())
+        elif isinstance(valor, (list, tuple)):
+            pendientes.extend(valor)
+        elif isinstance(valor, Tabla):
+            pendientes.extend(valor.filas)
+    return False
+
+
+def _orjson(datos):
+    """El JSON de ``JSONRenderer`` con orjson, o None si orjson no está o no puede con los datos"""
+    if orjson is None:
+        return None
+    try:
+        contenido = orjson.dumps(datos, default=_por_defecto, option=OPCIONES_ORJSON)
+    except orjson.JSONEncodeError:
+        return None
+    # orjson escribe NaN/Infinity como null; json estricto (el de DRF) falla
+    if b'null' in contenido and _no_finitos(datos):
+        raise ValueError('Out of range float values are not JSON compliant')
+    # DRF escapa U+2028/U+2029 para que el JSON sea JavaScript válido
+    if _SEPARADORES_JS[0] in contenido or _SEPARADORES_JS[1] in contenido:
+        contenido = contenido.replace(_SEPARADORES_JS[0], b'\\u2028').replace(_SEPARADORES_JS[1], b'\\u2029')
+    return contenido
+
+
+def a_json(datos):
+    """JSON compacto en UTF-8 como el de DRF, con orjson si está disponible"""
+    contenido = _orjson(datos)
+    if contenido is None:
+        contenido = json.dumps(datos, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+        contenido = contenido.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+    return contenido
+
+
+class OrjsonRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        contenido = _orjson(data)
+        if contenido is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return contenido
+
+
+class OrjsonParser(JSONParser):
+    renderer_class = OrjsonRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        contenido = stream.read() if stream is not None else b''
+        codificacion = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if codecs.lookup(codificacion).name != 'utf-8':
+            contenido = contenido.decode(codificacion).encode()
+        if _ENTERO_GRANDE not in contenido.translate(_CIFRAS_A_CERO):
+            try:
+                return orjson.loads(contenido)
+            except orjson.JSONDecodeError:
+                pass
+        # Enteros enormes y mensajes de error: como JSONParser
+        try:
+            parse_constant = drf_json.strict_constant if self.strict else None
+            return json.loads(contenido, parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class ColumnarRenderer(OrjsonRenderer):
+    media_type = TIPO_COLUMNAR
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(a_columnas(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = TIPO_MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(a_columnas(data), default=_por_defecto, use_bin_type=True)
+
+
+# ==================== Vistas asíncronas (sin negociación de DRF) ====================
+
+def pedido(request):
+    """'columnar', 'msgpack' o None según ?format= o la cabecera Accept"""
+    formato = request.GET.get('format')
+    if formato in ('columnar', 'msgpack'):
+        return formato if formato != 'msgpack' or msgpack else None
+    acepta = request.headers.get('Accept', '')
+    if TIPO_MSGPACK in acepta and msgpack:
+        return 'msgpack'
+    if TIPO_COLUMNAR in acepta:
+        return 'columnar'
+    return None
+
+
+def respuesta(request, datos, status=200, **kwargs):
+    formato = pedido(request)
+    if formato == 'msgpack':
+        return HttpResponse(MessagePackRenderer().render(datos), status=status,
+                            content_type=TIPO_MSGPACK, **kwargs)
+    if formato == 'columnar':
+        return HttpResponse(a_json(a_columnas(datos)), status=status, content_type=TIPO_COLUMNAR, **kwargs)
+    return HttpResponse(a_json(datos), status=status, content_type='application/json', **kwargs)
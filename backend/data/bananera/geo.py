@@ -0,0 +1,317 @@
+"""
+Geometría de fincas y lotes para el mini-mapa
+
+Las geometrías se guardan como GeoJSON (``Polygon`` o ``MultiPolygon`` en
+lon/lat WGS84) en ``GeometriaFinca.contorno`` y ``GeometriaFinca.lotes``
+(``{'A': {...}}``). Al guardarlas se precalculan versiones simplificadas por
+nivel de zoom (Douglas-Peucker con tolerancia de un píxel y coordenadas
+redondeadas), así el mapa descarga solo lo que puede dibujar.
+
+Para "¿en qué lote cae este punto GPS?" cada proceso mantiene un R-tree en
+memoria (empaquetado STR) con la caja de cada finca y lote; solo los
+candidatos cuya caja contiene el punto pasan a la prueba punto-en-polígono.
+El árbol se reconstruye cuando cambia la versión de geometrías, que se
+revisa como mucho cada ``REVISION_CADA`` segundos.
+"""
+
+import logging
+import math
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from .models import CosechaBase, GeometriaFinca
+
+NIVELES_ZOOM = (8, 11, 14)
+ZOOM_LOTES = 14  # por debajo un lote ocupa pocos píxeles
+CODIGOS_LOTE = [codigo for codigo, _ in CosechaBase.LOTES]
+CAPACIDAD_NODO = 8
+REVISION_CADA = 5.0
+CLAVE_VERSION = 'bananera:geo:version'
+
+logger = logging.getLogger('bananera.geo')
+
+
+# ==================== Validación ====================
+
+def _validar_anillo(anillo):
+    if not isinstance(anillo, list) or len(anillo) < 4:
+        raise ValueError('Cada anillo necesita al menos 4 posiciones')
+    for posicion in anillo:
+        if (not isinstance(posicion, (list, tuple)) or len(posicion) < 2
+                or not all(isinstance(c, (int, float)) for c in posicion[:2])):
+            raise ValueError('Las posiciones deben ser [lon, lat]')
+        lon, lat = posicion[:2]
+        if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+            raise ValueError('Coordenadas fuera de rango (lon, lat en WGS84)')
+    if list(anillo[0][:2]) != list(anillo[-1][:2]):
+        raise ValueError('Los anillos deben cerrarse (primera posición = última)')
+
+
+def validar(geometria):
+    """Comprueba que sea un Polygon o MultiPolygon GeoJSON; lanza ValueError si no"""
+    if not isinstance(geometria, dict):
+        raise ValueError('La geometría debe ser un objeto GeoJSON')
+    lista = poligonos(geometria)
+    if not isinstance(lista, list) or not lista:
+        raise ValueError('La geometría no tiene coordenadas')
+    for poligono in lista:
+        if not isinstance(poligono, list) or not poligono:
+            raise ValueError('Polígono vacío')
+        for anillo in poligono:
+            _validar_anillo(anillo)
+
+
+def validar_lotes(lotes):
+    if not isinstance(lotes, dict):
+        raise ValueError('Los lotes deben ser un objeto {"A": GeoJSON, ...}')
+    for codigo, geometria in lotes.items():
+        if codigo not in CODIGOS_LOTE:
+            raise ValueError(f"Lote desconocido: {codigo} (válidos: {', '.join(CODIGOS_LOTE)})")
+        validar(geometria)
+
+
+def poligonos(geometria):
+    tipo = geometria.get('type')
+    if tipo == 'Polygon':
+        return [geometria.get('coordinates')]
+    if tipo == 'MultiPolygon':
+        return geometria.get('coordinates') or []
+    raise ValueError('Solo se admiten geometrías Polygon o MultiPolygon')
+
+
+def caja(geometria):
+    """(min_lon, min_lat, max_lon, max_lat) del anillo exterior de cada polígono"""
+    xs, ys = [], []
+    for poligono in poligonos(geometria):
+        for lon, lat, *_ in poligono[0]:
+            xs.append(lon)
+            ys.append(lat)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+# ==================== Simplificación ====================
+
+def tolerancia(zoom):
+    """Grados que ocupa un píxel de tesela de 256 px en el zoom dado"""
+    return 360 / (256 * 2 ** zoom)
+
+
+def _douglas_peucker(puntos, tol):
+    conservar = [False] * len(puntos)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, len(puntos) - 1)]
+    while pila:
+        inicio, fin = pila.pop()
+        (x1, y1), (x2, y2) = puntos[inicio], puntos[fin]
+        dx, dy = x2 - x1, y2 - y1
+        largo = math.hypot(dx, dy)
+        maxima, indice = 0.0, None
+        for i in range(inicio + 1, fin):
+            x, y = puntos[i]
+            if largo:
+                distancia = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / largo
+            else:
+                distancia = math.hypot(x - x1, y - y1)
+            if distancia > maxima:
+                maxima, indice = distancia, i
+        if indice is not None and maxima > tol:
+            conservar[indice] = True
+            pila.append((inicio, indice))
+            pila.append((indice, fin))
+    return [p for p, queda in zip(puntos, conservar) if queda]
+
+
+def _simplificar_anillo(anillo, tol, decimales):
+    puntos = [(lon, lat) for lon, lat, *_ in anillo]
+    # Un anillo cerrado se parte en dos mitades para que el primer punto no lo ancle todo
+    medio = len(puntos) // 2
+    simplificado = _douglas_peucker(puntos[:medio + 1], tol)[:-1] + _douglas_peucker(puntos[medio:], tol)
+    redondeado = []
+    for lon, lat in simplificado:
+        punto = [round(lon, decimales), round(lat, decimales)]
+        if not redondeado or redondeado[-1] != punto:
+            redondeado.append(punto)
+    return redondeado if len(redondeado) >= 4 else None
+
+
+def simplificar(geometria, zoom):
+    tol = tolerancia(zoom)
+    decimales = max(0, math.ceil(-math.log10(tol)))
+    resultado = []
+    for poligono in poligonos(geometria):
+        exterior = _simplificar_anillo(poligono[0], tol, decimales)
+        if exterior is None:
+            # Demasiado pequeño para el zoom: se dibuja su caja
+            x1, y1, x2, y2 = caja({'type': 'Polygon', 'coordinates': poligono})
+            exterior = [[round(x1, decimales), round(y1, decimales)], [round(x2, decimales), round(y1, decimales)],
+                        [round(x2, decimales), round(y2, decimales)], [round(x1, decimales), round(y2, decimales)],
+                        [round(x1, decimales), round(y1, decimales)]]
+        huecos = [h for h in (_simplificar_anillo(a, tol, decimales) for a in poligono[1:]) if h]
+        resultado.append([exterior, *huecos])
+    if len(resultado) == 1:
+        return {'type': 'Polygon', 'coordinates': resultado[0]}
+    return {'type': 'MultiPolygon', 'coordinates': resultado}
+
+
+def niveles(contorno, lotes):
+    """``{'z<zoom>': {'contorno': ..., 'lotes': {...}}}`` para cada nivel precalculado"""
+    if not contorno and not lotes:
+        return {}
+    return {
+        clave_nivel(zoom): {
+            'contorno': simplificar(contorno, zoom) if contorno else None,
+            'lotes': {
+                codigo: simplificar(lote, zoom) for codigo, lote in (lotes or {}).items()
+            } if zoom >= ZOOM_LOTES else {},
+        }
+        for zoom in NIVELES_ZOOM
+    }
+
+
+def clave_nivel(zoom):
+    # Con prefijo: una clave numérica en un lookup JSON se toma como índice de array
+    return f'z{zoom}'
+
+
+def nivel_para(zoom):
+    """Nivel precalculado más detallado que no supera el zoom pedido"""
+    return max((n for n in NIVELES_ZOOM if n <= zoom), default=NIVELES_ZOOM[0])
+
+
+# ==================== Punto en polígono ====================
+
+def _dentro_anillo(x, y, anillo):
+    dentro = False
+    j = len(anillo) - 1
+    for i in range(len(anillo)):
+        xi, yi = anillo[i][0], anillo[i][1]
+        xj, yj = anillo[j][0], anillo[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            dentro = not dentro
+        j = i
+    return dentro
+
+
+def contiene(geometria, x, y):
+    for poligono in poligonos(geometria):
+        if _dentro_anillo(x, y, poligono[0]) and not any(_dentro_anillo(x, y, h) for h in poligono[1:]):
+            return True
+    return False
+
+
+# ==================== R-tree en memoria ====================
+
+class RTree:
+    """R-tree estático empaquetado con Sort-Tile-Recursive; entradas ``(caja, valor)``"""
+
+    def __init__(self, entradas, capacidad=CAPACIDAD_NODO):
+        self.capacidad = capacidad
+        nivel = [(c, True, v) for c, v in entradas]
+        while len(nivel) > capacidad:
+            nivel = self._empaquetar(nivel)
+        self.raiz = (self._unir([n[0] for n in nivel]), False, nivel) if nivel else None
+
+    @staticmethod
+    def _unir(cajas):
+        return (min(c[0] for c in cajas), min(c[1] for c in cajas),
+                max(c[2] for c in cajas), max(c[3] for c in cajas))
+
+    def _empaquetar(self, nodos):
+        hojas = math.ceil(len(nodos) / self.capacidad)
+        franjas = math.ceil(math.sqrt(hojas))
+        por_franja = franjas * self.capacidad
+        nodos = sorted(nodos, key=lambda n: n[0][0] + n[0][2])
+        padres = []
+        for i in range(0, len(nodos), por_franja):
+            franja = sorted(nodos[i:i + por_franja], key=lambda n: n[0][1] + n[0][3])
+            for j in range(0, len(franja), self.capacidad):
+                hijos = franja[j:j + self.capacidad]
+                padres.append((self._unir([h[0] for h in hijos]), False, hijos))
+        return padres
+
+    def intersecan(self, x1, y1, x2, y2):
+        if self.raiz is None:
+            return []
+        encontrados, pila = [], [self.raiz]
+        while pila:
+            (a, b, c, d), hoja, contenido = pila.pop()
+            if a > x2 or c < x1 or b > y2 or d < y1:
+                continue
+            if hoja:
+                encontrados.append(contenido)
+            else:
+                pila.extend(contenido)
+        return encontrados
+
+    def en_punto(self, x, y):
+        return self.intersecan(x, y, x, y)
+
+
+def invalidar_geometrias():
+    cache.set(CLAVE_VERSION, uuid.uuid4().hex[:12], None)
+
+
+def _entrada(finca_id, nombre, codigo, geometria):
+    """``(caja, valor)`` para el R-tree, o None si la geometría guardada no es válida"""
+    try:
+        validar(geometria)
+        return caja(geometria), {'finca': finca_id, 'nombre': nombre, 'lote': codigo, 'geometria': geometria}
+    except (ValueError, TypeError) as exc:
+        # Una geometría rota (p. ej. guardada antes de validar) no debe tumbar el índice
+        logger.warning('Geometría omitida del R-tree (finca %s, lote %s): %s', finca_id, codigo, exc)
+        return None
+
+
+def _construir():
+    entradas = []
+    filas = GeometriaFinca.objects.values_list('finca_id', 'finca__nombre', 'contorno', 'lotes')
+    for finca_id, nombre, contorno, lotes in filas:
+        if contorno:
+            entradas.append(_entrada(finca_id, nombre, None, contorno))
+        for codigo, lote in (lotes or {}).items():
+            entradas.append(_entrada(finca_id, nombre, codigo, lote))
+    return RTree([e for e in entradas if e is not None])
+
+
+_estado = {'version': None, 'revisado': 0.0, 'arbol': None}
+_candado = threading.Lock()
+
+
+def indice():
+    """R-tree del proceso, reconstruido si otro proceso cambió alguna geometría"""
+    ahora = time.monotonic()
+    if _estado['arbol'] is not None and ahora - _estado['revisado'] < REVISION_CADA:
+        return _estado['arbol']
+    with _candado:
+        version = cache.get(CLAVE_VERSION)
+        if version is None:
+            invalidar_geometrias()
+            version = cache.get(CLAVE_VERSION)
+        if _estado['arbol'] is None or version != _estado['version']:
+            _estado['arbol'] = _construir()
+            _estado['version'] = version
+        _estado['revisado'] = ahora
+        return _estado['arbol']
+
+
+def ubicar(lon, lat, fincas=None):
+    """Finca y lote que contienen el punto; ``fincas`` limita la respuesta a esos ids"""
+    resultado = {'finca': None, 'nombre': None, 'lote': None}
+    for entrada in indice().en_punto(lon, lat):
+        if fincas is not None and entrada['finca'] not in fincas:
+            continue
+        if not contiene(entrada['geometria'], lon, lat):
+            continue
+        resultado['finca'], resultado['nombre'] = entrada['finca'], entrada['nombre']
+        if entrada['lote']:
+            resultado['lote'] = entrada['lote']
+            break
+    return resultado
+
+
+def en_caja(x1, y1, x2, y2):
+    """Ids de las fincas cuya geometría o la de algún lote toca la caja"""
+    return {entrada['finca'] for entrada in indice().intersecan(x1, y1, x2, y2)}
@@ -0,0 +1,76 @@
+"""
+Comando para mover temporadas cerradas al archivo
+Ejecutar con: python manage.py archivar_temporada 2023
+Todas las temporadas hasta un año: python manage.py archivar_temporada --hasta 2023
+Deshacer: python manage.py archivar_temporada 2023 --restaurar
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from bananera.archivo import archivar_temporada, años_archivados, restaurar_temporada
+from bananera.models import Cosecha, CosechaArchivo, Enfunde, EnfundeArchivo
+
+
+class Command(BaseCommand):
+    help = 'Mueve enfundes, cosechas y recuperaciones de temporadas cerradas a las tablas de archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('años', nargs='*', type=int)
+        parser.add_argument('--hasta', type=int, help='Archivar todas las temporadas hasta este año')
+        parser.add_argument('--restaurar', action='store_true', help='Devolver las temporadas a las tablas calientes')
+
+    def handle(self, *args, **options):
+        años = set(options['años'])
+        restaurar = options['restaurar']
+        if options['hasta'] is not None:
+            # Al restaurar, los años están en las tablas de archivo
+            hasta = {año for año in self._años_con_datos(restaurar) if año <= options['hasta']}
+            if not hasta:
+                estado = 'archivadas' if restaurar else 'con datos'
+                raise CommandError(f'No hay temporadas {estado} hasta {options["hasta"]}')
+            años |= hasta
+        if not años:
+            archivados = ', '.join(str(a) for a in sorted(años_archivados())) or 'ninguna'
+            self.stdout.write(f'📦 Temporadas archivadas: {archivados}')
+            return
+
+        if restaurar:
+            sin_archivar = sorted(años - self._años_con_datos(archivo=True))
+            if sin_archivar:
+                raise CommandError(f'La temporada {sin_archivar[0]} no está archivada')
+            for año in sorted(años):
+                movidos = restaurar_temporada(año)
+                self.stdout.write(self.style.SUCCESS(f'♻️  {año}: {self._resumen(movidos)} restaurados'))
+            return
+
+        actual = timezone.now().year
+        abiertas = sorted(año for año in años if año >= actual)
+        if abiertas:
+            raise CommandError(f'La temporada {abiertas[0]} sigue abierta; solo se archivan años anteriores a {actual}')
+
+        for año in sorted(años):
+            inicio = time.perf_counter()
+            movidos = archivar_temporada(año)
+            duracion = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(self.style.SUCCESS(
+                f'📦 {año}: {self._resumen(movidos)} archivados en {duracion:.0f} ms'
+            ))
+
+        primero = Cosecha.objects.aggregate(año=Min('año'))['año']
+        self.stdout.write(f'🔥 Tablas calientes desde {primero or "-"}: {Cosecha.objects.count()} cosechas, '
+                          f'{Enfunde.objects.count()} enfundes')
+
+    def _años_con_datos(self, archivo):
+        modelos = (CosechaArchivo, EnfundeArchivo) if archivo else (Cosecha, Enfunde)
+        años = set(años_archivados()) if archivo else set()
+        for modelo in modelos:
+            años |= set(modelo.objects.values_list('año', flat=True).distinct())
+        return años
+
+    def _resumen(self, movidos):
+        return (f"{movidos['enfundes']} enfundes, {movidos['cosechas']} cosechas, "
+                f"{movidos['recuperaciones']} recuperaciones")
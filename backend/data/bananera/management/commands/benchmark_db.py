@@ -0,0 +1,144 @@
+"""
+Comando para medir lecturas y escrituras concurrentes sobre la base de datos
+
+Las lecturas son los agregados del reporte de producción y las escrituras
+transacciones que leen un insumo y reescriben su stock (sin cambiar datos).
+Con --comparar (solo SQLite) se ejecuta primero con la configuración por
+defecto de SQLite y luego con SQLITE_PRAGMAS. Usar sobre una copia de la base.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.test.utils import override_settings
+
+from bananera import reportes
+from bananera.models import Insumo
+
+# Comportamiento por defecto de SQLite/Django antes de la capa de ajustes
+PRAGMAS_POR_DEFECTO = {'synchronous': 'full'}
+
+
+def modo_diario(modo):
+    """Cambia el journal_mode guardado en el archivo y devuelve el anterior"""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        anterior = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA journal_mode = {modo}')
+    return anterior
+
+
+@contextmanager
+def sin_ajustes():
+    opciones = connections.settings['default'].get('OPTIONS', {})
+    modo = modo_diario('delete')
+    connections.settings['default']['OPTIONS'] = {}
+    try:
+        with override_settings(SQLITE_PRAGMAS=PRAGMAS_POR_DEFECTO):
+            yield
+    finally:
+        connections.settings['default']['OPTIONS'] = opciones
+        connections.close_all()
+        modo_diario(modo)
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrente de lectura/escritura sobre la base de datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=50, help='Usuarios concurrentes (RNF-003)')
+        parser.add_argument('--segundos', type=float, default=5, help='Duración de cada corrida')
+        parser.add_argument('--escrituras', type=float, default=0.2, help='Fracción de operaciones de escritura')
+        parser.add_argument('--comparar', action='store_true',
+                            help='Comparar SQLite por defecto contra SQLITE_PRAGMAS')
+
+    def handle(self, *args, **options):
+        ids = list(Insumo.objects.values_list('id', flat=True)[:500])
+        if not ids:
+            raise CommandError('Se necesitan insumos para las escrituras (ejecuta populate_db)')
+        if options['comparar'] and connection.vendor != 'sqlite':
+            raise CommandError('--comparar solo aplica a SQLite')
+
+        self.stdout.write(
+            f"🏁 {connection.vendor}: {options['hilos']} hilos, {options['segundos']}s, "
+            f"{options['escrituras']:.0%} escrituras\n"
+        )
+
+        corridas = []
+        if options['comparar']:
+            with sin_ajustes():
+                corridas.append(('SQLite por defecto', self.correr(ids, **options)))
+        corridas.append(('Configuración actual', self.correr(ids, **options)))
+
+        for nombre, r in corridas:
+            self.stdout.write(
+                f"{nombre:<22} {r['ops_s']:>8.1f} ops/s  "
+                f"lecturas {r['lecturas']:>6}  escrituras {r['escrituras']:>6}  "
+                f"bloqueos {r['errores']:>5}  p50 {r['p50']:.1f}ms  p95 {r['p95']:.1f}ms"
+            )
+        if len(corridas) == 2 and corridas[0][1]['ops_s']:
+            mejora = corridas[1][1]['ops_s'] / corridas[0][1]['ops_s']
+            self.stdout.write(self.style.SUCCESS(f'\n✅ Rendimiento x{mejora:.1f} con los ajustes'))
+
+    def correr(self, ids, hilos, segundos, escrituras, **kwargs):
+        connections.close_all()
+        inicio = threading.Barrier(hilos)
+        bloqueo = threading.Lock()
+        resultado = {'lecturas': 0, 'escrituras': 0, 'errores': 0, 'latencias': []}
+
+        def leer():
+            queryset = reportes.cosechas_filtradas()
+            reportes.resumen_produccion(queryset)
+            reportes.produccion_por_finca(queryset)
+
+        def escribir():
+            with transaction.atomic():
+                insumo = Insumo.objects.only('stock_actual').get(pk=random.choice(ids))
+                Insumo.objects.filter(pk=insumo.pk).update(stock_actual=F('stock_actual'))
+
+        def trabajador():
+            propio = {'lecturas': 0, 'escrituras': 0, 'errores': 0, 'latencias': []}
+            try:
+                inicio.wait()
+                fin = time.perf_counter() + segundos
+                while time.perf_counter() < fin:
+                    es_escritura = random.random() < escrituras
+                    t0 = time.perf_counter()
+                    try:
+                        escribir() if es_escritura else leer()
+                    except OperationalError:
+                        propio['errores'] += 1
+                        continue
+                    propio['latencias'].append((time.perf_counter() - t0) * 1000)
+                    propio['escrituras' if es_escritura else 'lecturas'] += 1
+            finally:
+                connection.close()
+                with bloqueo:
+                    for clave in ('lecturas', 'escrituras', 'errores'):
+                        resultado[clave] += propio[clave]
+                    resultado['latencias'] += propio['latencias']
+
+        workers = [threading.Thread(target=trabajador) for _ in range(hilos)]
+        t0 = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        duracion = time.perf_counter() - t0
+
+        latencias = resultado.pop('latencias')
+        resultado['ops_s'] = (resultado['lecturas'] + resultado['escrituras']) / duracion
+        resultado['p50'] = percentil(latencias, 0.50)
+        resultado['p95'] = percentil(latencias, 0.95)
+        return resultado
@@ -0,0 +1,111 @@
+"""
+Comando para comparar el JSON de DRF (json de la biblioteca estándar) con orjson
+Ejecutar con: python manage.py benchmark_json --filas 100000
+
+Genera en memoria (sin tocar la base) cosechas con UUID, Decimal y fechas y
+mide, con el mejor de --repeticiones:
+
+- serializadas: ``CosechaSerializer(many=True).data`` renderizado con
+  ``JSONRenderer`` y con ``OrjsonRenderer``;
+- filas: diccionarios con UUID, Decimal y date sin convertir, como los de
+  ``values()`` en los reportes;
+- parseo: el cuerpo serializado con ``JSONParser`` y con ``OrjsonParser``.
+
+Comprueba además que lo que escriben ambos renderers se lee igual (los bytes
+difieren en los floats con exponente, ver ``formatos.py``).
+"""
+import io
+import json
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from bananera import formatos
+from bananera.formatos import OrjsonParser, OrjsonRenderer
+from bananera.models import Cosecha, CosechaBase, Finca
+from bananera.serializers import CosechaSerializer
+
+CAMPOS_FILA = ('id', 'finca_id', 'fecha', 'semana', 'año', 'lote', 'cajas_producidas',
+               'peso_promedio', 'calibracion', 'ratio')
+
+
+def mejor_tiempo(funcion, repeticiones):
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def decimal(minimo, maximo):
+    return Decimal(random.randint(minimo * 100, maximo * 100)) / 100
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de serialización JSON: json estándar contra orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000, help='Cosechas a serializar')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Se toma la mejor')
+
+    def handle(self, *args, **options):
+        if formatos.orjson is None:
+            raise CommandError('orjson no está instalado (pip install orjson)')
+        filas, repeticiones = options['filas'], options['repeticiones']
+        random.seed(42)
+
+        self.stdout.write(f'🏗️  Generando {filas} cosechas en memoria...')
+        cosechas = self.cosechas(filas)
+        t_serializar, datos = mejor_tiempo(lambda: CosechaSerializer(cosechas, many=True).data, 1)
+        self.stdout.write(f'   CosechaSerializer: {t_serializar * 1000:.0f} ms (igual para ambos)\n')
+
+        valores = [{campo: getattr(c, campo) for campo in CAMPOS_FILA} for c in cosechas]
+        estandar, rapido = JSONRenderer(), OrjsonRenderer()
+        resultados = []
+        for nombre, carga in (('serializadas', datos), ('filas', valores)):
+            t_json, cuerpo = mejor_tiempo(lambda: estandar.render(carga), repeticiones)
+            t_orjson, cuerpo_rapido = mejor_tiempo(lambda: rapido.render(carga), repeticiones)
+            if cuerpo != cuerpo_rapido and json.loads(cuerpo) != json.loads(cuerpo_rapido):
+                raise CommandError(f'Los renderers producen datos distintos para "{nombre}"')
+            resultados.append((f'render {nombre}', len(cuerpo), t_json, t_orjson))
+
+        cuerpo = estandar.render(datos)
+        t_json, leidos = mejor_tiempo(lambda: JSONParser().parse(io.BytesIO(cuerpo)), repeticiones)
+        t_orjson, leidos_rapido = mejor_tiempo(lambda: OrjsonParser().parse(io.BytesIO(cuerpo)), repeticiones)
+        if leidos != leidos_rapido:
+            raise CommandError('Los parsers devuelven datos distintos')
+        resultados.append(('parseo serializadas', len(cuerpo), t_json, t_orjson))
+
+        self.stdout.write(f"{'':<22}{'MB':>8}{'json ms':>10}{'orjson ms':>11}{'MB/s orjson':>13}{'x':>7}")
+        for nombre, tamaño, t_json, t_orjson in resultados:
+            mb = tamaño / 1_000_000
+            self.stdout.write(
+                f'{nombre:<22}{mb:>8.1f}{t_json * 1000:>10.0f}{t_orjson * 1000:>11.0f}'
+                f'{mb / t_orjson:>13.0f}{t_json / t_orjson:>7.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Mismos datos con ambos renderers'))
+
+    def cosechas(self, filas):
+        fincas = [Finca(id=uuid.uuid4(), nombre=f'Finca {i}') for i in range(10)]
+        lotes = [codigo for codigo, _ in CosechaBase.LOTES]
+        inicio, ahora = date(2025, 1, 1), timezone.now()
+        cosechas = []
+        for _ in range(filas):
+            fecha = inicio + timedelta(days=random.randint(0, 364))
+            cosechas.append(Cosecha(
+                id=uuid.uuid4(), finca=random.choice(fincas), fecha=fecha,
+                semana=fecha.isocalendar()[1], año=fecha.year, lote=random.choice(lotes),
+                cajas_producidas=random.randint(100, 1500), racimos_recuperados=random.randint(0, 50),
+                peso_promedio=decimal(18, 26), calibracion=decimal(38, 46), manos=random.randint(6, 9),
+                ratio=decimal(1, 3), observaciones=random.choice(['', 'Sin novedad', 'Lluvia ligera, cosecha tardía']),
+                fecha_creacion=ahora - timedelta(seconds=random.randint(0, 3_000_000)),
+            ))
+        return cosechas
@@ -0,0 +1,125 @@
+"""
+Prueba de carga: latencia de la API normal durante una avalancha de logins fallidos
+Ejecutar con: python manage.py carga_login --comparar
+
+Levanta el servidor WSGI en un hilo local, mide la latencia de GET /api/fincas/
+sin carga y luego mientras otros hilos envían logins con contraseña errónea.
+Con --comparar la avalancha se repite sin limitadores para ver la diferencia.
+Usar sobre una copia de la base (settings con DATABASE_PATH).
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.conf import settings
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera.models import Usuario
+
+
+class ManejadorSilencioso(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+class Command(BaseCommand):
+    help = 'Mide la latencia de la API durante una avalancha de logins fallidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=5, help='Hilos de tráfico normal')
+        parser.add_argument('--atacantes', type=int, default=20, help='Hilos enviando logins')
+        parser.add_argument('--segundos', type=float, default=5)
+        parser.add_argument('--comparar', action='store_true', help='Repetir la avalancha sin limitadores')
+
+    def handle(self, *args, **options):
+        usuario = Usuario.objects.filter(activo=True).first()
+        if usuario is None:
+            raise CommandError('Se necesita al menos un usuario activo (ejecuta populate_db)')
+        self.token = str(AccessToken.for_user(usuario))
+        self.email = usuario.email
+        # Los 429 esperados llenarían la salida con advertencias
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        servidor = ThreadedWSGIServer(('127.0.0.1', 0), ManejadorSilencioso)
+        servidor.set_app(get_wsgi_application())
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{servidor.server_address[1]}/api'
+
+        self.stdout.write(
+            f"🌊 {options['clientes']} clientes normales, {options['atacantes']} atacantes, "
+            f"{options['segundos']}s por fase\n"
+        )
+        try:
+            filas = [('Sin avalancha', self.fase(options, atacantes=0))]
+            if options['comparar']:
+                sin_limites = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+                with override_settings(REST_FRAMEWORK=sin_limites):
+                    filas.append(('Avalancha sin límites', self.fase(options, options['atacantes'])))
+            filas.append(('Avalancha con límites', self.fase(options, options['atacantes'])))
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+        for nombre, r in filas:
+            self.stdout.write(
+                f"{nombre:<24} API p50 {r['p50']:7.1f}ms  p95 {r['p95']:7.1f}ms  "
+                f"({r['normales']} peticiones)  logins: {r['logins']} procesados, {r['rechazados']} con 429"
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Prueba de carga finalizada'))
+
+    def fase(self, options, atacantes):
+        fin = time.perf_counter() + options['segundos']
+        latencias, resultado = [], {'logins': 0, 'rechazados': 0}
+        bloqueo = threading.Lock()
+
+        def normal():
+            peticion = urllib.request.Request(
+                f'{self.base}/fincas/', headers={'Authorization': f'Bearer {self.token}'}
+            )
+            while time.perf_counter() < fin:
+                t0 = time.perf_counter()
+                with urllib.request.urlopen(peticion) as respuesta:
+                    respuesta.read()
+                with bloqueo:
+                    latencias.append((time.perf_counter() - t0) * 1000)
+
+        def atacante():
+            cuerpo = json.dumps({'email': self.email, 'password': 'incorrecta'}).encode()
+            while time.perf_counter() < fin:
+                peticion = urllib.request.Request(
+                    f'{self.base}/login/', data=cuerpo, headers={'Content-Type': 'application/json'}
+                )
+                try:
+                    urllib.request.urlopen(peticion).read()
+                except urllib.error.HTTPError as exc:
+                    with bloqueo:
+                        resultado['rechazados' if exc.code == 429 else 'logins'] += 1
+
+        hilos = [threading.Thread(target=normal) for _ in range(options['clientes'])]
+        hilos += [threading.Thread(target=atacante) for _ in range(atacantes)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        return {
+            **resultado,
+            'normales': len(latencias),
+            'p50': percentil(latencias, 0.50),
+            'p95': percentil(latencias, 0.95),
+        }
@@ -0,0 +1,29 @@
+"""
+Comando para detectar anomalías en la producción semanal
+Ejecutar con: python manage.py detectar_anomalias
+(programarlo tras el cierre de cada semana de registros de cosecha/enfunde)
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from bananera.anomalias import detectar_anomalias
+
+
+class Command(BaseCommand):
+    help = 'Actualiza las estadísticas robustas por finca y genera alertas de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha', type=date.fromisoformat,
+            help='Procesar semanas cerradas anteriores a esta fecha (YYYY-MM-DD)'
+        )
+
+    def handle(self, *args, **options):
+        resultado = detectar_anomalias(options.get('fecha'))
+        self.stdout.write(self.style.SUCCESS(
+            f"📈 Semanas procesadas: {resultado['semanas_procesadas']} | "
+            f"🔔 Alertas creadas: {resultado['alertas_creadas']} "
+            f"(duplicadas omitidas: {resultado['alertas_duplicadas']})"
+        ))
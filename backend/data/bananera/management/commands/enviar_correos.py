@@ -0,0 +1,47 @@
+"""
+Comando para enviar los correos pendientes de la bandeja de salida
+Ejecutar con: python manage.py enviar_correos
+Como proceso en segundo plano: python manage.py enviar_correos --intervalo 5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bananera.correo import MAX_INTENTOS, TAMAÑO_LOTE, enviar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Envía en lotes los correos pendientes reutilizando una sola conexión SMTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMAÑO_LOTE, help='Correos por conexión SMTP')
+        parser.add_argument('--max-intentos', type=int, default=MAX_INTENTOS,
+                            help='Intentos antes de marcar un correo como fallido')
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help='Revisar la bandeja cada N segundos (0 = vaciarla una sola vez)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Vaciar todos los lotes disponibles antes de esperar
+            while True:
+                inicio = time.perf_counter()
+                resultado = enviar_pendientes(options['lote'], options['max_intentos'])
+                if not any(resultado.values()):
+                    break
+                duracion = (time.perf_counter() - inicio) * 1000
+                self.stdout.write(self.style.SUCCESS(
+                    f"📧 {resultado['enviados']} enviados, {resultado['reintentos']} reprogramados, "
+                    f"{resultado['fallidos']} fallidos en {duracion:.0f} ms"
+                ))
+                if resultado['enviados'] == 0:
+                    # Fallo de conexión: esperar al próximo ciclo en vez de insistir
+                    break
+
+            if not options['intervalo']:
+                break
+            close_old_connections()
+            time.sleep(options['intervalo'])
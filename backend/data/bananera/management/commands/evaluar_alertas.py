@@ -0,0 +1,44 @@
+"""
+Comando para evaluar las reglas de alertas del servidor
+Ejecutar con: python manage.py evaluar_alertas
+Como proceso en segundo plano: python manage.py evaluar_alertas --intervalo 300
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from bananera.reglas_alertas import REGLAS, evaluar_reglas
+
+
+class Command(BaseCommand):
+    help = 'Evalúa las reglas de stock, vencimientos, préstamos y nómina y crea las alertas nuevas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--regla', action='append', choices=[r.nombre for r in REGLAS],
+            help='Evaluar solo esta regla (se puede repetir)'
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help='Repetir la evaluación cada N segundos (0 = una sola vez)'
+        )
+
+    def handle(self, *args, **options):
+        reglas = [r for r in REGLAS if not options['regla'] or r.nombre in options['regla']]
+
+        while True:
+            inicio = time.perf_counter()
+            resultado = evaluar_reglas(reglas)
+            duracion = (time.perf_counter() - inicio) * 1000
+
+            detalle = ', '.join(f'{nombre}: {n}' for nombre, n in resultado.items())
+            self.stdout.write(self.style.SUCCESS(
+                f'🔔 {sum(resultado.values())} alertas nuevas ({detalle}) en {duracion:.0f} ms'
+            ))
+
+            if not options['intervalo']:
+                break
+            close_old_connections()
+            time.sleep(options['intervalo'])
@@ -9,6 +9,7 @@ from bananera.models import (
     Finca, Usuario, Enfunde, Cosecha, RecuperacionCinta,
     Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta
 )
+from bananera.reglas_alertas import evaluar_reglas
 
 
 class Command(BaseCommand):
@@ -267,28 +268,9 @@ class Command(BaseCommand):
                     movimientos_creados += 1
         self.stdout.write(f'  ✓ {movimientos_creados} movimientos')
         
-        # 8. Crear Alertas
+        # 8. Crear Alertas (evaluando las reglas del servidor sobre los datos creados)
         self.stdout.write('\nCreando alertas...')
-        alertas_data = [
-            {'tipo': 'stock_bajo', 'prioridad': 'alta', 'titulo': 'Stock bajo de Fertilizante NPK', 'mensaje': 'El stock de Fertilizante NPK está por debajo del mínimo requerido.'},
-            {'tipo': 'pago_pendiente', 'prioridad': 'media', 'titulo': 'Roles de pago pendientes', 'mensaje': 'Hay 5 roles de pago pendientes de aprobación para esta semana.'},
-            {'tipo': 'cosecha', 'prioridad': 'baja', 'titulo': 'Producción semanal completada', 'mensaje': 'La producción de la semana 3 ha sido registrada exitosamente.'},
-            {'tipo': 'mantenimiento', 'prioridad': 'media', 'titulo': 'Mantenimiento de cable vía', 'mensaje': 'Se requiere mantenimiento preventivo del sistema de cable vía.'},
-            {'tipo': 'stock_bajo', 'prioridad': 'critica', 'titulo': 'Fundas de banano agotándose', 'mensaje': 'Stock crítico de fundas de banano. Realizar pedido urgente.'},
-        ]
-        
-        alertas_creadas = 0
-        for finca in fincas:
-            for data in random.sample(alertas_data, 3):
-                Alerta.objects.create(
-                    tipo=data['tipo'],
-                    prioridad=data['prioridad'],
-                    titulo=data['titulo'],
-                    mensaje=data['mensaje'],
-                    finca=finca,
-                    leida=random.choice([True, False, False])
-                )
-                alertas_creadas += 1
-        self.stdout.write(f'  ✓ {alertas_creadas} alertas')
+        resultado = evaluar_reglas()
+        self.stdout.write(f'  ✓ {sum(resultado.values())} alertas')
         
         self.stdout.write(self.style.SUCCESS('\n✅ Base de datos poblada exitosamente hasta semana 3 de 2026!'))
@@ -0,0 +1,42 @@
+"""
+Comando para pronosticar el reabastecimiento de insumos
+Ejecutar con: python manage.py pronosticar_reabastecimiento [--generar]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bananera.reabastecimiento import (
+    DIAS_ENTREGA, DIAS_HISTORIAL, generar_ordenes, propuestas_reorden, validar_parametros
+)
+
+
+class Command(BaseCommand):
+    help = 'Calcula puntos de reorden dinámicos y propone (o genera) órdenes de compra'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--historial', type=int, default=DIAS_HISTORIAL, help='Días de historial de salidas')
+        parser.add_argument('--dias-entrega', type=int, default=DIAS_ENTREGA, help='Tiempo de entrega del proveedor')
+        parser.add_argument('--nivel-servicio', type=float, default=0.95)
+        parser.add_argument('--generar', action='store_true', help='Marcar los pedidos como generados')
+
+    def handle(self, *args, **options):
+        parametros = {
+            'dias_historial': options['historial'],
+            'dias_entrega': options['dias_entrega'],
+            'nivel_servicio': options['nivel_servicio'],
+        }
+        try:
+            validar_parametros(**parametros)
+        except ValueError as e:
+            raise CommandError(str(e))
+        propuestas = (generar_ordenes if options['generar'] else propuestas_reorden)(**parametros)
+
+        for p in propuestas:
+            cobertura = f"{p['dias_cobertura']} días" if p['dias_cobertura'] is not None else 'sin consumo'
+            self.stdout.write(
+                f"  📦 {p['nombre']}: stock {p['stock_actual']:.0f} / reorden {p['punto_reorden']:.0f} "
+                f"({cobertura}) → pedir {p['cantidad_sugerida']:.0f} {p['unidad_medida']}"
+            )
+
+        accion = 'generadas' if options['generar'] else 'propuestas'
+        self.stdout.write(self.style.SUCCESS(f'🛒 {len(propuestas)} órdenes de compra {accion}'))
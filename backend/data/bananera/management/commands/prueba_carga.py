@@ -0,0 +1,235 @@
+"""
+Prueba de carga HTTP con presupuestos de latencia por endpoint (RNF-001 a RNF-003)
+Ejecutar con: python manage.py prueba_carga --sintetico 5000
+
+Levanta el servidor WSGI en un hilo local y lanza --usuarios clientes
+autenticados concurrentes (RNF-003: 50) que repiten una mezcla de escenarios:
+
+- arranque: las 11 lecturas en paralelo que hace el frontend al entrar al
+  dashboard (app-context.tsx), como máximo 6 a la vez como un navegador;
+- entradas: POST de enfundes y cosechas;
+- reportes: reportes de producción, nómina, inventario y tendencias.
+
+Informa p50/p95/p99 y peticiones por segundo de cada endpoint y termina con
+error si algún p95 supera 500 ms (RNF-002), si el arranque completo supera
+3 s (RNF-001) o si hay errores con la concurrencia pedida (RNF-003).
+Usar sobre una copia de la base (settings con DATABASE_PATH): los registros
+creados llevan una marca en ``observaciones`` y se eliminan al terminar.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.core.wsgi import get_wsgi_application
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera.models import Cosecha, Enfunde, Finca, Usuario
+
+from .carga_login import ManejadorSilencioso, percentil
+
+MARCA = '[prueba_carga]'
+
+# Presupuestos del PRD, en milisegundos
+PRESUPUESTO_API = 500  # RNF-002, p95 de cada endpoint
+PRESUPUESTO_ARRANQUE = 3000  # RNF-001, arranque completo del dashboard
+USUARIOS_RNF_003 = 50
+
+ARRANQUE = [
+    'fincas', 'usuarios', 'enfundes', 'cosechas', 'recuperaciones', 'empleados',
+    'roles-pago', 'prestamos', 'insumos', 'movimientos-inventario', 'alertas',
+]
+REPORTES = [
+    'reportes/produccion/', 'reportes/nomina/', 'reportes/inventario/',
+    'cosechas/tendencias/', 'cosechas/comparativo/', 'async/dashboard/',
+]
+CONEXIONES_NAVEGADOR = 6
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga HTTP con presupuestos de latencia de RNF-001 a RNF-003'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=USUARIOS_RNF_003, help='Clientes concurrentes')
+        parser.add_argument('--segundos', type=float, default=30)
+        parser.add_argument('--sintetico', type=int, default=0,
+                            help='Enfundes y cosechas sintéticos a crear antes de la prueba')
+        parser.add_argument('--mezcla', default='2,3,5',
+                            help='Pesos de arranque,entradas,reportes')
+        parser.add_argument('--salida', help='Guardar los resultados en un archivo JSON')
+        parser.add_argument('--conservar', action='store_true', help='No eliminar los registros creados')
+
+    def handle(self, *args, **options):
+        usuario = Usuario.objects.filter(activo=True, rol='administrador').first()
+        if usuario is None:
+            raise CommandError('Se necesita un administrador activo (ejecuta create_admin)')
+        self.fincas = [str(pk) for pk in Finca.objects.filter(activa=True).values_list('id', flat=True)]
+        if not self.fincas:
+            raise CommandError('Se necesitan fincas activas (ejecuta populate_db)')
+        try:
+            pesos = [float(p) for p in options['mezcla'].split(',')]
+            assert len(pesos) == 3 and sum(pesos) > 0
+        except (ValueError, AssertionError):
+            raise CommandError('--mezcla espera tres pesos: arranque,entradas,reportes')
+
+        self.cabeceras = {'Authorization': f'Bearer {AccessToken.for_user(usuario)}'}
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        if options['sintetico']:
+            self.stdout.write(f"🌱 Creando {options['sintetico']} enfundes y cosechas sintéticos...")
+            self.crear_sinteticos(options['sintetico'])
+
+        servidor = ThreadedWSGIServer(('127.0.0.1', 0), ManejadorSilencioso)
+        servidor.daemon_threads = True
+        servidor.set_app(get_wsgi_application())
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{servidor.server_address[1]}/api/'
+
+        self.stdout.write(f"🚀 {options['usuarios']} usuarios durante {options['segundos']}s "
+                          f"(mezcla arranque/entradas/reportes {options['mezcla']})\n")
+        try:
+            muestras, errores, duracion = self.ejecutar(options['usuarios'], options['segundos'], pesos)
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+            if not options['conservar']:
+                Enfunde.objects.filter(observaciones=MARCA).delete()
+                Cosecha.objects.filter(observaciones=MARCA).delete()
+
+        resultados, fallos = self.evaluar(muestras, errores, duracion, options['usuarios'])
+        self.imprimir(resultados)
+        if options['salida']:
+            with open(options['salida'], 'w') as archivo:
+                json.dump({'usuarios': options['usuarios'], 'segundos': duracion,
+                           'endpoints': resultados, 'fallos': fallos}, archivo, indent=2)
+
+        if fallos:
+            raise CommandError('Presupuestos excedidos:\n  ' + '\n  '.join(fallos))
+        self.stdout.write(self.style.SUCCESS('\n✅ Todos los presupuestos de RNF-001 a RNF-003 se cumplen'))
+
+    def crear_sinteticos(self, cantidad):
+        hoy = date.today()
+        enfundes, cosechas = [], []
+        for i in range(cantidad):
+            fecha = hoy - timedelta(days=i % 730)
+            semana, año = fecha.isocalendar()[1], fecha.year
+            finca_id = self.fincas[i % len(self.fincas)]
+            enfundes.append(Enfunde(
+                finca_id=finca_id, fecha=fecha, semana=semana, año=año,
+                color_cinta=Enfunde.COLORES_CINTA[i % len(Enfunde.COLORES_CINTA)][0],
+                cantidad_enfundes=random.randint(200, 1500), observaciones=MARCA,
+            ))
+            cosechas.append(Cosecha(
+                finca_id=finca_id, fecha=fecha, semana=semana, año=año,
+                lote=Cosecha.LOTES[i % len(Cosecha.LOTES)][0],
+                cajas_producidas=random.randint(100, 1200), observaciones=MARCA,
+            ))
+        Enfunde.objects.bulk_create(enfundes, batch_size=1000)
+        Cosecha.objects.bulk_create(cosechas, batch_size=1000)
+
+    def peticion(self, registrar, ruta, cuerpo=None):
+        datos = json.dumps(cuerpo).encode() if cuerpo is not None else None
+        cabeceras = {**self.cabeceras, 'Content-Type': 'application/json'} if datos else self.cabeceras
+        etiqueta = f"{'POST' if datos else 'GET'} /api/{ruta}"
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.base + ruta, data=datos, headers=cabeceras)) as r:
+                r.read()
+            estado = r.status
+        except urllib.error.HTTPError as exc:
+            estado = exc.code
+        except OSError:
+            estado = 0
+        registrar(etiqueta, (time.perf_counter() - t0) * 1000, estado)
+
+    def ejecutar(self, usuarios, segundos, pesos):
+        muestras, errores = defaultdict(list), defaultdict(int)
+        bloqueo = threading.Lock()
+
+        def registrar(etiqueta, ms, estado):
+            with bloqueo:
+                muestras[etiqueta].append(ms)
+                if not 200 <= estado < 400:
+                    errores[etiqueta] += 1
+
+        def arranque(navegador):
+            t0 = time.perf_counter()
+            list(navegador.map(lambda ruta: self.peticion(registrar, f'{ruta}/'), ARRANQUE))
+            registrar('dashboard (arranque completo)', (time.perf_counter() - t0) * 1000, 200)
+
+        def entradas(_):
+            hoy = date.today()
+            comunes = {
+                'finca': random.choice(self.fincas), 'fecha': hoy.isoformat(),
+                'semana': hoy.isocalendar()[1], 'año': hoy.year, 'observaciones': MARCA,
+            }
+            self.peticion(registrar, 'enfundes/', {
+                **comunes, 'color_cinta': random.choice(Enfunde.COLORES_CINTA)[0],
+                'cantidad_enfundes': random.randint(200, 1500),
+            })
+            self.peticion(registrar, 'cosechas/', {
+                **comunes, 'lote': random.choice(Cosecha.LOTES)[0],
+                'cajas_producidas': random.randint(100, 1200),
+            })
+
+        def reportes(_):
+            self.peticion(registrar, random.choice(REPORTES))
+
+        escenarios = [arranque, entradas, reportes]
+        fin = time.perf_counter() + segundos
+
+        def usuario():
+            with ThreadPoolExecutor(CONEXIONES_NAVEGADOR) as navegador:
+                while time.perf_counter() < fin:
+                    random.choices(escenarios, pesos)[0](navegador)
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=usuario) for _ in range(usuarios)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return muestras, errores, time.perf_counter() - inicio
+
+    def evaluar(self, muestras, errores, duracion, usuarios):
+        resultados, fallos = {}, []
+        for etiqueta, valores in sorted(muestras.items()):
+            arranque = etiqueta.startswith('dashboard')
+            r = {
+                'peticiones': len(valores),
+                'errores': errores[etiqueta],
+                'por_segundo': len(valores) / duracion,
+                'p50': percentil(valores, 0.50),
+                'p95': percentil(valores, 0.95),
+                'p99': percentil(valores, 0.99),
+                'presupuesto': PRESUPUESTO_ARRANQUE if arranque else PRESUPUESTO_API,
+            }
+            resultados[etiqueta] = r
+            if r['p95'] > r['presupuesto']:
+                requisito = 'RNF-001' if arranque else 'RNF-002'
+                fallos.append(f"{requisito}: {etiqueta} p95 {r['p95']:.0f}ms > {r['presupuesto']}ms")
+            if r['errores']:
+                fallos.append(f"RNF-003: {etiqueta} {r['errores']} errores con {usuarios} usuarios")
+        if usuarios < USUARIOS_RNF_003:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {usuarios} usuarios: RNF-003 pide {USUARIOS_RNF_003} concurrentes'
+            ))
+        return resultados, fallos
+
+    def imprimir(self, resultados):
+        self.stdout.write(f"{'Endpoint':<44} {'n':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}  err")
+        for etiqueta, r in resultados.items():
+            marca = '❌' if r['p95'] > r['presupuesto'] or r['errores'] else '  '
+            self.stdout.write(
+                f"{etiqueta:<44} {r['peticiones']:>6} {r['por_segundo']:>7.1f} {r['p50']:>6.0f}ms "
+                f"{r['p95']:>6.0f}ms {r['p99']:>6.0f}ms  {r['errores']:>3} {marca}"
+            )
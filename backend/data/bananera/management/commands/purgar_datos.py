@@ -0,0 +1,41 @@
+"""
+Comando para purgar por lotes los datos vencidos según las políticas de retención
+Ejecutar con: python manage.py purgar_datos
+Solo contar: python manage.py purgar_datos --simular
+Pensado para ejecutarse a diario desde cron.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bananera.retencion import PAUSA_ENTRE_LOTES, POLITICAS, TAMAÑO_LOTE, purgar
+
+
+class Command(BaseCommand):
+    help = 'Borra en lotes acotados los códigos de recuperación, alertas y correos vencidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--politica', action='append', choices=sorted(POLITICAS),
+                            help='Solo estas políticas (repetible)')
+        parser.add_argument('--lote', type=int, default=TAMAÑO_LOTE, help='Filas por sentencia DELETE')
+        parser.add_argument('--pausa', type=float, default=PAUSA_ENTRE_LOTES,
+                            help='Segundos de espera entre lotes')
+        parser.add_argument('--simular', action='store_true', help='Contar sin borrar')
+
+    def handle(self, *args, **options):
+        total = 0
+        for nombre in options['politica'] or POLITICAS:
+            inicio = time.perf_counter()
+            resultado = purgar(nombre, options['lote'], options['pausa'], options['simular'])
+            duracion = (time.perf_counter() - inicio) * 1000
+            total += resultado['borrados']
+            if options['simular']:
+                self.stdout.write(f"🔎 {nombre}: {resultado['borrados']} registros por purgar")
+            else:
+                self.stdout.write(
+                    f"🧹 {nombre}: {resultado['borrados']} borrados en {resultado['lotes']} lotes "
+                    f"({duracion:.0f} ms)"
+                )
+        accion = 'por purgar' if options['simular'] else 'purgados'
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {total} registros {accion}'))
@@ -0,0 +1,29 @@
+"""
+Comando para reconstruir los índices FTS5 de búsqueda
+Ejecutar con: python manage.py reindexar_busqueda
+Útil después de importar datos con SQL o restaurar una copia de la base.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from bananera.busqueda import INDICES, reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Vacía y vuelve a llenar los índices de búsqueda de empleados, insumos, usuarios y alertas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', action='append', choices=sorted(m.__name__ for m in INDICES),
+                            help='Solo estos modelos (repetible)')
+
+    def handle(self, *args, **options):
+        for modelo in INDICES:
+            if options['modelo'] and modelo.__name__ not in options['modelo']:
+                continue
+            inicio = time.perf_counter()
+            total = reconstruir(modelo)
+            duracion = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(f'🔎 {modelo.__name__}: {total} filas indexadas ({duracion:.0f} ms)')
+        self.stdout.write(self.style.SUCCESS('\n✅ Índices de búsqueda reconstruidos'))
@@ -5,6 +5,7 @@ Ejecutar con: python manage.py seed_alertas_inventario
 
 from django.core.management.base import BaseCommand
 from bananera.models import Insumo, Finca
+from bananera.reglas_alertas import StockBajo, InsumoPorVencer, evaluar_reglas
 from datetime import date, timedelta
 from decimal import Decimal
 
@@ -183,3 +184,8 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(
             f'📊 Total de insumos con stock bajo: {len(insumos_alertas)}'
         ))
+
+        resultado = evaluar_reglas([StockBajo(), InsumoPorVencer()])
+        self.stdout.write(self.style.SUCCESS(
+            f'📨 Alertas generadas por las reglas: {sum(resultado.values())}'
+        ))
@@ -0,0 +1,56 @@
+"""
+Comando para copiar la base SQLite primaria sobre la réplica local
+Ejecutar con: DATABASE_REPLICA_PATH=replica.sqlite3 python manage.py sincronizar_replica
+Como proceso en segundo plano: ... sincronizar_replica --intervalo 5
+
+Usa la API de respaldo en línea de SQLite, por lo que la copia es consistente
+aunque la primaria esté recibiendo escrituras. Con PostgreSQL la réplica se
+mantiene por replicación en streaming y este comando no aplica.
+"""
+
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bananera.enrutador import PRIMARIA, REPLICA
+
+
+class Command(BaseCommand):
+    help = 'Copia la base SQLite primaria sobre la réplica de lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo', type=float, default=0,
+            help='Repetir la copia cada N segundos (0 = una sola vez)'
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError('No hay réplica configurada (define DATABASE_REPLICA_PATH)')
+        primaria = settings.DATABASES[PRIMARIA]
+        replica = settings.DATABASES[REPLICA]
+        if not primaria['ENGINE'].endswith('sqlite3'):
+            raise CommandError('La copia solo aplica a SQLite')
+        if str(primaria['NAME']) == str(replica['NAME']):
+            raise CommandError('La réplica apunta al mismo archivo que la primaria')
+
+        while True:
+            inicio = time.perf_counter()
+            origen = sqlite3.connect(primaria['NAME'])
+            destino = sqlite3.connect(replica['NAME'])
+            try:
+                origen.backup(destino)
+            finally:
+                destino.close()
+                origen.close()
+            duracion = (time.perf_counter() - inicio) * 1000
+
+            self.stdout.write(self.style.SUCCESS(
+                f"🔁 Réplica sincronizada ({replica['NAME']}) en {duracion:.0f} ms"
+            ))
+
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,169 @@
+"""
+Métricas de rendimiento por ruta en formato Prometheus
+
+Cada proceso acumula en memoria, por ruta y método: histograma de latencia,
+peticiones por estado, consultas y tiempo de base de datos, bytes de
+respuesta y peticiones sobre el presupuesto de RNF-002. Periódicamente vuelca
+su acumulado a ``METRICAS_DIR/<pid>.json`` (escritura atómica) y
+``/api/metrics`` suma los archivos de los workers vivos; los de procesos que
+ya terminaron se borran al recolectar.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Límites superiores del histograma, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PRESUPUESTO_SEGUNDOS = 0.5  # RNF-002
+INTERVALO_VOLCADO = 2
+
+_bloqueo = threading.Lock()
+_series = {}
+_ultimo_volcado = 0.0
+
+
+def _serie_vacia():
+    return {
+        'buckets': [0] * len(BUCKETS),
+        'cantidad': 0,
+        'suma': 0.0,
+        'estados': {},
+        'consultas': 0,
+        'tiempo_bd': 0.0,
+        'bytes': 0,
+        'sobre_presupuesto': 0,
+    }
+
+
+def directorio():
+    return Path(getattr(settings, 'METRICAS_DIR', Path(tempfile.gettempdir()) / 'bananera-metricas'))
+
+
+def registrar(ruta, metodo, estado, duracion, consultas, tiempo_bd, tamaño):
+    clave = f'{ruta}|{metodo}'
+    with _bloqueo:
+        serie = _series.setdefault(clave, _serie_vacia())
+        for i, limite in enumerate(BUCKETS):
+            if duracion <= limite:
+                serie['buckets'][i] += 1
+        serie['cantidad'] += 1
+        serie['suma'] += duracion
+        serie['estados'][str(estado)] = serie['estados'].get(str(estado), 0) + 1
+        serie['consultas'] += consultas
+        serie['tiempo_bd'] += tiempo_bd
+        serie['bytes'] += tamaño
+        if duracion > PRESUPUESTO_SEGUNDOS:
+            serie['sobre_presupuesto'] += 1
+    volcar()
+
+
+def volcar(forzar=False):
+    """Escribe el acumulado de este proceso como máximo cada INTERVALO_VOLCADO segundos"""
+    global _ultimo_volcado
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultimo_volcado < INTERVALO_VOLCADO:
+        return
+    with _bloqueo:
+        _ultimo_volcado = ahora
+        contenido = json.dumps(_series)
+
+    carpeta = directorio()
+    carpeta.mkdir(parents=True, exist_ok=True)
+    temporal = carpeta / f'.{os.getpid()}.tmp'
+    temporal.write_text(contenido)
+    os.replace(temporal, carpeta / f'{os.getpid()}.json')
+
+
+def _vivo(pid):
+    if os.name == 'nt':
+        # En Windows os.kill termina el proceso: no se poda
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # existe, pero es de otro usuario
+    return True
+
+
+def podar():
+    """Borra los archivos de procesos que ya no existen"""
+    for archivo in directorio().glob('*'):
+        pid = archivo.name.strip('.').split('.')[0]
+        if pid.isdigit() and not _vivo(int(pid)):
+            archivo.unlink(missing_ok=True)
+
+
+def combinar():
+    """Suma los acumulados volcados por los procesos vivos"""
+    podar()
+    total = {}
+    for archivo in directorio().glob('*.json'):
+        try:
+            series = json.loads(archivo.read_text())
+        except (OSError, ValueError):
+            continue
+        for clave, serie in series.items():
+            destino = total.setdefault(clave, _serie_vacia())
+            destino['buckets'] = [a + b for a, b in zip(destino['buckets'], serie['buckets'])]
+            for campo in ('cantidad', 'suma', 'consultas', 'tiempo_bd', 'bytes', 'sobre_presupuesto'):
+                destino[campo] += serie[campo]
+            for estado, n in serie['estados'].items():
+                destino['estados'][estado] = destino['estados'].get(estado, 0) + n
+    return total
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(**valores):
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in valores.items()) + '}'
+
+
+def exposicion():
+    """Texto en formato de exposición de Prometheus (0.0.4)"""
+    volcar(forzar=True)
+    series = sorted(combinar().items())
+    prefijo = 'bananera_http'
+    lineas = [
+        f'# HELP {prefijo}_request_duration_seconds Latencia de las peticiones por ruta',
+        f'# TYPE {prefijo}_request_duration_seconds histogram',
+    ]
+    for clave, serie in series:
+        ruta, metodo = clave.rsplit('|', 1)
+        for limite, n in zip(BUCKETS, serie['buckets']):
+            lineas.append(f'{prefijo}_request_duration_seconds_bucket'
+                          f'{_etiquetas(ruta=ruta, metodo=metodo, le=limite)} {n}')
+        lineas.append(f'{prefijo}_request_duration_seconds_bucket'
+                      f'{_etiquetas(ruta=ruta, metodo=metodo, le="+Inf")} {serie["cantidad"]}')
+        lineas.append(f'{prefijo}_request_duration_seconds_sum{_etiquetas(ruta=ruta, metodo=metodo)} {serie["suma"]:.6f}')
+        lineas.append(f'{prefijo}_request_duration_seconds_count{_etiquetas(ruta=ruta, metodo=metodo)} {serie["cantidad"]}')
+
+    contadores = [
+        ('requests_total', 'Peticiones por ruta y estado', None),
+        ('db_queries_total', 'Consultas SQL ejecutadas', 'consultas'),
+        ('db_seconds_total', 'Tiempo total en la base de datos', 'tiempo_bd'),
+        ('response_bytes_total', 'Bytes de respuesta enviados', 'bytes'),
+        ('over_budget_total', f'Peticiones sobre {PRESUPUESTO_SEGUNDOS * 1000:.0f} ms (RNF-002)', 'sobre_presupuesto'),
+    ]
+    for nombre, ayuda, campo in contadores:
+        lineas.append(f'# HELP {prefijo}_{nombre} {ayuda}')
+        lineas.append(f'# TYPE {prefijo}_{nombre} counter')
+        for clave, serie in series:
+            ruta, metodo = clave.rsplit('|', 1)
+            if campo is None:
+                for estado, n in sorted(serie['estados'].items()):
+                    lineas.append(f'{prefijo}_{nombre}{_etiquetas(ruta=ruta, metodo=metodo, estado=estado)} {n}')
+            else:
+                valor = serie[campo]
+                valor = f'{valor:.6f}' if isinstance(valor, float) else valor
+                lineas.append(f'{prefijo}_{nombre}{_etiquetas(ruta=ruta, metodo=metodo)} {valor}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,170 @@
+"""
+Middleware de la app Bananera
+"""
+
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from . import compresion, metricas
+from .detector_consultas import detectar_consultas
+from .enrutador import PRIMARIA, REPLICA, fijar_lectura, replica_configurada, restaurar_lectura
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+ACCIONES_LISTADO = {'list'}
+
+
+class LecturaReplicaMiddleware:
+    """
+    Envía a la réplica las lecturas de listados y reportes.
+
+    - Solo peticiones GET/HEAD/OPTIONS a acciones ``list``, a las acciones que
+      un ViewSet declare en ``acciones_replica`` o a vistas marcadas con
+      ``@lectura_replica``. Todo lo demás (incluidas las lecturas dentro de
+      una petición de escritura) lee de la primaria.
+    - Tras una escritura, el mismo cliente lee de la primaria durante
+      ``REPLICA_LECTURA_PRIMARIA_SEGUNDOS`` para ver sus propios cambios.
+    - La cabecera ``X-Leer-De: primaria|replica`` fuerza la base por petición.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, '_token_base_lectura', None)
+            if token is not None:
+                restaurar_lectura(token)
+
+        if request.method not in METODOS_SEGUROS and replica_configurada():
+            cache.set(self._clave_cliente(request), True, self._segundos_primaria())
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not replica_configurada():
+            return None
+        request._token_base_lectura = fijar_lectura(self._base_para(request, view_func))
+        return None
+
+    def _base_para(self, request, view_func):
+        if request.method not in METODOS_SEGUROS:
+            return PRIMARIA
+
+        forzada = request.headers.get('X-Leer-De', '').lower()
+        if forzada == 'primaria':
+            return PRIMARIA
+        if forzada != 'replica':
+            if not self._apta_para_replica(request, view_func):
+                return PRIMARIA
+            if cache.get(self._clave_cliente(request)):
+                return PRIMARIA
+        return REPLICA
+
+    def _apta_para_replica(self, request, view_func):
+        if getattr(view_func, 'usar_replica', False):
+            return True
+        acciones = getattr(view_func, 'actions', None)
+        if not acciones:
+            return False
+        accion = acciones.get(request.method.lower())
+        extra = getattr(view_func.cls, 'acciones_replica', ())
+        return accion in ACCIONES_LISTADO or accion in extra
+
+    def _clave_cliente(self, request):
+        credencial = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+        return 'bananera:primaria:' + hashlib.sha1(credencial.encode()).hexdigest()
+
+    def _segundos_primaria(self):
+        return getattr(settings, 'REPLICA_LECTURA_PRIMARIA_SEGUNDOS', 5)
+
+
+class ContadorConsultas:
+    """``execute_wrapper`` que cuenta consultas y acumula su duración"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.tiempo += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+class MetricasMiddleware:
+    """
+    Registra por ruta y método la latencia, las consultas SQL y su tiempo,
+    el tamaño y el estado de cada respuesta (ver ``metricas.py``).
+
+    Solo cuenta las consultas del hilo de la petición: las que las vistas
+    asíncronas lanzan en paralelo en otros hilos no se incluyen.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = ContadorConsultas()
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(contador))
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        ruta = (coincidencia.view_name or coincidencia.route) if coincidencia else 'sin_ruta'
+        tamaño = 0 if response.streaming else len(response.content)
+        metricas.registrar(
+            ruta, request.method, response.status_code,
+            duracion, contador.consultas, contador.tiempo, tamaño,
+        )
+        return response
+
+
+class DetectorConsultasMiddleware:
+    """
+    Busca consultas N+1 en cada petición según ``DETECTOR_CONSULTAS``:
+    ``'fallar'`` (pruebas) lanza ``ConsultasRepetidasError``, ``'advertir'``
+    (desarrollo) registra el informe y añade la cabecera
+    ``X-Consultas-Repetidas``; vacío lo desactiva.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modo = getattr(settings, 'DETECTOR_CONSULTAS', '')
+        if not modo:
+            return self.get_response(request)
+
+        contexto = f'{request.method} {request.path}'
+        with detectar_consultas(fallar=modo == 'fallar', contexto=contexto) as detector:
+            response = self.get_response(request)
+        repetidas = detector.repetidas()
+        if repetidas:
+            response['X-Consultas-Repetidas'] = str(len(repetidas))
+        return response
+
+
+class CompresionMiddleware:
+    """
+    Comprime con brotli o gzip, según ``Accept-Encoding``, las respuestas de
+    texto/JSON de al menos ``COMPRESION_MINIMA_BYTES`` (ver ``compresion.py``).
+    Las que vienen de ``@respuesta_cacheada`` usan la variante ya comprimida.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compresion.aplicar(request, self.get_response(request))
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.2 on 2026-10-19 09:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0003_passwordresetcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alerta',
+            name='clave',
+            field=models.CharField(blank=True, db_index=True, max_length=150),
+        ),
+        migrations.CreateModel(
+            name='EstadisticaProduccion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('metrica', models.CharField(choices=[('cajas_producidas', 'Cajas Producidas'), ('ratio', 'Ratio'), ('matas_caidas', 'Matas Caídas')], max_length=20)),
+                ('valores', models.JSONField(default=list)),
+                ('mediana', models.FloatField(default=0)),
+                ('mad', models.FloatField(default=0)),
+                ('ultimo_año', models.IntegerField(default=0)),
+                ('ultima_semana', models.IntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('finca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_produccion', to='bananera.finca')),
+            ],
+            options={
+                'verbose_name': 'Estadística de Producción',
+                'verbose_name_plural': 'Estadísticas de Producción',
+                'ordering': ['finca', 'metrica'],
+                'constraints': [models.UniqueConstraint(fields=('finca', 'metrica'), name='estadistica_finca_metrica_unica')],
+            },
+        ),
+    ]
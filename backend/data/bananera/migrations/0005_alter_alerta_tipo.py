@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0004_estadisticaproduccion_alerta_clave'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alerta',
+            name='tipo',
+            field=models.CharField(choices=[('stock_bajo', 'Stock Bajo'), ('pago_pendiente', 'Pago Pendiente'), ('prestamo_vencido', 'Préstamo Vencido'), ('vencimiento', 'Vencimiento de Insumo'), ('cosecha', 'Cosecha'), ('mantenimiento', 'Mantenimiento'), ('general', 'General')], max_length=20),
+        ),
+    ]
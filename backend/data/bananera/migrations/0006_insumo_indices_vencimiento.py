@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0005_alter_alerta_tipo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['fecha_vencimiento'], name='insumo_vencimiento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['finca', 'fecha_vencimiento'], name='insumo_finca_venc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='insumo',
+            index=models.Index(fields=['finca', 'nombre', 'fecha_vencimiento'], name='insumo_fefo_idx'),
+        ),
+    ]
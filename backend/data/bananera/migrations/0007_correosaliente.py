@@ -0,0 +1,37 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:40
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0006_insumo_indices_vencimiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorreoSaliente',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('asunto', models.CharField(max_length=200)),
+                ('mensaje', models.TextField()),
+                ('remitente', models.CharField(max_length=200)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('enviado', 'Enviado'), ('fallido', 'Fallido')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('ultimo_error', models.TextField(blank=True)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Correo Saliente',
+                'verbose_name_plural': 'Correos Salientes',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='correo_pendiente_idx')],
+            },
+        ),
+    ]
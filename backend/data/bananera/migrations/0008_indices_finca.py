@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0007_correosaliente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alerta',
+            index=models.Index(fields=['finca', '-fecha_creacion'], name='alerta_finca_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cosecha',
+            index=models.Index(fields=['finca', '-fecha'], name='cosecha_finca_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cosecha',
+            index=models.Index(fields=['finca', 'año', 'semana'], name='cosecha_finca_semana_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enfunde',
+            index=models.Index(fields=['finca', '-fecha'], name='enfunde_finca_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['finca', '-fecha'], name='movimiento_finca_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,179 @@
+# Generated by Django 5.1.2 on 2026-10-19 16:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+COLUMNAS = {
+    'enfunde': 'id, finca_id, fecha, semana, "año", color_cinta, cantidad_enfundes, '
+               'matas_caidas, observaciones, fecha_creacion',
+    'cosecha': 'id, finca_id, fecha, semana, "año", lote, cajas_producidas, racimos_recuperados, '
+               'peso_promedio, calibracion, manos, ratio, observaciones, fecha_creacion',
+    'recuperacioncinta': 'id, enfunde_id, fecha, cintas_recuperadas, porcentaje_recuperacion, '
+                         'observaciones, fecha_creacion',
+}
+
+
+def vista_historico(tabla):
+    columnas = COLUMNAS[tabla]
+    return migrations.RunSQL(
+        f'CREATE VIEW bananera_{tabla}_historico AS '
+        f'SELECT {columnas} FROM bananera_{tabla} '
+        f'UNION ALL SELECT {columnas} FROM bananera_{tabla}_archivo',
+        f'DROP VIEW bananera_{tabla}_historico',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0008_indices_finca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CosechaHistorico',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('semana', models.IntegerField()),
+                ('año', models.IntegerField()),
+                ('lote', models.CharField(choices=[('A', 'Lote A'), ('B', 'Lote B'), ('C', 'Lote C'), ('D', 'Lote D'), ('E', 'Lote E')], max_length=1)),
+                ('cajas_producidas', models.IntegerField()),
+                ('racimos_recuperados', models.IntegerField(default=0)),
+                ('peso_promedio', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('calibracion', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('manos', models.IntegerField(default=0)),
+                ('ratio', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'bananera_cosecha_historico',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='EnfundeHistorico',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('semana', models.IntegerField()),
+                ('año', models.IntegerField()),
+                ('color_cinta', models.CharField(choices=[('verde', 'Verde'), ('azul', 'Azul'), ('rojo', 'Rojo'), ('amarillo', 'Amarillo'), ('blanco', 'Blanco'), ('negro', 'Negro')], max_length=20)),
+                ('cantidad_enfundes', models.IntegerField()),
+                ('matas_caidas', models.IntegerField(default=0)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'bananera_enfunde_historico',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RecuperacionCintaHistorico',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('cintas_recuperadas', models.IntegerField()),
+                ('porcentaje_recuperacion', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'bananera_recuperacioncinta_historico',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TemporadaArchivada',
+            fields=[
+                ('año', models.IntegerField(primary_key=True, serialize=False)),
+                ('enfundes', models.IntegerField(default=0)),
+                ('cosechas', models.IntegerField(default=0)),
+                ('recuperaciones', models.IntegerField(default=0)),
+                ('fecha_archivo', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Temporada Archivada',
+                'verbose_name_plural': 'Temporadas Archivadas',
+                'ordering': ['-año'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EnfundeArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('semana', models.IntegerField()),
+                ('año', models.IntegerField()),
+                ('color_cinta', models.CharField(choices=[('verde', 'Verde'), ('azul', 'Azul'), ('rojo', 'Rojo'), ('amarillo', 'Amarillo'), ('blanco', 'Blanco'), ('negro', 'Negro')], max_length=20)),
+                ('cantidad_enfundes', models.IntegerField()),
+                ('matas_caidas', models.IntegerField(default=0)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('finca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bananera.finca')),
+            ],
+            options={
+                'db_table': 'bananera_enfunde_archivo',
+                'ordering': ['-fecha'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RecuperacionCintaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('cintas_recuperadas', models.IntegerField()),
+                ('porcentaje_recuperacion', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('enfunde', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bananera.enfundearchivo')),
+            ],
+            options={
+                'db_table': 'bananera_recuperacioncinta_archivo',
+                'ordering': ['-fecha'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CosechaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('semana', models.IntegerField()),
+                ('año', models.IntegerField()),
+                ('lote', models.CharField(choices=[('A', 'Lote A'), ('B', 'Lote B'), ('C', 'Lote C'), ('D', 'Lote D'), ('E', 'Lote E')], max_length=1)),
+                ('cajas_producidas', models.IntegerField()),
+                ('racimos_recuperados', models.IntegerField(default=0)),
+                ('peso_promedio', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('calibracion', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('manos', models.IntegerField(default=0)),
+                ('ratio', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('observaciones', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('finca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bananera.finca')),
+            ],
+            options={
+                'db_table': 'bananera_cosecha_archivo',
+                'ordering': ['-fecha'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['año', 'finca'], name='cosecha_arch_anio_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='enfundearchivo',
+            index=models.Index(fields=['año', 'finca'], name='enfunde_arch_anio_idx'),
+        ),
+        vista_historico('enfunde'),
+        vista_historico('cosecha'),
+        vista_historico('recuperacioncinta'),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def contar_no_leidas(apps, schema_editor):
+    Alerta = apps.get_model('bananera', 'Alerta')
+    ConteoAlertas = apps.get_model('bananera', 'ConteoAlertas')
+    filas = (
+        Alerta.objects.filter(leida=False)
+        .values('finca_id', 'prioridad')
+        .annotate(no_leidas=Count('id'))
+        .order_by()
+    )
+    ConteoAlertas.objects.bulk_create(ConteoAlertas(**fila) for fila in filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0009_archivo_temporadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteoAlertas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prioridad', models.CharField(choices=[('baja', 'Baja'), ('media', 'Media'), ('alta', 'Alta'), ('critica', 'Crítica')], max_length=10)),
+                ('no_leidas', models.IntegerField(default=0)),
+                ('finca', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bananera.finca')),
+            ],
+            options={
+                'verbose_name': 'Conteo de Alertas',
+                'verbose_name_plural': 'Conteos de Alertas',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('finca__isnull', False)), fields=('finca', 'prioridad'), name='conteo_alertas_finca_uniq'), models.UniqueConstraint(condition=models.Q(('finca__isnull', True)), fields=('prioridad',), name='conteo_alertas_general_uniq')],
+            },
+        ),
+        migrations.RunPython(contar_no_leidas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:20
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0010_conteoalertas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoCambio',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('alerta', 'Alerta'), ('stock', 'Cruce de Stock Mínimo'), ('cosecha', 'Cosecha'), ('enfunde', 'Enfunde')], max_length=10)),
+                ('datos', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('finca', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bananera.finca')),
+            ],
+            options={
+                'verbose_name': 'Evento de Cambio',
+                'verbose_name_plural': 'Eventos de Cambio',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.2 on 2026-10-19 17:40
+
+import unicodedata
+
+from django.db import migrations
+
+# Tablas FTS5 de búsqueda (ver bananera/busqueda.py); solo en SQLite.
+# La normalización y el rowid se copian aquí para que la migración no dependa
+# del código de la app.
+INDICES = {
+    'Empleado': ['nombre', 'cedula', 'telefono'],
+    'Insumo': ['nombre'],
+    'Usuario': ['nombre', 'email', 'telefono'],
+    'Alerta': ['titulo', 'mensaje'],
+}
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def rowid(pk):
+    return pk.int & ((1 << 63) - 1)
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for nombre, campos in INDICES.items():
+            modelo = apps.get_model('bananera', nombre)
+            tabla = f'{modelo._meta.db_table}_fts'
+            columnas = ', '.join(campos)
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabla} "
+                f"USING fts5(objeto UNINDEXED, {columnas}, tokenize='trigram')"
+            )
+            marcas = ', '.join(['%s'] * (len(campos) + 2))
+            cursor.executemany(
+                f'INSERT INTO {tabla} (rowid, objeto, {columnas}) VALUES ({marcas})',
+                [
+                    [rowid(obj.pk), obj.pk.hex, *(normalizar(getattr(obj, campo)) for campo in campos)]
+                    for obj in modelo.objects.only('pk', *campos).iterator()
+                ],
+            )
+
+
+def borrar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for nombre in INDICES:
+            cursor.execute(f"DROP TABLE IF EXISTS {apps.get_model('bananera', nombre)._meta.db_table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0011_eventocambio'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0012_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeometriaFinca',
+            fields=[
+                ('finca', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='geometria', serialize=False, to='bananera.finca')),
+                ('contorno', models.JSONField(blank=True, help_text='GeoJSON Polygon o MultiPolygon', null=True)),
+                ('lotes', models.JSONField(blank=True, default=dict, help_text='{"A": {GeoJSON}, "B": ...}')),
+                ('simplificada', models.JSONField(blank=True, default=dict, editable=False)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Geometría de Finca',
+                'verbose_name_plural': 'Geometrías de Fincas',
+            },
+        ),
+    ]
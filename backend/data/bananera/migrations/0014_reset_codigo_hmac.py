@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-19 18:40
+
+from django.db import migrations, models
+from django.utils.crypto import salted_hmac
+
+ASUNTO_RECUPERACION = 'Código de Recuperación - Bananera HG'
+CUERPO_ELIMINADO = '[Contenido eliminado: incluía un código de recuperación]'
+
+
+def proteger_codigos(apps, schema_editor):
+    PasswordResetCode = apps.get_model('bananera', 'PasswordResetCode')
+    CorreoSaliente = apps.get_model('bananera', 'CorreoSaliente')
+    # Mismo HMAC que PasswordResetCode.resumen(); los pendientes siguen siendo válidos
+    for reset in PasswordResetCode.objects.only('codigo'):
+        reset.codigo = salted_hmac('bananera.PasswordResetCode', reset.codigo, algorithm='sha256').hexdigest()
+        reset.save(update_fields=['codigo'])
+    correos = CorreoSaliente.objects.filter(asunto=ASUNTO_RECUPERACION)
+    correos.update(sensible=True)
+    correos.exclude(estado='pendiente').update(mensaje=CUERPO_ELIMINADO)
+
+
+def descartar_codigos(apps, schema_editor):
+    """
+    El HMAC no se puede deshacer: con el código anterior a esta migración
+    ningún código guardado volvería a validar (y no cabe en max_length=6).
+    Se borran y los correos de recuperación aún en cola se dan por fallidos,
+    para no enviar códigos que ya no sirven; el usuario pide uno nuevo.
+    """
+    PasswordResetCode = apps.get_model('bananera', 'PasswordResetCode')
+    CorreoSaliente = apps.get_model('bananera', 'CorreoSaliente')
+    PasswordResetCode.objects.all().delete()
+    CorreoSaliente.objects.filter(asunto=ASUNTO_RECUPERACION, estado='pendiente').update(
+        estado='fallido', mensaje=CUERPO_ELIMINADO,
+        ultimo_error='Código descartado al revertir la migración 0014',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bananera', '0013_geometria_finca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correosaliente',
+            name='sensible',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='passwordresetcode',
+            name='codigo',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.RunPython(proteger_codigos, descartar_codigos),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 19:10
+
+from django.db import migrations
+
+# journal_mode queda guardado en el archivo de la base: se fija una vez aquí
+# y no en cada conexión (ver bananera/conexiones.py). No puede cambiarse
+# dentro de una transacción, de ahí atomic = False.
+
+
+def modo_diario(modo):
+    def aplicar(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {modo}')
+    return aplicar
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('bananera', '0014_reset_codigo_hmac'),
+    ]
+
+    operations = [
+        # WAL: lectores y escritor concurrentes
+        migrations.RunPython(modo_diario('wal'), modo_diario('delete')),
+    ]
@@ -3,7 +3,10 @@ Modelos para la aplicación Bananera
 """
 
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 
@@ -82,8 +85,8 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
         return f"{self.nombre} ({self.email})"
 
 
-class Enfunde(models.Model):
-    """Modelo para registro de enfundes"""
+class EnfundeBase(models.Model):
+    """Campos de enfunde comunes a la tabla caliente y al archivo"""
     COLORES_CINTA = [
         ('verde', 'Verde'),
         ('azul', 'Azul'),
@@ -94,7 +97,6 @@ class Enfunde(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='enfundes')
     fecha = models.DateField()
     semana = models.IntegerField()
     año = models.IntegerField()
@@ -105,16 +107,28 @@ class Enfunde(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        abstract = True
         ordering = ['-fecha']
-        verbose_name = 'Enfunde'
-        verbose_name_plural = 'Enfundes'
 
     def __str__(self):
         return f"Enfunde {self.finca.nombre} - Semana {self.semana}/{self.año}"
 
 
-class Cosecha(models.Model):
-    """Modelo para registro de cosechas"""
+class Enfunde(EnfundeBase):
+    """Modelo para registro de enfundes"""
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='enfundes')
+
+    class Meta(EnfundeBase.Meta):
+        verbose_name = 'Enfunde'
+        verbose_name_plural = 'Enfundes'
+        indexes = [
+            # Listados por finca (ver alcance.py)
+            models.Index(fields=['finca', '-fecha'], name='enfunde_finca_fecha_idx'),
+        ]
+
+
+class CosechaBase(models.Model):
+    """Campos de cosecha comunes a la tabla caliente y al archivo"""
     LOTES = [
         ('A', 'Lote A'),
         ('B', 'Lote B'),
@@ -124,7 +138,6 @@ class Cosecha(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='cosechas')
     fecha = models.DateField()
     semana = models.IntegerField()
     año = models.IntegerField()
@@ -139,18 +152,29 @@ class Cosecha(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        abstract = True
         ordering = ['-fecha']
-        verbose_name = 'Cosecha'
-        verbose_name_plural = 'Cosechas'
 
     def __str__(self):
         return f"Cosecha {self.finca.nombre} - {self.fecha}"
 
 
-class RecuperacionCinta(models.Model):
-    """Modelo para registro de recuperación de cintas"""
+class Cosecha(CosechaBase):
+    """Modelo para registro de cosechas"""
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='cosechas')
+
+    class Meta(CosechaBase.Meta):
+        verbose_name = 'Cosecha'
+        verbose_name_plural = 'Cosechas'
+        indexes = [
+            models.Index(fields=['finca', '-fecha'], name='cosecha_finca_fecha_idx'),
+            models.Index(fields=['finca', 'año', 'semana'], name='cosecha_finca_semana_idx'),
+        ]
+
+
+class RecuperacionCintaBase(models.Model):
+    """Campos de recuperación de cintas comunes a la tabla caliente y al archivo"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    enfunde = models.ForeignKey(Enfunde, on_delete=models.CASCADE, related_name='recuperaciones')
     fecha = models.DateField()
     cintas_recuperadas = models.IntegerField()
     porcentaje_recuperacion = models.DecimalField(max_digits=5, decimal_places=2, default=0)
@@ -158,14 +182,22 @@ class RecuperacionCinta(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        abstract = True
         ordering = ['-fecha']
-        verbose_name = 'Recuperación de Cinta'
-        verbose_name_plural = 'Recuperaciones de Cintas'
 
     def __str__(self):
         return f"Recuperación {self.enfunde} - {self.fecha}"
 
 
+class RecuperacionCinta(RecuperacionCintaBase):
+    """Modelo para registro de recuperación de cintas"""
+    enfunde = models.ForeignKey(Enfunde, on_delete=models.CASCADE, related_name='recuperaciones')
+
+    class Meta(RecuperacionCintaBase.Meta):
+        verbose_name = 'Recuperación de Cinta'
+        verbose_name_plural = 'Recuperaciones de Cintas'
+
+
 class Empleado(models.Model):
     """Modelo para empleados"""
     CARGOS = [
@@ -300,6 +332,12 @@ class Insumo(models.Model):
         ordering = ['nombre']
         verbose_name = 'Insumo'
         verbose_name_plural = 'Insumos'
+        indexes = [
+            # Consultas de vencimiento (FEFO) por rango de fechas
+            models.Index(fields=['fecha_vencimiento'], name='insumo_vencimiento_idx'),
+            models.Index(fields=['finca', 'fecha_vencimiento'], name='insumo_finca_venc_idx'),
+            models.Index(fields=['finca', 'nombre', 'fecha_vencimiento'], name='insumo_fefo_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.finca.nombre if self.finca else 'Sin finca'})"
@@ -329,6 +367,9 @@ class MovimientoInventario(models.Model):
         ordering = ['-fecha']
         verbose_name = 'Movimiento de Inventario'
         verbose_name_plural = 'Movimientos de Inventario'
+        indexes = [
+            models.Index(fields=['finca', '-fecha'], name='movimiento_finca_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tipo} - {self.insumo.nombre} ({self.cantidad})"
@@ -340,6 +381,7 @@ class Alerta(models.Model):
         ('stock_bajo', 'Stock Bajo'),
         ('pago_pendiente', 'Pago Pendiente'),
         ('prestamo_vencido', 'Préstamo Vencido'),
+        ('vencimiento', 'Vencimiento de Insumo'),
         ('cosecha', 'Cosecha'),
         ('mantenimiento', 'Mantenimiento'),
         ('general', 'General'),
@@ -362,17 +404,122 @@ class Alerta(models.Model):
         Finca, on_delete=models.CASCADE, null=True, blank=True,
         related_name='alertas'
     )
+    # Clave natural para no duplicar alertas generadas automáticamente
+    clave = models.CharField(max_length=150, blank=True, db_index=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-fecha_creacion']
         verbose_name = 'Alerta'
         verbose_name_plural = 'Alertas'
+        indexes = [
+            models.Index(fields=['finca', '-fecha_creacion'], name='alerta_finca_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tipo}: {self.titulo}"
 
 
+class ConteoAlertas(models.Model):
+    """Alertas no leídas por finca y prioridad, mantenido al escribir alertas (ver conteo_alertas.py)"""
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    prioridad = models.CharField(max_length=10, choices=Alerta.PRIORIDADES)
+    no_leidas = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Conteo de Alertas'
+        verbose_name_plural = 'Conteos de Alertas'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['finca', 'prioridad'], condition=models.Q(finca__isnull=False),
+                name='conteo_alertas_finca_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['prioridad'], condition=models.Q(finca__isnull=True),
+                name='conteo_alertas_general_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.finca or 'General'} / {self.prioridad}: {self.no_leidas}"
+
+
+class EventoCambio(models.Model):
+    """Secuencia de cambios que se envía a los clientes por SSE (ver eventos.py)"""
+    TIPOS = [
+        ('alerta', 'Alerta'),
+        ('stock', 'Cruce de Stock Mínimo'),
+        ('cosecha', 'Cosecha'),
+        ('enfunde', 'Enfunde'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    datos = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Evento de Cambio'
+        verbose_name_plural = 'Eventos de Cambio'
+
+    def __str__(self):
+        return f"{self.id} {self.tipo}"
+
+
+class GeometriaFinca(models.Model):
+    """
+    Contorno de la finca y de sus lotes A-E en GeoJSON (lon/lat WGS84)
+
+    Tabla aparte para que los listados que unen con finca no carguen las
+    geometrías. ``simplificada`` se recalcula al guardar (ver geo.py).
+    """
+    finca = models.OneToOneField(Finca, on_delete=models.CASCADE, primary_key=True, related_name='geometria')
+    contorno = models.JSONField(null=True, blank=True, help_text='GeoJSON Polygon o MultiPolygon')
+    lotes = models.JSONField(default=dict, blank=True, help_text='{"A": {GeoJSON}, "B": ...}')
+    simplificada = models.JSONField(default=dict, blank=True, editable=False)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Geometría de Finca'
+        verbose_name_plural = 'Geometrías de Fincas'
+
+    def __str__(self):
+        return f"Geometría {self.finca.nombre}"
+
+
+class EstadisticaProduccion(models.Model):
+    """Estadística robusta (mediana/MAD) por finca y métrica semanal"""
+    METRICAS = [
+        ('cajas_producidas', 'Cajas Producidas'),
+        ('ratio', 'Ratio'),
+        ('matas_caidas', 'Matas Caídas'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='estadisticas_produccion')
+    metrica = models.CharField(max_length=20, choices=METRICAS)
+    # Ventana de las últimas semanas procesadas, de la más antigua a la más reciente
+    valores = models.JSONField(default=list)
+    mediana = models.FloatField(default=0)
+    mad = models.FloatField(default=0)
+    ultimo_año = models.IntegerField(default=0)
+    ultima_semana = models.IntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['finca', 'metrica']
+        verbose_name = 'Estadística de Producción'
+        verbose_name_plural = 'Estadísticas de Producción'
+        constraints = [
+            models.UniqueConstraint(fields=['finca', 'metrica'], name='estadistica_finca_metrica_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.finca.nombre} - {self.metrica}"
+
+
 class PasswordResetCode(models.Model):
     """Código de recuperación de contraseña"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -380,7 +527,8 @@ class PasswordResetCode(models.Model):
         Usuario, on_delete=models.CASCADE,
         related_name='reset_codes'
     )
-    codigo = models.CharField(max_length=6)
+    # HMAC del código (ver ``resumen``): el código en claro solo viaja en el correo
+    codigo = models.CharField(max_length=64)
     usado = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_expiracion = models.DateTimeField()
@@ -397,3 +545,118 @@ class PasswordResetCode(models.Model):
     def is_valid(self):
         from django.utils import timezone
         return not self.usado and self.fecha_expiracion > timezone.now()
+
+    @staticmethod
+    def resumen(codigo):
+        return salted_hmac('bananera.PasswordResetCode', codigo, algorithm='sha256').hexdigest()
+
+
+class CorreoSaliente(models.Model):
+    """Bandeja de salida de correos, enviada en lotes por `enviar_correos`"""
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('enviado', 'Enviado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    asunto = models.CharField(max_length=200)
+    mensaje = models.TextField()
+    remitente = models.CharField(max_length=200)
+    destinatarios = models.JSONField(default=list)
+    # El cuerpo lleva un secreto (código de recuperación): no se muestra en el
+    # admin y se borra en cuanto el correo se envía o falla definitivamente
+    sensible = models.BooleanField(default=False)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True)
+    # Momento a partir del cual puede (re)intentarse; también sirve de reserva
+    # mientras un proceso de envío tiene el correo tomado
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        verbose_name = 'Correo Saliente'
+        verbose_name_plural = 'Correos Salientes'
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} ({self.estado})"
+
+
+# ==================== Archivo de temporadas ====================
+# Las temporadas cerradas se mueven a tablas *_archivo (ver archivo.py). Las
+# vistas SQL *_historico unen la tabla caliente y el archivo con UNION ALL y
+# solo se consultan cuando el rango pedido alcanza un año archivado.
+
+class TemporadaArchivada(models.Model):
+    """Año cuyos enfundes, cosechas y recuperaciones están en el archivo"""
+    año = models.IntegerField(primary_key=True)
+    enfundes = models.IntegerField(default=0)
+    cosechas = models.IntegerField(default=0)
+    recuperaciones = models.IntegerField(default=0)
+    fecha_archivo = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-año']
+        verbose_name = 'Temporada Archivada'
+        verbose_name_plural = 'Temporadas Archivadas'
+
+    def __str__(self):
+        return f"Temporada {self.año}"
+
+
+class EnfundeArchivo(EnfundeBase):
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='+')
+
+    class Meta(EnfundeBase.Meta):
+        db_table = 'bananera_enfunde_archivo'
+        indexes = [models.Index(fields=['año', 'finca'], name='enfunde_arch_anio_idx')]
+
+
+class CosechaArchivo(CosechaBase):
+    finca = models.ForeignKey(Finca, on_delete=models.CASCADE, related_name='+')
+
+    class Meta(CosechaBase.Meta):
+        db_table = 'bananera_cosecha_archivo'
+        indexes = [models.Index(fields=['año', 'finca'], name='cosecha_arch_anio_idx')]
+
+
+class RecuperacionCintaArchivo(RecuperacionCintaBase):
+    enfunde = models.ForeignKey(EnfundeArchivo, on_delete=models.CASCADE, related_name='+')
+
+    class Meta(RecuperacionCintaBase.Meta):
+        db_table = 'bananera_recuperacioncinta_archivo'
+
+
+class EnfundeHistorico(EnfundeBase):
+    """Solo lectura: vista caliente + archivo"""
+    finca = models.ForeignKey(Finca, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+
+    class Meta(EnfundeBase.Meta):
+        managed = False
+        db_table = 'bananera_enfunde_historico'
+
+
+class CosechaHistorico(CosechaBase):
+    """Solo lectura: vista caliente + archivo"""
+    finca = models.ForeignKey(Finca, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False)
+
+    class Meta(CosechaBase.Meta):
+        managed = False
+        db_table = 'bananera_cosecha_historico'
+
+
+class RecuperacionCintaHistorico(RecuperacionCintaBase):
+    """Solo lectura: vista caliente + archivo"""
+    enfunde = models.ForeignKey(
+        EnfundeHistorico, on_delete=models.DO_NOTHING, related_name='+', db_constraint=False
+    )
+
+    class Meta(RecuperacionCintaBase.Meta):
+        managed = False
+        db_table = 'bananera_recuperacioncinta_historico'
@@ -0,0 +1,123 @@
+"""
+Pronóstico de reabastecimiento de insumos
+
+Calcula en una sola pasada de NumPy el consumo diario medio y su variabilidad
+para todos los insumos a partir de las salidas de inventario, y deriva el
+punto de reorden dinámico, los días de cobertura y la cantidad a pedir.
+"""
+
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import Insumo, MovimientoInventario
+from .versiones import invalidar_datos
+
+DIAS_HISTORIAL = 90
+DIAS_ENTREGA = 7
+MAX_DIAS_HISTORIAL = 730
+MAX_DIAS_ENTREGA = 365
+
+
+def factor_servicio(nivel):
+    """Factor z de la distribución normal para el nivel de servicio (0.95 -> 1.645)"""
+    return NormalDist().inv_cdf(nivel)
+
+
+def validar_parametros(dias_historial, dias_entrega, nivel_servicio):
+    """ValueError si algún parámetro está fuera de rango (con días negativos la raíz da NaN)"""
+    if not 1 <= dias_historial <= MAX_DIAS_HISTORIAL:
+        raise ValueError(f'historial debe estar entre 1 y {MAX_DIAS_HISTORIAL} días')
+    if not 1 <= dias_entrega <= MAX_DIAS_ENTREGA:
+        raise ValueError(f'dias_entrega debe estar entre 1 y {MAX_DIAS_ENTREGA} días')
+    if not 0 < nivel_servicio < 1:
+        raise ValueError('nivel_servicio debe estar entre 0 y 1')
+
+
+def pronosticar(insumos=None, dias_historial=DIAS_HISTORIAL, dias_entrega=DIAS_ENTREGA,
+                nivel_servicio=0.95, hoy=None):
+    """
+    Devuelve una lista de dicts por insumo con consumo diario, desviación,
+    punto de reorden, días de cobertura y cantidad sugerida.
+    """
+    hoy = hoy or timezone.localdate()
+    dias_historial = max(dias_historial, 2)
+    inicio = hoy - timedelta(days=dias_historial - 1)
+    base = insumos if insumos is not None else Insumo.objects.all()
+    insumos = list(
+        base.values('id', 'nombre', 'finca_id', 'unidad_medida', 'stock_actual',
+                    'stock_minimo', 'stock_maximo', 'precio_unitario', 'pedido_generado')
+    )
+    if not insumos:
+        return []
+
+    indice = {insumo['id']: i for i, insumo in enumerate(insumos)}
+    salidas = MovimientoInventario.objects.filter(tipo='salida', fecha__range=(inicio, hoy))
+    if base.query.where:
+        salidas = salidas.filter(insumo__in=base.values('id'))
+    salidas = [
+        fila for fila in salidas.values_list('insumo_id', 'fecha').annotate(total=Sum('cantidad')).order_by()
+        if fila[0] in indice
+    ]
+
+    # Matriz insumos x días con el consumo diario (ceros donde no hubo salidas)
+    consumo = np.zeros((len(insumos), dias_historial))
+    if salidas:
+        filas, fechas, totales = zip(*salidas)
+        consumo_filas = np.fromiter((indice[f] for f in filas), dtype=np.intp, count=len(filas))
+        consumo_dias = np.fromiter(((f - inicio).days for f in fechas), dtype=np.intp, count=len(fechas))
+        np.add.at(consumo, (consumo_filas, consumo_dias), np.asarray(totales, dtype=float))
+
+    media = consumo.mean(axis=1)
+    desviacion = consumo.std(axis=1, ddof=1)
+
+    stock = np.array([float(i['stock_actual']) for i in insumos])
+    minimo = np.array([float(i['stock_minimo']) for i in insumos])
+    maximo = np.array([float(i['stock_maximo']) for i in insumos])
+
+    punto_reorden = media * dias_entrega + factor_servicio(nivel_servicio) * desviacion * np.sqrt(dias_entrega)
+    umbral = np.maximum(punto_reorden, minimo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dias_cobertura = np.where(media > 0, stock / media, np.inf)
+    sugerida = np.ceil(np.maximum(maximo - stock, umbral + media * dias_entrega - stock)).clip(min=0)
+    requiere = stock <= umbral
+
+    return [
+        {
+            **insumo,
+            'stock_actual': float(stock[i]),
+            'stock_minimo': float(minimo[i]),
+            'stock_maximo': float(maximo[i]),
+            'precio_unitario': float(insumo['precio_unitario']),
+            'consumo_diario': round(float(media[i]), 3),
+            'desviacion_diaria': round(float(desviacion[i]), 3),
+            'punto_reorden': round(float(umbral[i]), 2),
+            'dias_cobertura': None if np.isinf(dias_cobertura[i]) else round(float(dias_cobertura[i]), 1),
+            'cantidad_sugerida': float(sugerida[i]),
+            'costo_estimado': round(float(sugerida[i]) * float(insumo['precio_unitario']), 2),
+            'requiere_reorden': bool(requiere[i]),
+        }
+        for i, insumo in enumerate(insumos)
+    ]
+
+
+def propuestas_reorden(insumos=None, **parametros):
+    """Insumos que alcanzaron su punto de reorden y aún no tienen pedido, los más urgentes primero"""
+    propuestas = [
+        p for p in pronosticar(insumos, **parametros)
+        if p['requiere_reorden'] and not p['pedido_generado']
+    ]
+    propuestas.sort(key=lambda p: p['dias_cobertura'] if p['dias_cobertura'] is not None else float('inf'))
+    return propuestas
+
+
+def generar_ordenes(insumos=None, **parametros):
+    """Marca con pedido generado todos los insumos que requieren reorden"""
+    propuestas = propuestas_reorden(insumos, **parametros)
+    if propuestas:
+        Insumo.objects.filter(id__in=[p['id'] for p in propuestas]).update(pedido_generado=True)
+        invalidar_datos()
+    return propuestas
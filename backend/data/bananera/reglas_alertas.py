@@ -0,0 +1,231 @@
+"""
+Motor de reglas de alertas del servidor
+
+Cada regla es una única consulta agregada sobre todas las fincas. La
+deduplicación se resuelve en la misma consulta mediante ``Alerta.clave``:
+no se repite una alerta abierta (no leída) ni una creada, leída o no, dentro
+de la ventana de la regla (``dias_ventana``). Solo llegan a Python las filas
+que producen alertas nuevas y se insertan con ``bulk_create``.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, Exists, F, Min, OuterRef, Q, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Concat, ExtractMonth, ExtractYear, Least
+from django.utils import timezone
+
+from .busqueda import indexar
+from .conteo_alertas import sumar_nuevas
+from .eventos import publicar_alertas
+from .models import Alerta, Insumo, Prestamo, RolPago
+from .versiones import invalidar_datos
+
+DIAS_AVISO_VENCIMIENTO = 30
+DIAS_VENCIMIENTO_URGENTE = 7
+DIAS_PAGO_ATRASADO = 7
+
+
+def _clave(prefijo, campo):
+    return Concat(Value(f'{prefijo}:'), Cast(campo, output_field=CharField()))
+
+
+class ReglaAlerta:
+    """Regla base: ``consulta`` devuelve filas con ``clave``, ``finca_id`` y ``prioridad``"""
+    nombre = ''
+    tipo = 'general'
+    campos = ()
+    # Días en los que una alerta ya creada (aunque se haya leído) no se repite
+    dias_ventana = 1
+
+    def consulta(self, hoy):
+        raise NotImplementedError
+
+    def titulo(self, fila):
+        raise NotImplementedError
+
+    def mensaje(self, fila):
+        raise NotImplementedError
+
+    def inicio_ventana(self, hoy):
+        dia = hoy - timedelta(days=self.dias_ventana - 1)
+        return timezone.make_aware(datetime.combine(dia, time.min))
+
+    def nuevas(self, hoy):
+        """Filas de la regla sin alerta abierta ni creada en la ventana con su clave"""
+        existentes = Alerta.objects.filter(
+            Q(leida=False) | Q(fecha_creacion__gte=self.inicio_ventana(hoy)),
+            clave=OuterRef('clave'),
+        )
+        return (
+            self.consulta(hoy)
+            .filter(~Exists(existentes))
+            .values('clave', 'finca_id', 'prioridad', *self.campos)
+        )
+
+
+class StockBajo(ReglaAlerta):
+    nombre = 'stock_bajo'
+    tipo = 'stock_bajo'
+    campos = ('nombre', 'stock_actual', 'stock_minimo', 'unidad_medida')
+
+    def consulta(self, hoy):
+        return Insumo.objects.filter(stock_actual__lt=F('stock_minimo')).annotate(
+            clave=_clave(self.nombre, 'id'),
+            prioridad=Case(
+                When(stock_actual__lt=F('stock_minimo') * 0.5, then=Value('critica')),
+                default=Value('alta'),
+            ),
+        )
+
+    def titulo(self, fila):
+        return f"Stock bajo: {fila['nombre']}"
+
+    def mensaje(self, fila):
+        return (
+            f"Quedan {fila['stock_actual']} {fila['unidad_medida']} de {fila['nombre']} "
+            f"(mínimo {fila['stock_minimo']}). Generar orden de compra."
+        )
+
+
+class InsumoPorVencer(ReglaAlerta):
+    nombre = 'vencimiento'
+    tipo = 'vencimiento'
+    campos = ('nombre', 'fecha_vencimiento', 'stock_actual')
+    # La clave lleva la fecha de vencimiento: un aviso por lote en todo el plazo
+    dias_ventana = DIAS_AVISO_VENCIMIENTO + 1
+
+    def consulta(self, hoy):
+        return Insumo.objects.filter(
+            fecha_vencimiento__range=(hoy, hoy + timedelta(days=DIAS_AVISO_VENCIMIENTO)),
+            stock_actual__gt=0,
+        ).annotate(
+            clave=Concat(
+                _clave(self.nombre, 'id'), Value(':'),
+                Cast('fecha_vencimiento', output_field=CharField()),
+            ),
+            prioridad=Case(
+                When(fecha_vencimiento__lte=hoy + timedelta(days=DIAS_VENCIMIENTO_URGENTE),
+                     then=Value('alta')),
+                default=Value('media'),
+            ),
+        )
+
+    def titulo(self, fila):
+        return f"Insumo por vencer: {fila['nombre']}"
+
+    def mensaje(self, fila):
+        return (
+            f"{fila['stock_actual']} unidades de {fila['nombre']} vencen el "
+            f"{fila['fecha_vencimiento']:%d/%m/%Y}. Priorizar su uso."
+        )
+
+
+class PrestamoVencido(ReglaAlerta):
+    """Préstamos aprobados con menos cuotas pagadas que meses transcurridos"""
+    nombre = 'prestamo_vencido'
+    tipo = 'prestamo_vencido'
+    dias_ventana = 30
+    campos = ('empleado__nombre', 'cuotas', 'cuotas_pagadas', 'cuotas_esperadas', 'monto', 'monto_pagado')
+
+    def consulta(self, hoy):
+        meses_transcurridos = (
+            Value(hoy.year * 12 + hoy.month)
+            - ExtractYear('fecha_aprobacion') * 12
+            - ExtractMonth('fecha_aprobacion')
+        )
+        return Prestamo.objects.filter(
+            estado='aprobado', fecha_aprobacion__isnull=False,
+        ).annotate(
+            cuotas_esperadas=Least(meses_transcurridos, F('cuotas')),
+        ).filter(
+            cuotas_pagadas__lt=F('cuotas_esperadas'),
+        ).annotate(
+            clave=_clave(self.nombre, 'id'),
+            finca_id=F('empleado__finca_id'),
+            prioridad=Case(
+                When(cuotas_esperadas__gt=F('cuotas_pagadas') + 1, then=Value('alta')),
+                default=Value('media'),
+            ),
+        )
+
+    def titulo(self, fila):
+        return f"Préstamo atrasado: {fila['empleado__nombre']}"
+
+    def mensaje(self, fila):
+        saldo = fila['monto'] - fila['monto_pagado']
+        return (
+            f"{fila['cuotas_pagadas']} de {fila['cuotas_esperadas']} cuotas esperadas "
+            f"pagadas ({fila['cuotas']} en total). Saldo pendiente: ${saldo:,.2f}."
+        )
+
+
+class RolesPagoPendientes(ReglaAlerta):
+    """Un aviso por finca con los roles pendientes cuya fecha de pago ya llegó"""
+    nombre = 'pago_pendiente'
+    tipo = 'pago_pendiente'
+    dias_ventana = DIAS_PAGO_ATRASADO
+    campos = ('finca_nombre', 'roles', 'total', 'mas_antiguo')
+
+    def consulta(self, hoy):
+        return (
+            RolPago.objects.filter(estado='pendiente', fecha_pago__lte=hoy)
+            .values('empleado__finca_id')
+            .annotate(
+                roles=Count('id'),
+                total=Sum('total_pagar'),
+                mas_antiguo=Min('fecha_pago'),
+            )
+            .annotate(
+                finca_id=F('empleado__finca_id'),
+                finca_nombre=F('empleado__finca__nombre'),
+                clave=_clave(self.nombre, 'empleado__finca_id'),
+                prioridad=Case(
+                    When(mas_antiguo__lt=hoy - timedelta(days=DIAS_PAGO_ATRASADO), then=Value('alta')),
+                    default=Value('media'),
+                ),
+            )
+        )
+
+    def titulo(self, fila):
+        return f"Roles de pago pendientes: {fila['finca_nombre']}"
+
+    def mensaje(self, fila):
+        return (
+            f"{fila['roles']} roles pendientes por ${fila['total']:,.2f}, "
+            f"el más antiguo con fecha de pago {fila['mas_antiguo']:%d/%m/%Y}."
+        )
+
+
+REGLAS = [StockBajo(), InsumoPorVencer(), PrestamoVencido(), RolesPagoPendientes()]
+
+
+def evaluar_reglas(reglas=None, hoy=None):
+    """Evalúa las reglas y crea solo las alertas nuevas. Devuelve {regla: creadas}"""
+    hoy = hoy or timezone.localdate()
+    resultado = {}
+
+    with transaction.atomic():
+        for regla in reglas or REGLAS:
+            alertas = [
+                Alerta(
+                    tipo=regla.tipo,
+                    prioridad=fila['prioridad'],
+                    titulo=regla.titulo(fila)[:200],
+                    mensaje=regla.mensaje(fila),
+                    finca_id=fila['finca_id'],
+                    clave=fila['clave'],
+                )
+                for fila in regla.nuevas(hoy)
+            ]
+            Alerta.objects.bulk_create(alertas, batch_size=500)
+            sumar_nuevas(alertas)
+            publicar_alertas(alertas)
+            indexar(*alertas)
+            resultado[regla.nombre] = len(alertas)
+
+    if any(resultado.values()):
+        invalidar_datos()
+    return resultado
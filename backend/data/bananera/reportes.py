@@ -0,0 +1,160 @@
+"""
+Consultas de reportes y tableros
+
+Cada función ejecuta una sola consulta independiente y devuelve datos ya
+materializados, de modo que las vistas síncronas las encadenan y las
+asíncronas pueden lanzarlas en paralelo. El parámetro ``finca`` lo resuelven
+las vistas con ``alcance.finca_de``. Las consultas de cosechas y enfundes
+leen también el archivo solo si el rango alcanza una temporada archivada.
+Las agrupaciones devuelven ``formatos.Tabla`` directamente desde
+``values_list()`` (JSON normal o columnar según lo que pida el cliente).
+"""
+
+from django.db.models import Avg, Count, F, Q, Sum
+
+from . import archivo
+from .formatos import Tabla
+from .models import Alerta, Cosecha, Enfunde, Insumo, RolPago
+
+
+# ==================== Producción ====================
+
+def cosechas_filtradas(fecha_inicio=None, fecha_fin=None, finca=None, año=None):
+    queryset = archivo.consulta(Cosecha, fecha_inicio, fecha_fin, año)
+    if fecha_inicio:
+        queryset = queryset.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        queryset = queryset.filter(fecha__lte=fecha_fin)
+    if finca:
+        queryset = queryset.filter(finca_id=finca)
+    if año:
+        queryset = queryset.filter(año=año)
+    return queryset
+
+
+def resumen_produccion(queryset):
+    return queryset.aggregate(
+        total_cajas=Sum('cajas_producidas'),
+        promedio_ratio=Avg('ratio'),
+        total_racimos=Sum('racimos_recuperados'),
+        total_cosechas=Count('id')
+    )
+
+
+def produccion_por_finca(queryset):
+    return Tabla.desde(queryset.values('finca__nombre').annotate(
+        cajas=Sum('cajas_producidas'),
+        ratio_promedio=Avg('ratio')
+    ), 'finca__nombre', 'cajas', 'ratio_promedio')
+
+
+def tendencias_cosecha(año, finca=None):
+    return Tabla.desde(cosechas_filtradas(finca=finca, año=año).values('semana').annotate(
+        total_cajas=Sum('cajas_producidas'),
+        promedio_ratio=Avg('ratio'),
+        total_racimos=Sum('racimos_recuperados')
+    ).order_by('semana'), 'semana', 'total_cajas', 'promedio_ratio', 'total_racimos')
+
+
+def comparativo_fincas(año, finca=None):
+    return Tabla.desde(cosechas_filtradas(finca=finca, año=año).values('finca__nombre').annotate(
+        total_cajas=Sum('cajas_producidas'),
+        promedio_ratio=Avg('ratio'),
+        cosechas_count=Count('id')
+    ).order_by('-total_cajas'), 'finca__nombre', 'total_cajas', 'promedio_ratio', 'cosechas_count')
+
+
+# ==================== Fincas ====================
+
+def cosechas_finca(finca_id):
+    return archivo.consulta(Cosecha).filter(finca_id=finca_id).aggregate(
+        total_cosechas=Count('id'),
+        total_cajas=Sum('cajas_producidas'),
+        promedio_ratio=Avg('ratio'),
+    )
+
+
+def enfundes_finca(finca_id):
+    return archivo.consulta(Enfunde).filter(finca_id=finca_id).aggregate(
+        total_enfundes=Sum('cantidad_enfundes'),
+    )
+
+
+def estadisticas_finca(cosechas, enfundes):
+    return {
+        'total_cosechas': cosechas['total_cosechas'],
+        'total_cajas': cosechas['total_cajas'] or 0,
+        'total_enfundes': enfundes['total_enfundes'] or 0,
+        'promedio_ratio': cosechas['promedio_ratio'] or 0,
+    }
+
+
+# ==================== Nómina ====================
+
+def roles_filtrados(mes=None, año=None, finca=None):
+    queryset = RolPago.objects.all()
+    if finca:
+        queryset = queryset.filter(empleado__finca_id=finca)
+    if mes:
+        queryset = queryset.filter(fecha_pago__month=mes)
+    if año:
+        queryset = queryset.filter(fecha_pago__year=año)
+    return queryset
+
+
+def resumen_nomina(queryset):
+    return queryset.aggregate(
+        total_pagado=Sum('total_pagar'),
+        total_roles=Count('id')
+    )
+
+
+def nomina_por_finca(queryset):
+    return Tabla.desde(queryset.values('empleado__finca__nombre').annotate(
+        total=Sum('total_pagar'),
+        empleados=Count('empleado', distinct=True)
+    ), 'empleado__finca__nombre', 'total', 'empleados')
+
+
+# ==================== Inventario ====================
+
+def insumos_filtrados(finca=None):
+    queryset = Insumo.objects.all()
+    if finca:
+        queryset = queryset.filter(finca_id=finca)
+    return queryset
+
+
+def resumen_inventario(queryset):
+    resumen = queryset.aggregate(
+        total_insumos=Count('id'),
+        stock_total=Sum('stock_actual'),
+    )
+    return {
+        'total_insumos': resumen['total_insumos'],
+        'valor_total': (resumen['stock_total'] or 0) * 10,  # Precio estimado
+    }
+
+
+def insumos_stock_bajo(queryset):
+    return queryset.filter(stock_actual__lt=F('stock_minimo')).count()
+
+
+def inventario_por_categoria(queryset):
+    return Tabla.desde(queryset.values('categoria').annotate(
+        cantidad=Count('id'),
+        stock_total=Sum('stock_actual')
+    ), 'categoria', 'cantidad', 'stock_total')
+
+
+# ==================== Alertas ====================
+
+def alertas_pendientes(finca=None):
+    queryset = Alerta.objects.filter(leida=False)
+    if finca:
+        # Las alertas generales (sin finca) las ven todos
+        queryset = queryset.filter(Q(finca_id=finca) | Q(finca__isnull=True))
+    return queryset.aggregate(
+        total=Count('id'),
+        criticas=Count('id', filter=Q(prioridad__in=['critica', 'alta'])),
+    )
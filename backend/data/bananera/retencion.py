@@ -0,0 +1,114 @@
+"""
+Políticas de retención y purga por lotes
+
+Cada política indica el modelo, el campo de fecha, los días que se conservan
+(``dias``; ``RETENCION_DIAS`` en settings solo los sustituye) y el filtro de
+los registros purgables. La purga recorre la clave primaria en orden y borra
+por lotes de ``--lote`` filas, cada uno en su propia transacción corta con un
+``DELETE ... WHERE pk IN (...)`` explícito (sin cargar objetos ni emitir
+señales por fila), de modo que en SQLite el bloqueo de escritura se libera
+entre lotes.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .busqueda import INDICES, limpiar_huerfanos
+from .models import Alerta, CorreoSaliente, EventoCambio, PasswordResetCode
+from .versiones import invalidar_datos
+
+TAMAÑO_LOTE = 500
+PAUSA_ENTRE_LOTES = 0.05
+
+POLITICAS = {
+    'codigos_reset': {
+        'modelo': PasswordResetCode,
+        'campo_fecha': 'fecha_expiracion',
+        'filtro': Q(),
+        'dias': 1,
+    },
+    'alertas_leidas': {
+        'modelo': Alerta,
+        'campo_fecha': 'fecha_creacion',
+        'filtro': Q(leida=True),
+        'dias': 90,
+    },
+    'correos_enviados': {
+        'modelo': CorreoSaliente,
+        'campo_fecha': 'fecha_envio',
+        'filtro': Q(estado='enviado'),
+        'dias': 30,
+    },
+    'correos_fallidos': {
+        'modelo': CorreoSaliente,
+        'campo_fecha': 'fecha_creacion',
+        'filtro': Q(estado='fallido'),
+        'dias': 90,
+    },
+    'eventos': {
+        'modelo': EventoCambio,
+        'campo_fecha': 'fecha',
+        'filtro': Q(),
+        'dias': 1,
+    },
+}
+
+
+def purgables(nombre, ahora=None):
+    politica = POLITICAS[nombre]
+    dias = getattr(settings, 'RETENCION_DIAS', {}).get(nombre, politica['dias'])
+    limite = (ahora or timezone.now()) - timedelta(days=dias)
+    return politica['modelo']._base_manager.filter(
+        politica['filtro'], **{f"{politica['campo_fecha']}__lt": limite}
+    )
+
+
+def _borrar(modelo, base, claves):
+    """DELETE por clave primaria; devuelve las filas borradas"""
+    conexion = connections[base]
+    tabla = conexion.ops.quote_name(modelo._meta.db_table)
+    columna = conexion.ops.quote_name(modelo._meta.pk.column)
+    marcas = ', '.join(['%s'] * len(claves))
+    valores = [modelo._meta.pk.get_db_prep_value(clave, conexion) for clave in claves]
+    with conexion.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE {columna} IN ({marcas})', valores)
+        return cursor.rowcount
+
+
+def purgar(nombre, lote=TAMAÑO_LOTE, pausa=PAUSA_ENTRE_LOTES, simular=False):
+    """Borra los registros vencidos de la política; devuelve cuántos y en cuántos lotes"""
+    queryset = purgables(nombre)
+    if simular:
+        return {'borrados': queryset.count(), 'lotes': 0}
+
+    base = router.db_for_write(queryset.model)
+    borrados = lotes = 0
+    ultimo = None
+    while True:
+        siguientes = queryset.order_by('pk')
+        if ultimo is not None:
+            siguientes = siguientes.filter(pk__gt=ultimo)
+        with transaction.atomic(using=base):
+            # Bloqueadas hasta el DELETE: no se borra una fila que dejó de ser purgable
+            claves = list(siguientes.select_for_update().values_list('pk', flat=True)[:lote])
+            if not claves:
+                break
+            # Sin señales por fila: la versión de datos se invalida una vez al final
+            borrados += _borrar(queryset.model, base, claves)
+        ultimo = claves[-1]
+        lotes += 1
+        if len(claves) < lote:
+            break
+        time.sleep(pausa)
+
+    if borrados:
+        if queryset.model in INDICES:
+            # Sin post_delete: el índice de búsqueda se limpia de una vez
+            limpiar_huerfanos(queryset.model)
+        invalidar_datos()
+    return {'borrados': borrados, 'lotes': lotes}
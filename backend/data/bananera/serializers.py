@@ -5,8 +5,9 @@ Serializadores para la API REST de Bananera
 from rest_framework import serializers
 from .models import (
     Finca, Usuario, Enfunde, Cosecha, RecuperacionCinta,
-    Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta
+    Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta, GeometriaFinca
 )
+from . import geo
 
 
 class FincaSerializer(serializers.ModelSerializer):
@@ -16,6 +17,29 @@ class FincaSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class GeometriaFincaSerializer(serializers.ModelSerializer):
+    """Serializador para el contorno y los lotes GeoJSON de una finca"""
+    class Meta:
+        model = GeometriaFinca
+        fields = ['finca', 'contorno', 'lotes', 'fecha_actualizacion']
+        read_only_fields = ['finca']
+
+    def validate_contorno(self, value):
+        if value is not None:
+            try:
+                geo.validar(value)
+            except ValueError as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
+    def validate_lotes(self, value):
+        try:
+            geo.validar_lotes(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
+
 class UsuarioSerializer(serializers.ModelSerializer):
     """Serializador para Usuario"""
     finca_nombre = serializers.CharField(source='finca_asignada.nombre', read_only=True, allow_null=True)
@@ -153,7 +177,7 @@ class InsumoSerializer(serializers.ModelSerializer):
         ]
     
     def get_stock_status(self, obj):
-        if obj.stock_actual < obj.stock_minimo * 0.5:
+        if obj.stock_actual * 2 < obj.stock_minimo:
             return 'critico'
         elif obj.stock_actual < obj.stock_minimo:
             return 'bajo'
@@ -0,0 +1,126 @@
+"""
+Señales de la app Bananera
+"""
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from . import busqueda, conteo_alertas, eventos, geo
+from .autenticacion import invalidar_usuario
+from .conexiones import configurar_sqlite
+from .models import (
+    Usuario, Finca, Enfunde, Cosecha, RecuperacionCinta,
+    Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta, GeometriaFinca
+)
+from .versiones import invalidar_datos
+
+MODELOS_VERSIONADOS = [
+    Finca, Enfunde, Cosecha, RecuperacionCinta,
+    Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta,
+]
+
+
+def datos_modificados(sender, **kwargs):
+    invalidar_datos()
+
+
+for modelo in MODELOS_VERSIONADOS:
+    post_save.connect(datos_modificados, sender=modelo, dispatch_uid=f'version_{modelo.__name__}_save')
+    post_delete.connect(datos_modificados, sender=modelo, dispatch_uid=f'version_{modelo.__name__}_delete')
+
+
+def usuario_modificado(sender, instance, **kwargs):
+    invalidar_usuario(instance.pk)
+
+
+def finca_modificada(sender, instance, **kwargs):
+    # Los usuarios cacheados llevan su finca asignada precargada
+    for usuario_id in Usuario.objects.filter(finca_asignada=instance).values_list('id', flat=True):
+        invalidar_usuario(usuario_id)
+
+
+post_save.connect(usuario_modificado, sender=Usuario, dispatch_uid='usuario_cache_save')
+post_delete.connect(usuario_modificado, sender=Usuario, dispatch_uid='usuario_cache_delete')
+post_save.connect(finca_modificada, sender=Finca, dispatch_uid='usuario_cache_finca_save')
+# pre_delete: después del borrado los usuarios ya tienen finca_asignada = NULL
+pre_delete.connect(finca_modificada, sender=Finca, dispatch_uid='usuario_cache_finca_delete')
+
+def alerta_por_guardar(sender, instance, **kwargs):
+    instance._conteo_anterior = None
+    if not instance._state.adding:
+        instance._conteo_anterior = (
+            Alerta.objects.filter(pk=instance.pk).values_list('finca_id', 'prioridad', 'leida').first()
+        )
+
+
+def alerta_guardada(sender, instance, **kwargs):
+    anterior = getattr(instance, '_conteo_anterior', None)
+    if anterior == (instance.finca_id, instance.prioridad, instance.leida):
+        return
+    if anterior and not anterior[2]:
+        conteo_alertas.ajustar(anterior[0], anterior[1], -1)
+    if not instance.leida:
+        conteo_alertas.ajustar(instance.finca_id, instance.prioridad, 1)
+
+
+def alerta_creada(sender, instance, created, **kwargs):
+    if created:
+        eventos.publicar_alertas([instance])
+
+
+def cosecha_creada(sender, instance, created, **kwargs):
+    if created:
+        eventos.publicar_registro('cosecha', instance, lote=instance.lote, cajas_producidas=instance.cajas_producidas)
+
+
+def enfunde_creado(sender, instance, created, **kwargs):
+    if created:
+        eventos.publicar_registro(
+            'enfunde', instance, color_cinta=instance.color_cinta, cantidad_enfundes=instance.cantidad_enfundes
+        )
+
+
+def alerta_eliminada(sender, instance, **kwargs):
+    if not instance.leida:
+        conteo_alertas.ajustar(instance.finca_id, instance.prioridad, -1)
+
+
+pre_save.connect(alerta_por_guardar, sender=Alerta, dispatch_uid='conteo_alerta_pre_save')
+post_save.connect(alerta_guardada, sender=Alerta, dispatch_uid='conteo_alerta_save')
+post_delete.connect(alerta_eliminada, sender=Alerta, dispatch_uid='conteo_alerta_delete')
+post_save.connect(alerta_creada, sender=Alerta, dispatch_uid='evento_alerta')
+post_save.connect(cosecha_creada, sender=Cosecha, dispatch_uid='evento_cosecha')
+post_save.connect(enfunde_creado, sender=Enfunde, dispatch_uid='evento_enfunde')
+
+
+def indexar_busqueda(sender, instance, update_fields=None, **kwargs):
+    # Guardados parciales que no tocan los campos buscables (p. ej. last_login)
+    if update_fields and not set(update_fields) & set(busqueda.INDICES[sender]):
+        return
+    busqueda.indexar(instance)
+
+
+def desindexar_busqueda(sender, instance, **kwargs):
+    busqueda.desindexar(instance)
+
+
+for modelo in busqueda.INDICES:
+    post_save.connect(indexar_busqueda, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_save')
+    post_delete.connect(desindexar_busqueda, sender=modelo, dispatch_uid=f'busqueda_{modelo.__name__}_delete')
+
+
+def geometria_por_guardar(sender, instance, **kwargs):
+    instance.simplificada = geo.niveles(instance.contorno, instance.lotes)
+
+
+def geometrias_modificadas(sender, **kwargs):
+    # El R-tree de cada proceso guarda también el nombre de la finca
+    geo.invalidar_geometrias()
+
+
+pre_save.connect(geometria_por_guardar, sender=GeometriaFinca, dispatch_uid='geometria_simplificar')
+post_save.connect(geometrias_modificadas, sender=GeometriaFinca, dispatch_uid='geometria_save')
+post_delete.connect(geometrias_modificadas, sender=GeometriaFinca, dispatch_uid='geometria_delete')
+post_save.connect(geometrias_modificadas, sender=Finca, dispatch_uid='geometria_finca_save')
+
+connection_created.connect(configurar_sqlite, dispatch_uid='configurar_sqlite')
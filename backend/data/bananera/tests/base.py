@@ -0,0 +1,31 @@
+"""
+Base común de las pruebas
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+
+# Caché en memoria: las pruebas no tocan la caché de archivos del proyecto
+CACHE_LOCAL = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class PruebaBase(TestCase):
+    """TestCase con la caché en memoria, vacía al empezar cada clase de pruebas"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cache.clear()
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class PruebaTransaccionalBase(TransactionTestCase):
+    """
+    Para código que consulta desde otros hilos (``sync_to_async`` con
+    ``thread_sensitive=False``): sus conexiones solo ven datos confirmados
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
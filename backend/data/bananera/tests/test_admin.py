@@ -0,0 +1,74 @@
+"""
+Pruebas del admin de tablas grandes
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.messages import get_messages
+
+from bananera import admin
+from bananera.models import Empleado, Enfunde, Finca, RolPago, Usuario
+from bananera.tests.base import PruebaBase
+from bananera.versiones import version_datos
+
+
+class PaginadorEstimadoTests(PruebaBase):
+    def setUp(self):
+        finca = Finca.objects.create(nombre='Finca A')
+        for semana in range(1, 6):
+            Enfunde.objects.create(finca=finca, fecha=date(2026, 1, semana), semana=semana, año=2026,
+                                   color_cinta='verde', cantidad_enfundes=10)
+
+    @mock.patch.object(admin, 'UMBRAL_CONTEO_EXACTO', 3)
+    @mock.patch.object(admin, 'conteo_estimado', return_value=1000)
+    def test_solo_estima_sin_filtros(self, estimado):
+        self.assertEqual(admin.PaginadorEstimado(Enfunde.objects.all(), 100).count, 1000)
+        # Con filtros, el total exacto aunque pase del umbral
+        self.assertEqual(admin.PaginadorEstimado(Enfunde.objects.filter(año=2026), 100).count, 5)
+        self.assertEqual(admin.PaginadorEstimado(Enfunde.objects.filter(semana__lte=2), 100).count, 2)
+        estimado.assert_called_once()
+
+
+class AccionesTests(PruebaBase):
+    def setUp(self):
+        self.finca = Finca.objects.create(nombre='Finca A')
+        empleado = Empleado.objects.create(finca=self.finca, nombre='Ana', cedula='0100000001',
+                                           cargo='cortador', fecha_ingreso=date(2024, 1, 1))
+        self.roles = [
+            RolPago.objects.create(empleado=empleado, fecha_pago=date(2026, mes, 28), periodo_inicio=date(2026, mes, 1),
+                                   periodo_fin=date(2026, mes, 28), salario_base=Decimal('450.00'),
+                                   total_pagar=Decimal('480.50'), estado=estado)
+            for mes, estado in ((1, 'pagado'), (2, 'pendiente'), (3, 'pendiente'))
+        ]
+        self.client.force_login(Usuario.objects.create_superuser('admin@a.com', 'Admin', 'x'))
+
+    def accion(self, modelo, accion, objetos):
+        return self.client.post(f'/admin/bananera/{modelo}/', {
+            'action': accion, '_selected_action': [str(o.pk) for o in objetos],
+        })
+
+    def test_exportar_csv(self):
+        for semana in (1, 2):
+            Enfunde.objects.create(finca=self.finca, fecha=date(2026, 1, semana * 7), semana=semana, año=2026,
+                                   color_cinta='verde', cantidad_enfundes=100 * semana)
+        response = self.accion('enfunde', 'exportar_csv', Enfunde.objects.all())
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="enfunde.csv"')
+        filas = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(filas[0], admin.EnfundeAdmin.campos_csv)
+        self.assertEqual(sorted(fila[5] for fila in filas[1:]), ['100', '200'])
+        self.assertEqual({fila[3] for fila in filas[1:]}, {'Finca A'})
+
+    def test_acciones_informan_las_filas_actualizadas(self):
+        version = version_datos()
+        response = self.accion('rolpago', 'marcar_pagado', self.roles)
+
+        self.assertEqual([str(m) for m in get_messages(response.wsgi_request)], ['3 roles marcados como pagados'])
+        self.assertEqual(RolPago.objects.filter(estado='pagado').count(), 3)
+        # update() no emite señales: la acción invalida las cachés derivadas
+        self.assertNotEqual(version_datos(), version)
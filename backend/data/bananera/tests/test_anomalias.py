@@ -0,0 +1,41 @@
+"""
+Pruebas de la lectura incremental de la detección de anomalías
+"""
+
+from datetime import date
+
+from bananera import anomalias
+from bananera.models import Cosecha, EstadisticaProduccion, Finca
+from bananera.tests.base import PruebaBase
+
+
+def semana(finca, año, numero):
+    fecha = date.fromisocalendar(año, numero, 1)
+    Cosecha.objects.create(finca=finca, fecha=fecha, semana=numero, año=año, lote='A', cajas_producidas=500)
+
+
+class SemanasNuevasTests(PruebaBase):
+    def setUp(self):
+        self.finca_a = Finca.objects.create(nombre='Finca A')
+        for año, numero in ((2024, 50), (2024, 51), (2025, 1), (2025, 2), (2025, 3)):
+            semana(self.finca_a, año, numero)
+
+    def leidas(self):
+        estadisticas = {(e.finca_id, e.metrica): e for e in EstadisticaProduccion.objects.all()}
+        modelo, agregado, _, _ = anomalias.METRICAS['cajas_producidas']
+        filas = anomalias._semanas_nuevas('cajas_producidas', modelo, agregado, estadisticas, (2025, 10))
+        return {(f['finca_id'], f['año'], f['semana']) for f in filas}
+
+    def test_solo_lee_despues_de_la_marca_de_cada_finca(self):
+        anomalias.detectar_anomalias(date(2025, 1, 15))  # procesa hasta 2025-S02
+        semana(self.finca_a, 2025, 4)
+        finca_b = Finca.objects.create(nombre='Finca B')
+        semana(finca_b, 2024, 30)
+
+        # La finca nueva se lee completa; la otra, solo desde su marca
+        self.assertEqual(self.leidas(), {
+            (self.finca_a.pk, 2025, 3), (self.finca_a.pk, 2025, 4), (finca_b.pk, 2024, 30),
+        })
+        # Tres semanas por cada métrica de Cosecha (cajas y ratio)
+        self.assertEqual(anomalias.detectar_anomalias(date(2025, 3, 3))['semanas_procesadas'], 6)
+        self.assertEqual(self.leidas(), set())
@@ -0,0 +1,42 @@
+"""
+Pruebas del comando archivar_temporada
+"""
+
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from bananera.models import Cosecha, CosechaArchivo, Enfunde, Finca
+from bananera.tests.base import PruebaBase
+
+
+class ArchivarTemporadaTests(PruebaBase):
+    def setUp(self):
+        finca = Finca.objects.create(nombre='Finca A')
+        for año in (2022, 2023):
+            Cosecha.objects.create(finca=finca, fecha=date(año, 5, 2), semana=18, año=año,
+                                   lote='A', cajas_producidas=100)
+            Enfunde.objects.create(finca=finca, fecha=date(año, 5, 2), semana=18, año=año,
+                                   color_cinta='azul', cantidad_enfundes=50)
+
+    def comando(self, *args):
+        call_command('archivar_temporada', *args, stdout=StringIO())
+
+    def test_restaurar_hasta_usa_las_tablas_de_archivo(self):
+        self.comando('--hasta', '2023')
+        self.assertFalse(Cosecha.objects.exists())
+        self.assertEqual(CosechaArchivo.objects.count(), 2)
+
+        self.comando('--hasta', '2022', '--restaurar')
+        self.assertEqual(list(Cosecha.objects.values_list('año', flat=True)), [2022])
+        self.assertEqual(list(CosechaArchivo.objects.values_list('año', flat=True)), [2023])
+
+    def test_sin_coincidencias_falla(self):
+        with self.assertRaisesMessage(CommandError, 'No hay temporadas archivadas'):
+            self.comando('--hasta', '2023', '--restaurar')
+        with self.assertRaisesMessage(CommandError, 'No hay temporadas con datos'):
+            self.comando('--hasta', '2020')
+        with self.assertRaisesMessage(CommandError, 'no está archivada'):
+            self.comando('2022', '--restaurar')
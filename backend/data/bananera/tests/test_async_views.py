@@ -0,0 +1,62 @@
+"""
+Pruebas de las vistas asíncronas: mismas respuestas que las vistas DRF equivalentes
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera.models import Cosecha, Empleado, Finca, Insumo, RolPago, Usuario
+from bananera.tests.base import PruebaTransaccionalBase
+
+# Vista asíncrona -> vista DRF
+EQUIVALENTES = {
+    '/api/async/reportes/produccion/': '/api/reportes/produccion/',
+    '/api/async/reportes/nomina/?año=2026': '/api/reportes/nomina/?año=2026',
+    '/api/async/reportes/inventario/': '/api/reportes/inventario/',
+    '/api/async/cosechas/tendencias/?año=2026': '/api/cosechas/tendencias/?año=2026',
+    '/api/async/cosechas/comparativo/?año=2026': '/api/cosechas/comparativo/?año=2026',
+}
+
+
+class ParidadTests(PruebaTransaccionalBase):
+    def setUp(self):
+        super().setUp()
+        self.finca_a = Finca.objects.create(nombre='Finca A')
+        finca_b = Finca.objects.create(nombre='Finca B')
+        for i, finca in enumerate((self.finca_a, self.finca_a, finca_b)):
+            Cosecha.objects.create(finca=finca, fecha=date(2026, 3, 2 + i * 7), semana=10 + i, año=2026,
+                                   lote='A', cajas_producidas=400 + i * 50, ratio=Decimal('1.20'))
+            empleado = Empleado.objects.create(finca=finca, nombre=f'Empleado {i}', cedula=f'0100{i}',
+                                               cargo='cortador', fecha_ingreso=date(2024, 1, 1))
+            RolPago.objects.create(empleado=empleado, fecha_pago=date(2026, 3, 31), periodo_inicio=date(2026, 3, 1),
+                                   periodo_fin=date(2026, 3, 31), salario_base=Decimal('450.00'),
+                                   total_pagar=Decimal('480.50'))
+            Insumo.objects.create(finca=finca, nombre=f'Urea {i}', categoria='fertilizante',
+                                  stock_actual=5 + i * 20, precio_unitario=Decimal('12.40'))
+        self.admin = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador')
+        self.supervisor = Usuario.objects.create_user('sup@a.com', 'Sup', 'x', rol='supervisor_finca',
+                                                      finca_asignada=self.finca_a)
+
+    def comparar(self, usuario, asincrona, sincrona):
+        cabecera = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(usuario)}'}
+        esperada = self.client.get(sincrona, **cabecera)
+        obtenida = self.client.get(asincrona, **cabecera)
+        self.assertEqual(esperada.status_code, 200)
+        self.assertEqual(obtenida.status_code, 200)
+        self.assertTrue(esperada.json())
+        self.assertEqual(obtenida.json(), esperada.json())
+
+    def test_reportes_y_tableros(self):
+        for usuario in (self.admin, self.supervisor):
+            for asincrona, sincrona in EQUIVALENTES.items():
+                with self.subTest(usuario=usuario.rol, vista=asincrona):
+                    self.comparar(usuario, asincrona, sincrona)
+
+    def test_estadisticas_de_finca(self):
+        self.comparar(self.supervisor, f'/api/async/fincas/{self.finca_a.pk}/estadisticas/',
+                      f'/api/fincas/{self.finca_a.pk}/estadisticas/')
+
+    def test_requiere_jwt(self):
+        self.assertEqual(self.client.get('/api/async/reportes/produccion/').status_code, 401)
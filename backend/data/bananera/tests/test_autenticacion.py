@@ -0,0 +1,54 @@
+"""
+Pruebas del usuario cacheado de la autenticación JWT
+"""
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera import autenticacion
+from bananera.models import Finca, Usuario
+from bananera.tests.base import PruebaBase
+
+
+class UsuarioCacheadoTests(PruebaBase):
+    def setUp(self):
+        autenticacion._local.clear()
+        self.finca = Finca.objects.create(nombre='Finca A')
+        self.usuario = Usuario.objects.create_user('sup@a.com', 'Sup', 'x', rol='supervisor_finca',
+                                                   finca_asignada=self.finca)
+
+    def test_segunda_lectura_sin_consultas(self):
+        autenticacion.obtener_usuario(self.usuario.pk)
+        with self.assertNumQueries(0):
+            usuario = autenticacion.obtener_usuario(self.usuario.pk)
+            self.assertEqual(usuario.finca_asignada.nombre, 'Finca A')
+        # Tampoco con el LRU del proceso vacío: queda la caché compartida
+        autenticacion._local.clear()
+        with self.assertNumQueries(0):
+            autenticacion.obtener_usuario(self.usuario.pk)
+
+    def test_guardar_invalida(self):
+        autenticacion.obtener_usuario(self.usuario.pk)
+        self.usuario.rol = 'gerente'
+        self.usuario.save()
+        self.assertEqual(autenticacion.obtener_usuario(self.usuario.pk).rol, 'gerente')
+
+    def test_eliminar_invalida(self):
+        usuario_id = self.usuario.pk
+        autenticacion.obtener_usuario(usuario_id)
+        self.usuario.delete()
+        self.assertIsNone(autenticacion.obtener_usuario(usuario_id))
+
+    def test_cambios_de_la_finca_asignada(self):
+        autenticacion.obtener_usuario(self.usuario.pk)
+        self.finca.nombre = 'Finca Norte'
+        self.finca.save()
+        self.assertEqual(autenticacion.obtener_usuario(self.usuario.pk).finca_asignada.nombre, 'Finca Norte')
+        self.finca.delete()
+        self.assertIsNone(autenticacion.obtener_usuario(self.usuario.pk).finca_asignada)
+
+    def test_usuario_desactivado_pierde_el_acceso(self):
+        cabecera = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.usuario)}'}
+        self.assertEqual(self.client.get('/api/enfundes/', **cabecera).status_code, 200)
+        self.usuario.activo = False
+        self.usuario.save()
+        self.assertEqual(self.client.get('/api/enfundes/', **cabecera).status_code, 401)
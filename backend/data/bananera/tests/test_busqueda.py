@@ -0,0 +1,45 @@
+"""
+Pruebas de la búsqueda FTS5: el alcance y los filtros se aplican antes que cualquier tope
+"""
+
+from datetime import date
+
+from rest_framework.test import APIClient
+
+from bananera.models import Empleado, Finca, Usuario
+from bananera.tests.base import PruebaBase
+
+
+class BusquedaEmpleadosTests(PruebaBase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.finca_a = Finca.objects.create(nombre='Finca A')
+        finca_b = Finca.objects.create(nombre='Finca B')
+        # Más coincidencias en otra finca que el antiguo tope de 500
+        for i in range(601):
+            Empleado.objects.create(finca=finca_b, nombre=f'Pedro Pérez {i}', cedula=f'09{i:08d}',
+                                    cargo='jornalero', fecha_ingreso=date(2024, 1, 1))
+        Empleado.objects.create(finca=cls.finca_a, nombre='Lucía Núñez Pérez', cedula='0100000001',
+                                cargo='cortador', fecha_ingreso=date(2024, 1, 1))
+        cls.supervisor = Usuario.objects.create_user(
+            'sup@a.com', 'Supervisor A', 'clave', rol='supervisor_finca', finca_asignada=cls.finca_a,
+        )
+        cls.gerente = Usuario.objects.create_user('gerente@a.com', 'Gerente', 'clave', rol='gerente')
+
+    def buscar(self, usuario, **parametros):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        response = cliente.get('/api/empleados/', parametros)
+        self.assertEqual(response.status_code, 200)
+        return [e['nombre'] for e in response.json()]
+
+    def test_supervisor_encuentra_los_de_su_finca(self):
+        self.assertEqual(self.buscar(self.supervisor, search='perez'), ['Lucía Núñez Pérez'])
+
+    def test_sin_truncar_resultados(self):
+        self.assertEqual(len(self.buscar(self.gerente, search='perez')), 602)
+
+    def test_filtros_antes_de_buscar(self):
+        self.assertEqual(self.buscar(self.gerente, search='nunez', finca=str(self.finca_a.pk)),
+                         ['Lucía Núñez Pérez'])
+        self.assertEqual(self.buscar(self.gerente, search='pedro', cargo='cortador'), [])
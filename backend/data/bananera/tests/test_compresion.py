@@ -0,0 +1,140 @@
+"""
+Pruebas de la compresión, la caché de respuestas (@respuesta_cacheada) y los ETag
+"""
+
+import gzip
+from datetime import date
+from unittest import mock
+
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from bananera import compresion, enrutador
+from bananera.models import Enfunde, Finca, Usuario
+from bananera.tests.base import PruebaBase
+from bananera.views import EnfundeViewSet
+
+
+def replica_atrasada(hasta):
+    """La réplica existe pero aún no tiene los enfundes creados después de ``hasta``"""
+    get_queryset = EnfundeViewSet.get_queryset
+
+    def get_queryset_replica(vista):
+        queryset = get_queryset(vista)
+        if enrutador.leyendo_de_replica():
+            queryset = queryset.filter(fecha_creacion__lte=hasta)
+        return queryset
+
+    return [
+        mock.patch('bananera.enrutador.replica_configurada', return_value=True),
+        mock.patch('bananera.middleware.replica_configurada', return_value=True),
+        # Mismo archivo que la primaria: el retraso lo simula get_queryset
+        mock.patch.object(enrutador.EnrutadorReplica, 'db_for_read', return_value=enrutador.PRIMARIA),
+        mock.patch.object(EnfundeViewSet, 'get_queryset', get_queryset_replica),
+    ]
+
+
+class ReplicaTests(PruebaBase):
+    def setUp(self):
+        self.finca = Finca.objects.create(nombre='Finca A')
+        self.admin = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador',
+                                                 is_staff=True, is_superuser=True)
+        self.escritor = APIClient(REMOTE_ADDR='10.0.0.1')
+        self.lector = APIClient(REMOTE_ADDR='10.0.0.2')
+        for cliente in (self.escritor, self.lector):
+            cliente.force_authenticate(self.admin)
+
+    def test_lo_leido_en_la_replica_no_se_cachea(self):
+        existente = Enfunde.objects.create(finca=self.finca, fecha=date(2026, 5, 2), semana=18, año=2026,
+                                           color_cinta='verde', cantidad_enfundes=10)
+        parches = replica_atrasada(existente.fecha_creacion)
+        for parche in parches:
+            parche.start()
+            self.addCleanup(parche.stop)
+
+        self.escritor.post('/api/enfundes/', {
+            'finca': str(self.finca.pk), 'fecha': '2026-05-09', 'semana': 19, 'año': 2026,
+            'color_cinta': 'azul', 'cantidad_enfundes': 12,
+        }, format='json')
+
+        # Otro cliente lee de la réplica, que todavía no tiene el enfunde nuevo
+        atrasada = self.lector.get('/api/enfundes/')
+        self.assertEqual(len(atrasada.json()), 1)
+        self.assertFalse(atrasada.has_header('ETag'))
+
+        # Quien escribió lee de la primaria y ve su cambio
+        propia = self.escritor.get('/api/enfundes/')
+        self.assertEqual(len(propia.json()), 2)
+        self.assertTrue(propia.has_header('ETag'))
+
+        # Lo que guardó la primaria sí sirve a las lecturas de la réplica
+        self.assertEqual(len(self.lector.get('/api/enfundes/').json()), 2)
+
+
+class NegociacionTests(PruebaBase):
+    def codificacion(self, aceptadas):
+        return compresion.codificacion(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=aceptadas))
+
+    @mock.patch.object(compresion, 'brotli', None)
+    def test_accept_encoding(self):
+        self.assertEqual(self.codificacion('gzip, deflate'), 'gzip')
+        self.assertEqual(self.codificacion('*'), 'gzip')
+        self.assertIsNone(self.codificacion('gzip;q=0'))
+        self.assertIsNone(self.codificacion('*;q=0, identity'))
+        self.assertIsNone(self.codificacion(''))
+
+    @mock.patch.object(compresion, 'brotli', object())
+    def test_brotli_a_igual_peso(self):
+        self.assertEqual(self.codificacion('gzip, br'), 'br')
+        self.assertEqual(self.codificacion('gzip, br;q=0.5'), 'gzip')
+
+
+@mock.patch.object(compresion, 'brotli', None)
+class CompresionTests(PruebaBase):
+    def setUp(self):
+        self.finca = Finca.objects.create(nombre='Finca A')
+        for semana in range(1, 21):
+            Enfunde.objects.create(finca=self.finca, fecha=date(2026, 1, 1), semana=semana, año=2026,
+                                   color_cinta='verde', cantidad_enfundes=100 + semana)
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(Usuario.objects.create_user('admin@a.com', 'Admin', 'x',
+                                                                    rol='administrador'))
+
+    def test_gzip_si_se_acepta(self):
+        plana = self.cliente.get('/api/enfundes/')
+        self.assertFalse(plana.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plana['Vary'])
+        self.assertGreaterEqual(len(plana.content), compresion.minima())
+
+        comprimida = self.cliente.get('/api/enfundes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(comprimida['Content-Encoding'], 'gzip')
+        self.assertEqual(int(comprimida['Content-Length']), len(comprimida.content))
+        self.assertEqual(gzip.decompress(comprimida.content), plana.content)
+        # Misma representación, otros bytes: ETag débil
+        self.assertEqual(comprimida['ETag'], f'W/{plana["ETag"]}')
+
+    def test_respuestas_pequeñas_sin_comprimir(self):
+        with self.settings(COMPRESION_MINIMA_BYTES=10 ** 6):
+            response = self.cliente.get('/api/enfundes/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_etag_y_304(self):
+        primera = self.cliente.get('/api/enfundes/')
+        etag = primera['ETag']
+        self.assertEqual(primera['Cache-Control'], 'private, no-cache')
+
+        revalidada = self.cliente.get('/api/enfundes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertEqual(revalidada['ETag'], etag)
+        self.assertEqual(revalidada.content, b'')
+        # El ETag débil de la variante comprimida también vale
+        debil = self.cliente.get('/api/enfundes/', HTTP_IF_NONE_MATCH=f'W/{etag}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(debil.status_code, 304)
+
+        # Una escritura cambia la versión de datos: nuevo cuerpo y nuevo ETag
+        Enfunde.objects.create(finca=self.finca, fecha=date(2026, 1, 2), semana=21, año=2026,
+                               color_cinta='azul', cantidad_enfundes=1)
+        nueva = self.cliente.get('/api/enfundes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], etag)
+        self.assertEqual(len(nueva.json()), 21)
@@ -0,0 +1,58 @@
+"""
+Pruebas de los contadores de alertas no leídas tras marcar en bloque
+"""
+
+from django.contrib.admin.sites import site
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from bananera import conteo_alertas
+from bananera.models import Alerta, ConteoAlertas, Finca, Usuario
+from bananera.tests.base import PruebaBase
+
+
+class MarcarTests(PruebaBase):
+    def setUp(self):
+        self.finca_a = Finca.objects.create(nombre='Finca A')
+        self.finca_b = Finca.objects.create(nombre='Finca B')
+        for finca in (self.finca_a, self.finca_b):
+            for prioridad in ('alta', 'alta', 'baja'):
+                Alerta.objects.create(tipo='stock_bajo', prioridad=prioridad, finca=finca,
+                                      titulo='Stock bajo', mensaje='-')
+        self.admin = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador', is_staff=True,
+                                                 is_superuser=True)
+
+    def contadores(self):
+        return {(c.finca_id, c.prioridad): c.no_leidas for c in ConteoAlertas.objects.all()}
+
+    def test_marcar_todas_solo_descuenta_las_de_la_finca(self):
+        supervisor = Usuario.objects.create_user('sup@a.com', 'Sup', 'x', rol='supervisor_finca',
+                                                 finca_asignada=self.finca_a)
+        cliente = APIClient()
+        cliente.force_authenticate(supervisor)
+        cliente.post('/api/alertas/marcar_todas_leidas/')
+
+        self.assertEqual(self.contadores(), {
+            (self.finca_a.pk, 'alta'): 0, (self.finca_a.pk, 'baja'): 0,
+            (self.finca_b.pk, 'alta'): 2, (self.finca_b.pk, 'baja'): 1,
+        })
+
+    def test_acciones_del_admin(self):
+        modelo_admin = site._registry[Alerta]
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        modelo_admin.message_user = lambda *args, **kwargs: None
+
+        modelo_admin.marcar_leida(request, Alerta.objects.filter(prioridad='alta'))
+        # Las ya leídas no se vuelven a descontar
+        modelo_admin.marcar_leida(request, Alerta.objects.all())
+        self.assertTrue(all(n == 0 for n in self.contadores().values()))
+
+        modelo_admin.marcar_no_leida(request, Alerta.objects.filter(finca=self.finca_b, prioridad='alta'))
+        self.assertEqual(self.contadores()[(self.finca_b.pk, 'alta')], 2)
+        self.assertEqual(conteo_alertas.no_leidas(self.admin)['total'], 2)
+
+    def test_contador_negativo_se_registra(self):
+        ConteoAlertas.objects.filter(finca=self.finca_a, prioridad='baja').update(no_leidas=-3)
+        with self.assertLogs('bananera.conteo_alertas', 'WARNING'):
+            self.assertEqual(conteo_alertas.no_leidas(self.admin)['por_prioridad']['baja'], 1)
@@ -0,0 +1,33 @@
+"""
+Pruebas del detector de consultas repetidas
+"""
+
+from django.test import TestCase
+
+from bananera.detector_consultas import ConsultasRepetidasError, detectar_consultas
+from bananera.models import Finca
+
+
+class DetectorTests(TestCase):
+    def consultar(self, veces):
+        for _ in range(veces):
+            list(Finca.objects.filter(nombre='x'))
+
+    def test_umbral(self):
+        with detectar_consultas(umbral=3) as detector:
+            self.consultar(2)
+        self.assertEqual(detector.repetidas(), [])
+
+        with self.assertRaises(ConsultasRepetidasError) as error:
+            with detectar_consultas(umbral=3):
+                self.consultar(3)
+        self.assertIn('3x SELECT', str(error.exception))
+        self.assertIn('test_detector_consultas.py', str(error.exception))
+
+    def test_umbral_uno_señala_la_primera_consulta(self):
+        with self.assertLogs('bananera.consultas', 'WARNING'):
+            with detectar_consultas(umbral=1, fallar=False) as detector:
+                self.consultar(1)
+        [repetida] = detector.repetidas()
+        self.assertEqual(repetida['veces'], 1)
+        self.assertIn('test_detector_consultas.py', repetida['codigo'])
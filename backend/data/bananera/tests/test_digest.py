@@ -0,0 +1,52 @@
+"""
+Pruebas del digest del agente: alcance por finca
+"""
+
+from datetime import date
+
+from rest_framework.test import APIClient
+
+from bananera.models import Alerta, Cosecha, Finca, Insumo, Usuario
+from bananera.tests.base import PruebaBase
+
+
+class DigestAlcanceTests(PruebaBase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.finca_a = Finca.objects.create(nombre='Finca A')
+        cls.finca_b = Finca.objects.create(nombre='Finca B')
+        for finca, cajas in ((cls.finca_a, 100), (cls.finca_b, 900)):
+            Cosecha.objects.create(finca=finca, fecha=date(2026, 3, 2), semana=10, año=2026,
+                                   lote='A', cajas_producidas=cajas)
+            Insumo.objects.create(finca=finca, nombre=f'Urea {finca.nombre}', categoria='fertilizante',
+                                  stock_actual=1, stock_minimo=10)
+            Alerta.objects.create(tipo='stock_bajo', prioridad='critica', finca=finca,
+                                  titulo=f'Stock crítico {finca.nombre}', mensaje='...')
+        cls.supervisor = Usuario.objects.create_user(
+            'sup@a.com', 'Supervisor A', 'clave', rol='supervisor_finca', finca_asignada=cls.finca_a,
+        )
+        cls.gerente = Usuario.objects.create_user('gerente@a.com', 'Gerente', 'clave', rol='gerente')
+
+    def digest(self, usuario):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        response = cliente.get('/api/agente/digest/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_supervisor_solo_ve_su_finca(self):
+        digest = self.digest(self.supervisor)
+        self.assertEqual([f['nombre'] for f in digest['fincas']], ['Finca A'])
+        self.assertEqual(digest['produccion']['total_cosechas'], 1)
+        self.assertEqual([f['finca_nombre'] for f in digest['produccion']['por_finca']], ['Finca A'])
+        self.assertEqual({i['finca_nombre'] for i in digest['inventario']['bajo']}, {'Finca A'})
+        self.assertEqual(digest['alertas']['criticas'], 1)
+        self.assertNotIn('Finca B', str(digest))
+
+    def test_gerente_ve_todas_y_no_comparte_cache_con_el_supervisor(self):
+        supervisor = self.digest(self.supervisor)
+        gerente = self.digest(self.gerente)
+        self.assertEqual(gerente['produccion']['total_cosechas'], 2)
+        self.assertNotEqual(supervisor['version'], gerente['version'])
+        # Y al revés: la entrada del gerente no se sirve al supervisor
+        self.assertNotIn('Finca B', str(self.digest(self.supervisor)))
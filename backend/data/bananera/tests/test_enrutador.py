@@ -0,0 +1,87 @@
+"""
+Pruebas del enrutamiento de lecturas a la réplica
+"""
+
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from bananera import enrutador
+from bananera.models import Enfunde, Finca, Usuario
+from bananera.tests.base import PruebaBase
+
+
+class EnrutadorTests(PruebaBase):
+    def setUp(self):
+        # Las marcas de "acaba de escribir" viven en la caché
+        cache.clear()
+        self.finca = Finca.objects.create(nombre='Finca A')
+        self.enfunde = Enfunde.objects.create(finca=self.finca, fecha=date(2026, 5, 2), semana=18, año=2026,
+                                              color_cinta='verde', cantidad_enfundes=10)
+        self.admin = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador',
+                                                 is_staff=True, is_superuser=True)
+        self.bases = []
+        db_for_read = enrutador.EnrutadorReplica.db_for_read
+
+        def registrar(enrutador_, model, **hints):
+            # Anota a dónde iría la lectura; la consulta se hace en la única base de la prueba
+            self.bases.append(db_for_read(enrutador_, model, **hints))
+            return enrutador.PRIMARIA
+
+        for parche in (
+            mock.patch('bananera.enrutador.replica_configurada', return_value=True),
+            mock.patch('bananera.middleware.replica_configurada', return_value=True),
+            mock.patch.object(enrutador.EnrutadorReplica, 'db_for_read', registrar),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def cliente(self, ip):
+        cliente = APIClient(REMOTE_ADDR=ip)
+        cliente.force_authenticate(self.admin)
+        return cliente
+
+    # Acción de acciones_replica sin @respuesta_cacheada: siempre consulta
+    def leer(self, cliente, url='/api/enfundes/por_semana/', **cabeceras):
+        self.bases.clear()
+        self.assertEqual(cliente.get(url, **cabeceras).status_code, 200)
+        return set(self.bases)
+
+    def test_listados_a_la_replica_y_detalle_a_la_primaria(self):
+        cliente = self.cliente('10.0.0.1')
+        self.assertEqual(self.leer(cliente, '/api/enfundes/'), {enrutador.REPLICA})
+        self.assertEqual(self.leer(cliente, f'/api/enfundes/{self.enfunde.pk}/'), {enrutador.PRIMARIA})
+        self.assertEqual(self.leer(cliente), {enrutador.REPLICA})
+
+    def test_lee_sus_propias_escrituras(self):
+        escritor, otro = self.cliente('10.0.0.1'), self.cliente('10.0.0.2')
+        respuesta = escritor.post('/api/enfundes/', {
+            'finca': str(self.finca.pk), 'fecha': '2026-05-09', 'semana': 19, 'año': 2026,
+            'color_cinta': 'azul', 'cantidad_enfundes': 12,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+
+        self.assertEqual(self.leer(escritor), {enrutador.PRIMARIA})
+        self.assertEqual(self.leer(otro), {enrutador.REPLICA})
+        # Pasado el plazo vuelve a la réplica
+        with self.settings(REPLICA_LECTURA_PRIMARIA_SEGUNDOS=0):
+            escritor.post('/api/enfundes/', {}, format='json')
+        self.assertEqual(self.leer(escritor), {enrutador.REPLICA})
+
+    def test_cabecera_x_leer_de(self):
+        cliente = self.cliente('10.0.0.1')
+        self.assertEqual(self.leer(cliente, HTTP_X_LEER_DE='primaria'), {enrutador.PRIMARIA})
+        cliente.post('/api/enfundes/', {}, format='json')
+        self.assertEqual(self.leer(cliente, HTTP_X_LEER_DE='replica'), {enrutador.REPLICA})
+        self.assertEqual(self.leer(cliente, f'/api/enfundes/{self.enfunde.pk}/', HTTP_X_LEER_DE='replica'),
+                         {enrutador.REPLICA})
+
+    def test_sin_replica_todo_a_la_primaria(self):
+        with mock.patch('bananera.enrutador.replica_configurada', return_value=False), \
+                mock.patch('bananera.middleware.replica_configurada', return_value=False):
+            self.assertEqual(self.leer(self.cliente('10.0.0.1')), {enrutador.PRIMARIA})
+        with enrutador.leer_de(enrutador.REPLICA), \
+                mock.patch('bananera.enrutador.replica_configurada', return_value=False):
+            self.assertEqual(enrutador.EnrutadorReplica().db_for_read(Enfunde), enrutador.PRIMARIA)
@@ -0,0 +1,90 @@
+"""
+Pruebas de los eventos en tiempo real: tickets de conexión, huecos en la secuencia y sondeo
+"""
+
+import asyncio
+from unittest import mock
+
+from django.db import OperationalError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera import eventos
+from bananera.models import EventoCambio, Usuario
+from bananera.tests.base import PruebaBase
+
+
+def evento(id_):
+    EventoCambio.objects.create(id=id_, tipo='cosecha', datos={})
+
+
+class SecuenciaTests(PruebaBase):
+    def leer(self, secuencia, ahora=0.0):
+        eventos_leidos, _ = secuencia.leer(ahora)
+        return [e['id'] for e in eventos_leidos]
+
+    def test_recupera_los_confirmados_fuera_de_orden(self):
+        secuencia = eventos.Secuencia(0)
+        evento(1)
+        evento(3)
+        self.assertEqual(self.leer(secuencia), [1, 3])
+        self.assertEqual(set(secuencia.huecos), {2})
+
+        # El 2 se confirma después del 3
+        evento(2)
+        evento(4)
+        self.assertEqual(self.leer(secuencia, 1.0), [2, 4])
+        self.assertEqual(secuencia.huecos, {})
+        self.assertEqual(self.leer(secuencia, 2.0), [])
+
+    def test_los_huecos_vencen(self):
+        secuencia = eventos.Secuencia(0)
+        evento(2)
+        self.assertEqual(self.leer(secuencia), [2])
+        self.leer(secuencia, eventos.ESPERA_HUECOS + 1)
+        self.assertEqual(secuencia.huecos, {})
+        # Un rollback no se reintenta para siempre, y uno tardío ya no se entrega
+        evento(1)
+        self.assertEqual(self.leer(secuencia, eventos.ESPERA_HUECOS + 2), [])
+
+
+class DifusorTests(PruebaBase):
+    def test_sigue_sondeando_tras_un_error_de_base(self):
+        async def escenario():
+            difusor = eventos.Difusor()
+            suscripcion = await difusor.suscribir()
+            lecturas = [OperationalError('database is locked'), ([{'id': 1, 'finca_id': None}], 1)]
+
+            def leer():
+                resultado = lecturas.pop(0) if lecturas else ([], 0)
+                if isinstance(resultado, Exception):
+                    raise resultado
+                return resultado
+
+            with mock.patch.object(difusor.secuencia, 'leer', leer):
+                recibido = await asyncio.wait_for(suscripcion.cola.get(), 5)
+            difusor.cancelar(suscripcion)
+            return recibido, difusor.tarea
+
+        with mock.patch.object(eventos, 'INTERVALO', 0.01), self.assertLogs('bananera.eventos', 'ERROR'):
+            recibido, tarea = asyncio.run(escenario())
+        self.assertEqual(recibido['id'], 1)
+        self.assertIsNotNone(tarea)
+
+
+class TicketTests(PruebaBase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador')
+        self.jwt = str(AccessToken.for_user(self.usuario))
+
+    def test_ticket_de_un_solo_uso(self):
+        respuesta = self.client.post('/api/async/eventos/ticket/', HTTP_AUTHORIZATION=f'Bearer {self.jwt}')
+        self.assertEqual(respuesta.status_code, 200)
+        ticket = respuesta.json()['ticket']
+
+        self.assertEqual(eventos.canjear_ticket(ticket), self.usuario)
+        self.assertIsNone(eventos.canjear_ticket(ticket))
+        self.assertEqual(self.client.get(f'/api/async/eventos/?ticket={ticket}').status_code, 401)
+
+    def test_el_jwt_no_se_acepta_en_la_url(self):
+        self.assertEqual(self.client.post('/api/async/eventos/ticket/').status_code, 401)
+        self.assertEqual(self.client.get(f'/api/async/eventos/?token={self.jwt}').status_code, 401)
@@ -0,0 +1,95 @@
+"""
+Pruebas de los formatos de respuesta: orjson frente al JSON de DRF y columnar
+"""
+
+import io
+import unittest
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera import formatos
+from bananera.formatos import OrjsonParser, OrjsonRenderer, Tabla
+from bananera.models import Cosecha, Finca, Usuario
+from bananera.tests.base import PruebaTransaccionalBase
+
+
+@unittest.skipIf(formatos.orjson is None, 'orjson no está instalado')
+class OrjsonRendererTests(SimpleTestCase):
+    def test_mismos_bytes(self):
+        datos = {'id': uuid.uuid4(), 'fecha': date(2025, 1, 2), 'peso': Decimal('21.50'),
+                 'ratio': 1.5, 'nulo': None, 'texto': 'a b ñ'}
+        self.assertEqual(OrjsonRenderer().render(datos), JSONRenderer().render(datos))
+
+    def test_floats_con_exponente(self):
+        # Otra forma de escribir el exponente, el mismo valor
+        datos = {'a': [1e16, -1.2345678901234568e17, 1e-6, 0.00001, 5e-324], 'b': 0.5}
+        self.assertEqual(OrjsonRenderer().render(datos), b'{"a":[1e16,-1.2345678901234568e17,1e-6,0.00001,5e-324],"b":0.5}')
+        self.assertEqual(JSONRenderer().render(datos), b'{"a":[1e+16,-1.2345678901234568e+17,1e-06,1e-05,5e-324],"b":0.5}')
+        for cuerpo in (OrjsonRenderer().render(datos), formatos.a_json(datos)):
+            self.assertEqual(JSONParser().parse(io.BytesIO(cuerpo)), datos)
+            self.assertEqual(OrjsonParser().parse(io.BytesIO(cuerpo)), datos)
+
+    def test_enteros_grandes(self):
+        for cuerpo in (b'{"a": 123456789012345678901234567890}', b'[-99999999999999999999, 1]',
+                       b'18446744073709551616', b'{"a": 9223372036854775807}'):
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(OrjsonParser().parse(io.BytesIO(cuerpo)), JSONParser().parse(io.BytesIO(cuerpo)))
+        self.assertEqual(OrjsonParser().parse(io.BytesIO(b'[123456789012345678901234567890]')),
+                         [123456789012345678901234567890])
+
+    def test_no_finitos_fallan_como_drf(self):
+        for valor in (float('nan'), float('inf'), float('-inf')):
+            for datos in ({'a': [1, {'b': valor}]}, Tabla(['x'], [(valor,)])):
+                with self.subTest(valor=valor, datos=datos):
+                    with self.assertRaises(ValueError):
+                        JSONRenderer().render(datos)
+                    with self.assertRaises(ValueError):
+                        OrjsonRenderer().render(datos)
+                    with self.assertRaises(ValueError):
+                        formatos.a_json(datos)
+
+
+class ColumnarTests(SimpleTestCase):
+    def test_a_columnas(self):
+        filas = [{'semana': 1, 'cajas': 10}, {'semana': 2, 'cajas': 12}]
+        columnar = {'columns': ['semana', 'cajas'], 'data': {'semana': [1, 2], 'cajas': [10, 12]}}
+        self.assertEqual(formatos.a_columnas(filas), columnar)
+        self.assertEqual(formatos.a_columnas(Tabla(['semana', 'cajas'], [(1, 10), (2, 12)])), columnar)
+        self.assertEqual(formatos.a_columnas({'resumen': {'total': 22}, 'filas': filas}),
+                         {'resumen': {'total': 22}, 'filas': columnar})
+        self.assertEqual(formatos.a_columnas(Tabla(['semana'], [])), {'columns': ['semana'], 'data': {'semana': []}})
+        # Claves distintas por fila: se deja como lista de objetos
+        distintas = [{'a': 1}, {'b': 2}]
+        self.assertEqual(formatos.a_columnas(distintas), distintas)
+
+
+class ColumnarApiTests(PruebaTransaccionalBase):
+    def setUp(self):
+        super().setUp()
+        finca = Finca.objects.create(nombre='Finca A')
+        for semana in (10, 11):
+            Cosecha.objects.create(finca=finca, fecha=date(2026, 3, 2), semana=semana, año=2026, lote='A',
+                                   cajas_producidas=400 + semana, ratio=Decimal('1.20'))
+        usuario = Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador')
+        self.cabecera = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(usuario)}'}
+
+    def filas(self, columnar):
+        columnas = columnar['columns']
+        return [dict(zip(columnas, valores)) for valores in zip(*(columnar['data'][c] for c in columnas))]
+
+    def test_mismos_datos_que_el_json(self):
+        for url in ('/api/cosechas/tendencias/?año=2026', '/api/async/cosechas/tendencias/?año=2026'):
+            with self.subTest(url=url):
+                objetos = self.client.get(url, **self.cabecera)
+                por_parametro = self.client.get(url + '&format=columnar', **self.cabecera)
+                por_cabecera = self.client.get(url, HTTP_ACCEPT=formatos.TIPO_COLUMNAR, **self.cabecera)
+                for response in (por_parametro, por_cabecera):
+                    self.assertEqual(response['Content-Type'].split(';')[0], formatos.TIPO_COLUMNAR)
+                    self.assertEqual(self.filas(response.json()), objetos.json())
+                self.assertEqual(len(objetos.json()), 2)
@@ -0,0 +1,53 @@
+"""
+Pruebas de geometrías: validación y R-tree con datos inválidos guardados
+"""
+
+from rest_framework.test import APIClient
+
+from bananera import geo
+from bananera.models import Finca, GeometriaFinca, Usuario
+from bananera.tests.base import PruebaBase
+
+CUADRADO = {'type': 'Polygon', 'coordinates': [[[-80, -2], [-79, -2], [-79, -1], [-80, -1], [-80, -2]]]}
+
+
+class ValidarTests(PruebaBase):
+    def test_rechaza_geometrias_sin_coordenadas(self):
+        for geometria in (
+            {'type': 'MultiPolygon', 'coordinates': []},
+            {'type': 'MultiPolygon', 'coordinates': [[]]},
+            {'type': 'Polygon', 'coordinates': []},
+            {'type': 'Polygon', 'coordinates': [[]]},
+            {'type': 'Polygon'},
+        ):
+            with self.subTest(geometria=geometria), self.assertRaises(ValueError):
+                geo.validar(geometria)
+
+    def test_acepta_poligono(self):
+        geo.validar(CUADRADO)
+
+
+class IndiceTests(PruebaBase):
+    def setUp(self):
+        self.rota = Finca.objects.create(nombre='Rota')
+        self.buena = Finca.objects.create(nombre='Buena')
+        GeometriaFinca.objects.create(finca=self.buena, contorno=CUADRADO)
+        GeometriaFinca.objects.create(finca=self.rota)
+        # Guardada sin pasar por la validación (datos anteriores a ella)
+        GeometriaFinca.objects.filter(finca=self.rota).update(contorno={'type': 'MultiPolygon', 'coordinates': []})
+        geo.invalidar_geometrias()
+        geo._estado['arbol'] = None
+
+    def test_la_geometria_rota_no_tumba_el_indice(self):
+        with self.assertLogs('bananera.geo', 'WARNING'):
+            self.assertEqual(geo.ubicar(-79.5, -1.5)['finca'], self.buena.pk)
+
+    def test_la_api_rechaza_multipolygon_vacio(self):
+        cliente = APIClient()
+        cliente.force_authenticate(Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador'))
+        response = cliente.put(f'/api/fincas/{self.buena.pk}/geometria/',
+                               {'contorno': {'type': 'MultiPolygon', 'coordinates': []}, 'lotes': {}},
+                               format='json')
+        self.assertEqual(response.status_code, 400)
+        with self.assertLogs('bananera.geo', 'WARNING'):
+            self.assertEqual(cliente.get('/api/fincas/ubicar/?lon=-79.5&lat=-1.5').status_code, 200)
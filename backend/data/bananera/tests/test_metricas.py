@@ -0,0 +1,51 @@
+"""
+Pruebas de /api/metrics: acceso y poda de archivos de workers terminados
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bananera import metricas
+from bananera.models import Usuario
+from bananera.tests.base import PruebaBase
+
+
+class MetricasTests(PruebaBase):
+    def setUp(self):
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.carpeta.cleanup)
+        ajustes = override_settings(METRICAS_DIR=self.carpeta.name, METRICAS_TOKEN='')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def token(self, **campos):
+        usuario = Usuario.objects.create_user(f"{campos.get('rol', 'staff')}@a.com", 'U', 'x', **campos)
+        return f'Bearer {AccessToken.for_user(usuario)}'
+
+    def test_sin_token_se_niega_por_defecto(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+        respuesta = self.client.get('/api/metrics', HTTP_AUTHORIZATION=self.token(rol='administrador'))
+        self.assertEqual(respuesta.status_code, 403)
+        respuesta = self.client.get('/api/metrics', HTTP_AUTHORIZATION=self.token(is_staff=True))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_token_del_scraper(self):
+        with override_settings(METRICAS_TOKEN='secreto'):
+            self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+            self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    def test_poda_los_archivos_de_procesos_terminados(self):
+        proceso = subprocess.Popen([sys.executable, '-c', 'pass'])
+        proceso.wait()
+        muerto = Path(self.carpeta.name) / f'{proceso.pid}.json'
+        serie = metricas._serie_vacia() | {'cantidad': 7}
+        muerto.write_text(json.dumps({'/api/x|GET': serie}))
+
+        self.assertNotIn('/api/x|GET', metricas.combinar())
+        self.assertFalse(muerto.exists())
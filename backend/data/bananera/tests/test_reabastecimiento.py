@@ -0,0 +1,58 @@
+"""
+Pruebas de los parámetros de reabastecimiento, vencimientos y FEFO
+"""
+
+from rest_framework.test import APIClient
+
+from bananera.models import Insumo, Usuario
+from bananera.reabastecimiento import factor_servicio
+from bananera.tests.base import PruebaBase
+
+
+class ParametrosTests(PruebaBase):
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador'))
+
+    def test_rechaza_fuera_de_rango(self):
+        for consulta in ('historial=0', 'historial=731', 'dias_entrega=-5', 'dias_entrega=366',
+                         'nivel_servicio=1.5', 'nivel_servicio=nan', 'historial=abc'):
+            with self.subTest(consulta=consulta):
+                response = self.cliente.get(f'/api/insumos/reabastecimiento/?{consulta}')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cliente.post('/api/insumos/generar_ordenes/?dias_entrega=-1').status_code, 400)
+
+    def test_acepta_los_limites(self):
+        response = self.cliente.get('/api/insumos/reabastecimiento/?historial=730&dias_entrega=365')
+        self.assertEqual(response.status_code, 200)
+
+    def test_factor_servicio_sin_redondear(self):
+        for nivel, z in ((0.5, 0.0), (0.6, 0.2533), (0.95, 1.6449), (0.975, 1.96), (0.999, 3.0902)):
+            with self.subTest(nivel=nivel):
+                self.assertAlmostEqual(factor_servicio(nivel), z, places=4)
+
+
+class PorVencerTests(PruebaBase):
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador'))
+
+    def test_dias_fuera_de_rango(self):
+        for dias in ('99999999999', '-1', '3651', 'x'):
+            with self.subTest(dias=dias):
+                self.assertEqual(self.cliente.get(f'/api/insumos/por_vencer/?dias={dias}').status_code, 400)
+        self.assertEqual(self.cliente.get('/api/insumos/por_vencer/?dias=3650').status_code, 200)
+
+
+class SugerirFefoTests(PruebaBase):
+    def setUp(self):
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(Usuario.objects.create_user('admin@a.com', 'Admin', 'x', rol='administrador'))
+        self.insumo = Insumo.objects.create(nombre='Urea', categoria='fertilizante', stock_actual=50)
+
+    def test_cantidad_debe_ser_positiva(self):
+        url = f'/api/movimientos-inventario/sugerir_fefo/?insumo={self.insumo.pk}'
+        for cantidad in ('', '&cantidad=0', '&cantidad=-5', '&cantidad=x'):
+            with self.subTest(cantidad=cantidad):
+                self.assertEqual(self.cliente.get(url + cantidad).status_code, 400)
+        self.assertEqual(self.cliente.get(url + '&cantidad=5').status_code, 200)
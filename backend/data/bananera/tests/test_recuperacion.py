@@ -0,0 +1,38 @@
+"""
+Pruebas de la recuperación de contraseña: el código no queda en claro en la base
+"""
+
+import re
+
+from django.core import mail
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from bananera.correo import CUERPO_ELIMINADO, enviar_pendientes
+from bananera.models import CorreoSaliente, PasswordResetCode, Usuario
+from bananera.tests.base import PruebaBase
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class RecuperacionTests(PruebaBase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user('ana@a.com', 'Ana', 'clave-vieja')
+        self.cliente = APIClient()
+
+    def test_codigo_solo_en_el_correo_enviado(self):
+        self.cliente.post('/api/password-reset/request/', {'email': 'ana@a.com'}, format='json')
+        correo = CorreoSaliente.objects.get()
+        self.assertTrue(correo.sensible)
+
+        enviar_pendientes()
+        codigo = re.search(r'\b(\d{6})\b', mail.outbox[0].body).group(1)
+        correo.refresh_from_db()
+        self.assertEqual(correo.mensaje, CUERPO_ELIMINADO)
+        self.assertNotEqual(PasswordResetCode.objects.get().codigo, codigo)
+
+        response = self.cliente.post('/api/password-reset/confirm/', {
+            'email': 'ana@a.com', 'codigo': codigo, 'new_password': 'clave-nueva',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.check_password('clave-nueva'))
@@ -0,0 +1,36 @@
+"""
+Pruebas de la deduplicación del motor de reglas de alertas
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from bananera.models import Alerta, Finca, Insumo
+from bananera.reglas_alertas import StockBajo, evaluar_reglas
+from bananera.tests.base import PruebaBase
+
+
+class DeduplicacionTests(PruebaBase):
+    def setUp(self):
+        finca = Finca.objects.create(nombre='Finca A')
+        Insumo.objects.create(finca=finca, nombre='Urea', categoria='fertilizante',
+                              stock_actual=2, stock_minimo=10)
+        self.hoy = timezone.localdate()
+
+    def evaluar(self, hoy):
+        return evaluar_reglas([StockBajo()], hoy=hoy)['stock_bajo']
+
+    def test_leida_no_se_repite_en_la_ventana(self):
+        self.assertEqual(self.evaluar(self.hoy), 1)
+        alerta = Alerta.objects.get()
+        alerta.leida = True
+        alerta.save()
+
+        self.assertEqual(self.evaluar(self.hoy), 0)
+        # Pasada la ventana vuelve a avisar si la condición sigue
+        self.assertEqual(self.evaluar(self.hoy + timedelta(days=StockBajo.dias_ventana)), 1)
+
+    def test_abierta_no_se_repite_fuera_de_la_ventana(self):
+        self.assertEqual(self.evaluar(self.hoy), 1)
+        self.assertEqual(self.evaluar(self.hoy + timedelta(days=10)), 0)
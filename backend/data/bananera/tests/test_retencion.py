@@ -0,0 +1,37 @@
+"""
+Pruebas de la purga por lotes de las políticas de retención
+"""
+
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from bananera import busqueda
+from bananera.models import Alerta, EventoCambio
+from bananera.retencion import purgar
+from bananera.tests.base import PruebaBase
+
+
+class PurgarTests(PruebaBase):
+    def setUp(self):
+        hace = timezone.now() - timedelta(days=100)
+        for i, leida in enumerate([True] * 5 + [False]):
+            Alerta.objects.create(tipo='stock_bajo', prioridad='media', titulo=f'Stock bajo {i}',
+                                  mensaje='-', leida=leida)
+        Alerta.objects.create(tipo='stock_bajo', titulo='Reciente', mensaje='-', leida=True)
+        Alerta.objects.exclude(titulo='Reciente').update(fecha_creacion=hace)
+
+    def test_borra_por_lotes_solo_lo_vencido(self):
+        self.assertEqual(purgar('alertas_leidas', lote=2, pausa=0), {'borrados': 5, 'lotes': 3})
+        self.assertEqual(sorted(Alerta.objects.values_list('titulo', flat=True)), ['Reciente', 'Stock bajo 5'])
+        filtrado = busqueda.filtrar(Alerta.objects.all(), 'stock', ['titulo', 'mensaje'])
+        if filtrado is not None:
+            self.assertEqual(list(filtrado.values_list('titulo', flat=True)), ['Stock bajo 5'])
+
+    def test_settings_solo_sustituyen_los_dias(self):
+        with override_settings(RETENCION_DIAS={'alertas_leidas': 365}):
+            self.assertEqual(purgar('alertas_leidas')['borrados'], 0)
+        EventoCambio.objects.create(tipo='cosecha', datos={})
+        EventoCambio.objects.filter(tipo='cosecha').update(fecha=timezone.now() - timedelta(days=2))
+        self.assertEqual(purgar('eventos')['borrados'], 1)
@@ -0,0 +1,66 @@
+"""
+Pruebas de los limitadores de login y recuperación de contraseña
+"""
+
+import threading
+import time
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+
+from bananera.tests.base import PruebaBase
+from bananera.throttles import LoginIPThrottle
+
+
+# Hash rápido: el login de cuentas inexistentes también calcula uno
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LimitesTests(PruebaBase):
+    def test_x_forwarded_for_no_cambia_la_ip(self):
+        cliente = APIClient()
+        codigos = [
+            cliente.post('/api/login/', {'email': f'u{i}@a.com', 'password': 'mala'}, format='json',
+                         HTTP_X_FORWARDED_FOR=f'10.0.0.{i}').status_code
+            for i in range(40)
+        ]
+        # 20/min por IP: cada cuenta es distinta, así que solo corta el límite por IP
+        self.assertEqual(codigos[:20], [401] * 20)
+        self.assertEqual(set(codigos[20:]), {429})
+
+    def test_cubeta_atomica_entre_hilos(self):
+        request = APIRequestFactory().post('/api/login/', REMOTE_ADDR='10.1.1.1')
+        permitidas = []
+        barrera = threading.Barrier(30)
+
+        def pedir():
+            barrera.wait()
+            permitidas.append(LoginIPThrottle().allow_request(request, None))
+
+        def get_lento(caché, *args, **kwargs):
+            # Agranda la ventana entre leer y escribir la cubeta
+            valor = get_original(caché, *args, **kwargs)
+            time.sleep(0.002)
+            return valor
+
+        get_original = LocMemCache.get
+        hilos = [threading.Thread(target=pedir) for _ in range(30)]
+        with mock.patch.object(LocMemCache, 'get', get_lento):
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        self.assertEqual(permitidas.count(True), 20)
+
+    @override_settings(REST_FRAMEWORK={'NUM_PROXIES': 1, 'DEFAULT_THROTTLE_RATES': {'login_ip': '2/min'}})
+    def test_detras_de_un_proxy_usa_la_ultima_ip(self):
+        factory = APIRequestFactory()
+
+        def permitida(xff):
+            request = factory.post('/api/login/', HTTP_X_FORWARDED_FOR=xff)
+            return LoginIPThrottle().allow_request(request, None)
+
+        self.assertTrue(permitida('1.1.1.1, 10.0.0.1'))
+        self.assertTrue(permitida('2.2.2.2, 10.0.0.1'))
+        self.assertFalse(permitida('3.3.3.3, 10.0.0.1'))
+        self.assertTrue(permitida('3.3.3.3, 10.0.0.2'))
@@ -0,0 +1,117 @@
+"""
+Limitadores de peticiones (token bucket) para los endpoints públicos
+
+El estado de cada cubeta vive en la caché compartida, así que el límite se
+respeta entre procesos. DRF evalúa los limitadores antes de ejecutar la vista,
+por lo que un rechazo cuesta una lectura de caché y no llega a consultar la
+base ni a calcular el hash de la contraseña.
+
+Las tasas se configuran en ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` con
+el formato de DRF (``'5/min'``): capacidad de la cubeta / período de recarga.
+
+La IP sale de ``get_ident`` de DRF: con ``NUM_PROXIES = 0`` es ``REMOTE_ADDR``
+y no la cabecera ``X-Forwarded-For``, que el cliente puede cambiar en cada
+petición. La lectura y escritura de cada cubeta se hace bajo un cerrojo por
+clave tomado con ``cache.add`` (atómico en Redis, memcached, locmem y la
+caché de base de datos; no en la de archivos).
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURACIONES = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# Segundos que se espera el cerrojo de una cubeta y que dura si su dueño muere
+ESPERA_CERROJO = 0.5
+TTL_CERROJO = 2
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def __init__(self):
+        self.espera = None
+        tasa = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if tasa:
+            cantidad, periodo = tasa.split('/')
+            self.capacidad = int(cantidad)
+            self.recarga = self.capacidad / DURACIONES[periodo[0]]  # tokens por segundo
+        else:
+            self.capacidad = None
+
+    def identificador(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if self.capacidad is None:
+            return True
+        identificador = self.identificador(request)
+        if not identificador:
+            return True
+
+        clave = f'bananera:throttle:{self.scope}:{identificador}'
+        if not self._cerrar(clave):
+            # Demasiadas peticiones a la vez sobre la misma cubeta
+            self.espera = 1 / self.recarga
+            return False
+        try:
+            ahora = time.time()
+            tokens, ultimo = cache.get(clave, (self.capacidad, ahora))
+            tokens = min(self.capacidad, tokens + (ahora - ultimo) * self.recarga)
+
+            if tokens < 1:
+                self.espera = (1 - tokens) / self.recarga
+                return False
+
+            # Expira cuando la cubeta volvería a estar llena
+            cache.set(clave, (tokens - 1, ahora), int(self.capacidad / self.recarga) + 1)
+            return True
+        finally:
+            cache.delete(f'{clave}:cerrojo')
+
+    def _cerrar(self, clave):
+        limite = time.monotonic() + ESPERA_CERROJO
+        while not cache.add(f'{clave}:cerrojo', 1, TTL_CERROJO):
+            if time.monotonic() > limite:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def wait(self):
+        return self.espera
+
+
+class PorIPThrottle(TokenBucketThrottle):
+    def identificador(self, request):
+        return self.get_ident(request)
+
+
+class PorCuentaThrottle(TokenBucketThrottle):
+    """Limita por el email enviado en el cuerpo, sin consultar si existe"""
+    def identificador(self, request):
+        email = request.data.get('email', '') if hasattr(request.data, 'get') else ''
+        email = str(email).lower().strip()
+        return hashlib.sha1(email.encode()).hexdigest() if email else None
+
+
+class LoginIPThrottle(PorIPThrottle):
+    scope = 'login_ip'
+
+
+class LoginCuentaThrottle(PorCuentaThrottle):
+    scope = 'login_cuenta'
+
+
+class ResetIPThrottle(PorIPThrottle):
+    scope = 'reset_ip'
+
+
+class ResetCuentaThrottle(PorCuentaThrottle):
+    scope = 'reset_cuenta'
+
+
+LIMITES_LOGIN = [LoginIPThrottle, LoginCuentaThrottle]
+LIMITES_RESET = [ResetIPThrottle, ResetCuentaThrottle]
@@ -4,15 +4,15 @@ URLs para la app bananera
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView
 from .views import (
     FincaViewSet, UsuarioViewSet, EnfundeViewSet,
     CosechaViewSet, RecuperacionCintaViewSet,
     EmpleadoViewSet, RolPagoViewSet, PrestamoViewSet,
     InsumoViewSet, MovimientoInventarioViewSet,
-    AlertaViewSet, ReporteViewSet,
+    AlertaViewSet, ReporteViewSet, LoginView, digest_agente, metricas_prometheus,
     request_password_reset, verify_reset_code, reset_password
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'fincas', FincaViewSet, basename='finca')
@@ -30,7 +30,19 @@ router.register(r'reportes', ReporteViewSet, basename='reporte')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('login/', LoginView.as_view(), name='token_obtain_pair'),
+    path('agente/digest/', digest_agente, name='agente_digest'),
+    path('metrics', metricas_prometheus, name='metricas'),
+    # Reportes asíncronos (ASGI)
+    path('async/reportes/produccion/', async_views.reporte_produccion, name='async_reporte_produccion'),
+    path('async/reportes/nomina/', async_views.reporte_nomina, name='async_reporte_nomina'),
+    path('async/reportes/inventario/', async_views.reporte_inventario, name='async_reporte_inventario'),
+    path('async/cosechas/tendencias/', async_views.cosechas_tendencias, name='async_cosechas_tendencias'),
+    path('async/cosechas/comparativo/', async_views.cosechas_comparativo, name='async_cosechas_comparativo'),
+    path('async/fincas/<uuid:pk>/estadisticas/', async_views.finca_estadisticas, name='async_finca_estadisticas'),
+    path('async/dashboard/', async_views.dashboard, name='async_dashboard'),
+    path('async/eventos/', async_views.eventos_stream, name='async_eventos'),
+    path('async/eventos/ticket/', async_views.eventos_ticket, name='async_eventos_ticket'),
     # Password Reset
     path('password-reset/request/', request_password_reset, name='password_reset_request'),
     path('password-reset/verify/', verify_reset_code, name='password_reset_verify'),
@@ -0,0 +1,89 @@
+"""
+Consultas de vencimiento de insumos (FEFO: primero en vencer, primero en salir)
+
+Todas las consultas filtran por rangos de ``fecha_vencimiento`` (opcionalmente
+precedidos por ``finca`` y ``nombre``) para resolverse con los índices
+definidos en ``Insumo.Meta.indexes``.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from .models import Insumo
+
+VALOR_EN_RIESGO = ExpressionWrapper(
+    F('stock_actual') * F('precio_unitario'),
+    output_field=DecimalField(max_digits=20, decimal_places=2),
+)
+
+MAX_DIAS = 3650
+
+CAMPOS_VENCIMIENTO = (
+    'id', 'nombre', 'finca_id', 'finca_nombre', 'categoria', 'unidad_medida',
+    'stock_actual', 'precio_unitario', 'fecha_vencimiento', 'valor_en_riesgo',
+)
+
+
+def insumos_por_vencer(queryset=None, dias=30, hoy=None, incluir_vencidos=False):
+    """Insumos con stock que vencen dentro de ``dias`` días, ordenados por fecha"""
+    hoy = hoy or timezone.localdate()
+    queryset = Insumo.objects.all() if queryset is None else queryset
+    limite = hoy + timedelta(days=dias)
+
+    if incluir_vencidos:
+        queryset = queryset.filter(fecha_vencimiento__lte=limite)
+    else:
+        queryset = queryset.filter(fecha_vencimiento__range=(hoy, limite))
+
+    return (
+        queryset.filter(stock_actual__gt=0)
+        .annotate(valor_en_riesgo=VALOR_EN_RIESGO, finca_nombre=F('finca__nombre'))
+        .order_by('fecha_vencimiento', 'nombre')
+    )
+
+
+def resumen_por_finca(queryset):
+    """Cantidad de insumos y valor en riesgo agrupados por finca"""
+    return list(
+        queryset.order_by()
+        .values('finca_id', 'finca_nombre')
+        .annotate(insumos=Count('id'), valor_en_riesgo=Sum(VALOR_EN_RIESGO))
+        .order_by('-valor_en_riesgo')
+    )
+
+
+def sugerir_fefo(insumo, cantidad, hoy=None):
+    """
+    Reparte ``cantidad`` entre los lotes (insumos con el mismo nombre en la
+    misma finca) empezando por el que vence primero. Los lotes vencidos se
+    omiten y los que no tienen fecha de vencimiento se usan al final.
+
+    Devuelve ``(picks, faltante)``.
+    """
+    hoy = hoy or timezone.localdate()
+    lotes = (
+        Insumo.objects.filter(finca_id=insumo.finca_id, nombre=insumo.nombre, stock_actual__gt=0)
+        .exclude(fecha_vencimiento__lt=hoy)
+        .order_by(F('fecha_vencimiento').asc(nulls_last=True))
+        .values('id', 'nombre', 'stock_actual', 'fecha_vencimiento')
+    )
+
+    pendiente = Decimal(cantidad)
+    picks = []
+    for lote in lotes:
+        if pendiente <= 0:
+            break
+        tomar = min(pendiente, lote['stock_actual'])
+        picks.append({
+            'insumo': lote['id'],
+            'nombre': lote['nombre'],
+            'fecha_vencimiento': lote['fecha_vencimiento'],
+            'stock_actual': lote['stock_actual'],
+            'cantidad': tomar,
+        })
+        pendiente -= tomar
+
+    return picks, max(pendiente, Decimal(0))
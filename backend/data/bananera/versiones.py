@@ -0,0 +1,26 @@
+"""
+Versión de datos compartida entre procesos para invalidar cachés derivadas
+
+Cualquier escritura sobre los modelos de negocio cambia la versión (ver
+``signals.py``); las operaciones masivas (``update``/``bulk_create``) deben
+llamar a ``invalidar_datos`` explícitamente.
+"""
+
+import uuid
+
+from django.core.cache import cache
+
+CLAVE_VERSION = 'bananera:datos:version'
+
+
+def version_datos():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        version = invalidar_datos()
+    return version
+
+
+def invalidar_datos():
+    version = uuid.uuid4().hex[:12]
+    cache.set(CLAVE_VERSION, version, None)
+    return version
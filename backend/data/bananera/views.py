@@ -2,33 +2,50 @@
 ViewSets para la API REST de Bananera
 """
 
-import random
+import hmac
+import secrets
 import string
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum, Avg, Count, F
+from rest_framework_simplejwt.views import TokenObtainPairView
+from django.db.models import F
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
 from datetime import timedelta
 
 from .models import (
     Finca, Usuario, Enfunde, Cosecha, RecuperacionCinta,
     Empleado, RolPago, Prestamo, Insumo, MovimientoInventario, Alerta,
-    PasswordResetCode
+    PasswordResetCode, GeometriaFinca
 )
+from . import conteo_alertas, eventos, geo, metricas, reportes
+from .alcance import AlcanceFincaMixin, finca_de, limitar_a_finca, restringido_a_finca
+from .archivo import ArchivoTemporadaMixin
+from .autenticacion import JWTAuthenticationCacheada
+from .busqueda import BusquedaIndexadaFilter
+from .correo import encolar_correo
+from .compresion import respuesta_cacheada
+from .digest import obtener_digest, version_digest
+from .enrutador import lectura_replica
+from .throttles import LIMITES_LOGIN, LIMITES_RESET
+from .versiones import invalidar_datos
 from .serializers import (
     FincaSerializer, UsuarioSerializer, EnfundeSerializer,
     CosechaSerializer, RecuperacionCintaSerializer,
-    EmpleadoSerializer, RolPagoSerializer, PrestamoSerializer,
+    EmpleadoSerializer, RolPagoSerializer, PrestamoSerializer, GeometriaFincaSerializer,
     InsumoSerializer, MovimientoInventarioSerializer, AlertaSerializer
 )
 
 
-class FincaViewSet(viewsets.ModelViewSet):
+class FincaViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Fincas"""
     queryset = Finca.objects.all()
     serializer_class = FincaSerializer
@@ -36,30 +53,89 @@ class FincaViewSet(viewsets.ModelViewSet):
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'ubicacion']
     ordering_fields = ['nombre', 'hectareas']
+    acciones_replica = {'estadisticas'}
+    campo_finca = 'pk'
 
     @action(detail=True, methods=['get'])
     def estadisticas(self, request, pk=None):
         """Obtener estadísticas de una finca específica"""
         finca = self.get_object()
-        cosechas = Cosecha.objects.filter(finca=finca)
-        enfundes = Enfunde.objects.filter(finca=finca)
-        
-        return Response({
-            'total_cosechas': cosechas.count(),
-            'total_cajas': cosechas.aggregate(Sum('cajas_producidas'))['cajas_producidas__sum'] or 0,
-            'total_enfundes': enfundes.aggregate(Sum('cantidad_enfundes'))['cantidad_enfundes__sum'] or 0,
-            'promedio_ratio': cosechas.aggregate(Avg('ratio'))['ratio__avg'] or 0,
-        })
+        return Response(reportes.estadisticas_finca(
+            reportes.cosechas_finca(finca.id),
+            reportes.enfundes_finca(finca.id),
+        ))
+
+    @action(detail=True, methods=['get', 'put'])
+    def geometria(self, request, pk=None):
+        """Contorno y lotes GeoJSON completos de la finca (para edición)"""
+        finca = self.get_object()
+        geometria = GeometriaFinca.objects.filter(finca=finca).first()
+        if request.method == 'GET':
+            if geometria is None:
+                return Response({'finca': finca.id, 'contorno': None, 'lotes': {}, 'fecha_actualizacion': None})
+            return Response(GeometriaFincaSerializer(geometria).data)
+        serializer = GeometriaFincaSerializer(geometria, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(finca=finca)
+        return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def mapa(self, request):
+        """GeoJSON simplificado para el mini-mapa: ?zoom=12&bbox=lon1,lat1,lon2,lat2"""
+        try:
+            nivel = geo.nivel_para(int(request.query_params.get('zoom', geo.NIVELES_ZOOM[0])))
+            bbox = request.query_params.get('bbox')
+            bbox = [float(v) for v in bbox.split(',')] if bbox else None
+        except ValueError:
+            return Response({'error': 'Parámetros zoom o bbox inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+        if bbox is not None and len(bbox) != 4:
+            return Response({'error': 'bbox debe ser lon1,lat1,lon2,lat2'}, status=status.HTTP_400_BAD_REQUEST)
+
+        geometrias = GeometriaFinca.objects.filter(finca__in=self.get_queryset())
+        if bbox:
+            geometrias = geometrias.filter(finca__in=geo.en_caja(*bbox))
+        # Solo el nivel pedido sale de la base (extracción JSON en SQL)
+        filas = geometrias.values_list('finca_id', 'finca__nombre', f'simplificada__{geo.clave_nivel(nivel)}')
+
+        features = []
+        for finca_id, nombre, datos in filas:
+            if not datos:
+                continue
+            if datos['contorno']:
+                features.append({
+                    'type': 'Feature', 'id': str(finca_id),
+                    'properties': {'finca': str(finca_id), 'nombre': nombre, 'lote': None},
+                    'geometry': datos['contorno'],
+                })
+            for codigo, geometria in sorted(datos['lotes'].items()):
+                features.append({
+                    'type': 'Feature', 'id': f'{finca_id}:{codigo}',
+                    'properties': {'finca': str(finca_id), 'nombre': nombre, 'lote': codigo},
+                    'geometry': geometria,
+                })
+        return Response({'type': 'FeatureCollection', 'zoom': nivel, 'features': features})
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def ubicar(self, request):
+        """Finca y lote que contienen un punto GPS: ?lon=-79.9&lat=-2.1"""
+        try:
+            lon = float(request.query_params['lon'])
+            lat = float(request.query_params['lat'])
+        except (KeyError, ValueError):
+            return Response({'error': 'Parámetros lon y lat requeridos'}, status=status.HTTP_400_BAD_REQUEST)
+        fincas = {finca_de(request.user)} if restringido_a_finca(request.user) else None
+        return Response(geo.ubicar(lon, lat, fincas))
+
+
+class UsuarioViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Usuarios"""
-    queryset = Usuario.objects.all()
+    queryset = Usuario.objects.select_related('finca_asignada')
     serializer_class = UsuarioSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['rol', 'activo', 'finca_asignada']
     search_fields = ['nombre', 'email']
+    campo_finca = 'finca_asignada'
 
     @action(detail=False, methods=['get'])
     def me(self, request):
@@ -68,15 +144,21 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class EnfundeViewSet(viewsets.ModelViewSet):
+class EnfundeViewSet(AlcanceFincaMixin, ArchivoTemporadaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Enfundes"""
-    queryset = Enfunde.objects.all()
+    queryset = Enfunde.objects.select_related('finca')
     serializer_class = EnfundeSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['finca', 'semana', 'año', 'color_cinta']
     ordering_fields = ['fecha', 'semana']
     ordering = ['-fecha']
+    acciones_replica = {'por_semana'}
+
+    @respuesta_cacheada
+    def list(self, request, *args, **kwargs):
+        """Listado cacheado (y precomprimido) por versión de datos"""
+        return super().list(request, *args, **kwargs)
 
     @action(detail=False, methods=['get'])
     def por_semana(self, request):
@@ -93,59 +175,56 @@ class EnfundeViewSet(viewsets.ModelViewSet):
         return Response(self.get_serializer(queryset, many=True).data)
 
 
-class CosechaViewSet(viewsets.ModelViewSet):
+class CosechaViewSet(AlcanceFincaMixin, ArchivoTemporadaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Cosechas"""
-    queryset = Cosecha.objects.all()
+    queryset = Cosecha.objects.select_related('finca')
     serializer_class = CosechaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['finca', 'semana', 'año', 'lote']
     ordering_fields = ['fecha', 'semana', 'cajas_producidas']
     ordering = ['-fecha']
+    acciones_replica = {'tendencias', 'comparativo'}
+
+    @respuesta_cacheada
+    def list(self, request, *args, **kwargs):
+        """Listado cacheado (y precomprimido) por versión de datos"""
+        return super().list(request, *args, **kwargs)
 
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def tendencias(self, request):
         """Obtener tendencias de cosecha por semana"""
         año = request.query_params.get('año', timezone.now().year)
-        
-        tendencias = Cosecha.objects.filter(año=año).values('semana').annotate(
-            total_cajas=Sum('cajas_producidas'),
-            promedio_ratio=Avg('ratio'),
-            total_racimos=Sum('racimos_recuperados')
-        ).order_by('semana')
-        
-        return Response(list(tendencias))
+        finca = finca_de(request.user, request.query_params.get('finca'))
+        return Response(reportes.tendencias_cosecha(año, finca))
 
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def comparativo(self, request):
         """Comparativo de producción entre fincas"""
         año = request.query_params.get('año', timezone.now().year)
-        
-        comparativo = Cosecha.objects.filter(año=año).values('finca__nombre').annotate(
-            total_cajas=Sum('cajas_producidas'),
-            promedio_ratio=Avg('ratio'),
-            cosechas_count=Count('id')
-        ).order_by('-total_cajas')
-        
-        return Response(list(comparativo))
+        finca = finca_de(request.user, request.query_params.get('finca'))
+        return Response(reportes.comparativo_fincas(año, finca))
 
 
-class RecuperacionCintaViewSet(viewsets.ModelViewSet):
+class RecuperacionCintaViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Recuperación de Cintas"""
-    queryset = RecuperacionCinta.objects.all()
+    queryset = RecuperacionCinta.objects.select_related('enfunde__finca')
     serializer_class = RecuperacionCintaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['enfunde', 'enfunde__finca']
     ordering = ['-fecha']
+    campo_finca = 'enfunde__finca'
 
 
-class EmpleadoViewSet(viewsets.ModelViewSet):
+class EmpleadoViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Empleados"""
-    queryset = Empleado.objects.all()
+    queryset = Empleado.objects.select_related('finca')
     serializer_class = EmpleadoSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['finca', 'cargo', 'activo']
     search_fields = ['nombre', 'cedula']
 
@@ -157,14 +236,15 @@ class EmpleadoViewSet(viewsets.ModelViewSet):
         return Response(RolPagoSerializer(roles, many=True).data)
 
 
-class RolPagoViewSet(viewsets.ModelViewSet):
+class RolPagoViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Roles de Pago"""
-    queryset = RolPago.objects.all()
+    queryset = RolPago.objects.select_related('empleado__finca')
     serializer_class = RolPagoSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['empleado', 'empleado__finca', 'estado']
     ordering = ['-fecha_pago']
+    campo_finca = 'empleado__finca'
 
     @action(detail=True, methods=['post'])
     def aprobar(self, request, pk=None):
@@ -183,14 +263,15 @@ class RolPagoViewSet(viewsets.ModelViewSet):
         return Response({'status': 'Rol de pago marcado como pagado'})
 
 
-class PrestamoViewSet(viewsets.ModelViewSet):
+class PrestamoViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Préstamos"""
-    queryset = Prestamo.objects.all()
+    queryset = Prestamo.objects.select_related('empleado__finca')
     serializer_class = PrestamoSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['empleado', 'empleado__finca', 'estado']
     ordering = ['-fecha_solicitud']
+    campo_finca = 'empleado__finca'
 
     @action(detail=True, methods=['post'])
     def aprobar(self, request, pk=None):
@@ -218,20 +299,20 @@ class PrestamoViewSet(viewsets.ModelViewSet):
         })
 
 
-class InsumoViewSet(viewsets.ModelViewSet):
+class InsumoViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Insumos"""
-    queryset = Insumo.objects.all()
+    queryset = Insumo.objects.select_related('finca')
     serializer_class = InsumoSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BusquedaIndexadaFilter]
     filterset_fields = ['categoria', 'finca']
     search_fields = ['nombre']
+    incluir_sin_finca = True
 
     @action(detail=False, methods=['get'])
     def alertas_stock(self, request):
         """Obtener insumos con stock bajo"""
-        from django.db.models import F
-        insumos_bajos = Insumo.objects.filter(stock_actual__lt=F('stock_minimo'))
+        insumos_bajos = self.get_queryset().filter(stock_actual__lt=F('stock_minimo'))
         return Response(self.get_serializer(insumos_bajos, many=True).data)
 
     @action(detail=True, methods=['post'])
@@ -242,37 +323,138 @@ class InsumoViewSet(viewsets.ModelViewSet):
         insumo.save()
         return Response({'status': 'Orden de compra generada'})
 
+    @action(detail=False, methods=['get'])
+    def por_vencer(self, request):
+        """Insumos que vencen en los próximos N días y su valor en riesgo"""
+        from .vencimientos import CAMPOS_VENCIMIENTO, MAX_DIAS, insumos_por_vencer, resumen_por_finca
+        try:
+            dias = int(request.query_params.get('dias', 30))
+        except ValueError:
+            dias = -1
+        if not 0 <= dias <= MAX_DIAS:
+            return Response(
+                {'error': f'El parámetro dias debe ser un entero entre 0 y {MAX_DIAS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        incluir_vencidos = request.query_params.get('incluir_vencidos') in ('1', 'true')
 
-class MovimientoInventarioViewSet(viewsets.ModelViewSet):
+        queryset = insumos_por_vencer(
+            self.filter_queryset(self.get_queryset()), dias=dias, incluir_vencidos=incluir_vencidos
+        )
+        por_finca = resumen_por_finca(queryset)
+        return Response({
+            'dias': dias,
+            'total': sum(f['insumos'] for f in por_finca),
+            'valor_en_riesgo': sum(f['valor_en_riesgo'] or 0 for f in por_finca),
+            'por_finca': por_finca,
+            'insumos': list(queryset.values(*CAMPOS_VENCIMIENTO)),
+        })
+
+    def _parametros_reabastecimiento(self, request):
+        """Parámetros del pronóstico; lanza ValueError si faltan en formato o rango"""
+        from .reabastecimiento import validar_parametros
+        params = request.query_params
+        parametros = {
+            'dias_historial': int(params.get('historial', 90)),
+            'dias_entrega': int(params.get('dias_entrega', 7)),
+            'nivel_servicio': float(params.get('nivel_servicio', 0.95)),
+        }
+        validar_parametros(**parametros)
+        return parametros
+
+    @action(detail=False, methods=['get'])
+    def reabastecimiento(self, request):
+        """Proponer pedidos según consumo histórico y punto de reorden dinámico"""
+        from .reabastecimiento import propuestas_reorden
+        try:
+            parametros = self._parametros_reabastecimiento(request)
+        except ValueError as e:
+            return Response({'error': f'Parámetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        propuestas = propuestas_reorden(self.filter_queryset(self.get_queryset()), **parametros)
+        return Response({
+            'total': len(propuestas),
+            'costo_total': round(sum(p['costo_estimado'] for p in propuestas), 2),
+            'propuestas': propuestas,
+        })
+
+    @action(detail=False, methods=['post'])
+    def generar_ordenes(self, request):
+        """Generar órdenes de compra para todos los insumos que alcanzaron su punto de reorden"""
+        from .reabastecimiento import generar_ordenes
+        try:
+            parametros = self._parametros_reabastecimiento(request)
+        except ValueError as e:
+            return Response({'error': f'Parámetros inválidos: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        ordenes = generar_ordenes(self.filter_queryset(self.get_queryset()), **parametros)
+        return Response({
+            'status': f'{len(ordenes)} órdenes de compra generadas',
+            'ordenes': ordenes,
+        })
+
+
+class MovimientoInventarioViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Movimientos de Inventario"""
-    queryset = MovimientoInventario.objects.all()
+    queryset = MovimientoInventario.objects.select_related('insumo', 'finca', 'responsable')
     serializer_class = MovimientoInventarioSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['insumo', 'tipo', 'finca']
     ordering = ['-fecha']
 
+    @action(detail=False, methods=['get'])
+    def sugerir_fefo(self, request):
+        """Sugerir de qué lotes sacar una salida, empezando por el que vence primero"""
+        from .vencimientos import sugerir_fefo
+        try:
+            insumos = limitar_a_finca(Insumo.objects.all(), request.user, incluir_sin_finca=True)
+            insumo = insumos.get(pk=request.query_params.get('insumo'))
+            cantidad = int(request.query_params.get('cantidad', 0))
+            if cantidad <= 0:
+                raise ValueError(cantidad)
+        except (Insumo.DoesNotExist, ValueError, ValidationError):
+            return Response(
+                {'error': 'Se requiere un insumo válido y una cantidad mayor que cero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        picks, faltante = sugerir_fefo(insumo, cantidad)
+        return Response({
+            'cantidad': cantidad,
+            'faltante': faltante,
+            'picks': picks,
+        })
+
     def perform_create(self, serializer):
         """Al crear un movimiento, actualizar el stock del insumo"""
+        self.validar_finca(serializer)
         movimiento = serializer.save()
         insumo = movimiento.insumo
+        stock_anterior = insumo.stock_actual
         
         if movimiento.tipo == 'entrada':
             insumo.stock_actual += movimiento.cantidad
+            insumo.pedido_generado = False
         else:
             insumo.stock_actual -= movimiento.cantidad
         
         insumo.save()
+        eventos.publicar_cruce_stock(insumo, stock_anterior)
 
 
-class AlertaViewSet(viewsets.ModelViewSet):
+class AlertaViewSet(AlcanceFincaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar Alertas"""
-    queryset = Alerta.objects.all()
+    queryset = Alerta.objects.select_related('finca')
     serializer_class = AlertaSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['tipo', 'prioridad', 'leida']
     ordering = ['-fecha_creacion']
+    incluir_sin_finca = True
+
+    @action(detail=False, methods=['get'])
+    def no_leidas(self, request):
+        """Cantidad de alertas no leídas para el indicador del encabezado"""
+        return Response(conteo_alertas.no_leidas(request.user))
 
     @action(detail=True, methods=['post'])
     def marcar_leida(self, request, pk=None):
@@ -285,106 +467,115 @@ class AlertaViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def marcar_todas_leidas(self, request):
         """Marcar todas las alertas como leídas"""
-        Alerta.objects.filter(leida=False).update(leida=True)
+        conteo_alertas.marcar(self.get_queryset(), leida=True)
+        invalidar_datos()
         return Response({'status': 'Todas las alertas marcadas como leídas'})
 
 
 class ReporteViewSet(viewsets.ViewSet):
     """ViewSet para generar Reportes"""
     permission_classes = [IsAuthenticated]
+    acciones_replica = {'produccion', 'nomina', 'inventario'}
 
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def produccion(self, request):
         """Reporte de producción"""
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
-        finca_id = request.query_params.get('finca')
-        
-        queryset = Cosecha.objects.all()
-        
-        if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
-        if finca_id:
-            queryset = queryset.filter(finca_id=finca_id)
-        
-        resumen = queryset.aggregate(
-            total_cajas=Sum('cajas_producidas'),
-            promedio_ratio=Avg('ratio'),
-            total_racimos=Sum('racimos_recuperados'),
-            total_cosechas=Count('id')
-        )
-        
-        por_finca = queryset.values('finca__nombre').annotate(
-            cajas=Sum('cajas_producidas'),
-            ratio_promedio=Avg('ratio')
+        queryset = reportes.cosechas_filtradas(
+            request.query_params.get('fecha_inicio'),
+            request.query_params.get('fecha_fin'),
+            finca_de(request.user, request.query_params.get('finca')),
         )
-        
         return Response({
-            'resumen': resumen,
-            'por_finca': list(por_finca)
+            'resumen': reportes.resumen_produccion(queryset),
+            'por_finca': reportes.produccion_por_finca(queryset)
         })
 
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def nomina(self, request):
         """Reporte de nómina"""
-        mes = request.query_params.get('mes')
-        año = request.query_params.get('año')
-        
-        queryset = RolPago.objects.all()
-        
-        if mes:
-            queryset = queryset.filter(fecha_pago__month=mes)
-        if año:
-            queryset = queryset.filter(fecha_pago__year=año)
-        
-        resumen = queryset.aggregate(
-            total_pagado=Sum('total_pagar'),
-            total_roles=Count('id')
-        )
-        
-        por_finca = queryset.values('empleado__finca__nombre').annotate(
-            total=Sum('total_pagar'),
-            empleados=Count('empleado', distinct=True)
+        queryset = reportes.roles_filtrados(
+            request.query_params.get('mes'),
+            request.query_params.get('año'),
+            finca_de(request.user, request.query_params.get('finca')),
         )
-        
         return Response({
-            'resumen': resumen,
-            'por_finca': list(por_finca)
+            'resumen': reportes.resumen_nomina(queryset),
+            'por_finca': reportes.nomina_por_finca(queryset)
         })
 
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def inventario(self, request):
         """Reporte de inventario"""
-        finca_id = request.query_params.get('finca')
-        
-        queryset = Insumo.objects.all()
-        
-        if finca_id:
-            queryset = queryset.filter(finca_id=finca_id)
-        
-        resumen = {
-            'total_insumos': queryset.count(),
-            'stock_bajo': queryset.filter(stock_actual__lt=F('stock_minimo')).count(),
-            'valor_total': sum(i.stock_actual * 10 for i in queryset)  # Precio estimado
-        }
-        
-        por_categoria = queryset.values('categoria').annotate(
-            cantidad=Count('id'),
-            stock_total=Sum('stock_actual')
-        )
-        
+        queryset = reportes.insumos_filtrados(finca_de(request.user, request.query_params.get('finca')))
+        resumen = reportes.resumen_inventario(queryset)
         return Response({
-            'resumen': resumen,
-            'por_categoria': list(por_categoria)
+            'resumen': {
+                'total_insumos': resumen['total_insumos'],
+                'stock_bajo': reportes.insumos_stock_bajo(queryset),
+                'valor_total': resumen['valor_total'],
+            },
+            'por_categoria': reportes.inventario_por_categoria(queryset)
         })
 
 
+# ==================== Agente IA ====================
+
+@lectura_replica
+@api_view(['GET'])
+@respuesta_cacheada(version=version_digest)
+def digest_agente(request):
+    """Resumen compacto para el agente de notificaciones, limitado a la finca del usuario si es por finca"""
+    version, digest = obtener_digest(finca_de(request.user))
+    response = Response(digest)
+    response['ETag'] = f'"{version}"'
+    response['Cache-Control'] = 'private, max-age=60'
+    return response
+
+
+# ==================== Métricas ====================
+
+def _usuario_metricas(request):
+    """Usuario de la sesión o del JWT de la API, o None"""
+    if request.user.is_authenticated:
+        return request.user
+    try:
+        resultado = JWTAuthenticationCacheada().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return resultado[0] if resultado else None
+
+
+@require_GET
+def metricas_prometheus(request):
+    """
+    Métricas por ruta en formato de exposición de Prometheus. Acceso con
+    ``Authorization: Bearer <METRICAS_TOKEN>`` (el scraper) o como usuario staff.
+    """
+    token = settings.METRICAS_TOKEN
+    if not (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')):
+        usuario = _usuario_metricas(request)
+        if usuario is None:
+            return HttpResponse(status=401)
+        if not usuario.is_staff:
+            return HttpResponse(status=403)
+    return HttpResponse(metricas.exposicion(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==================== Autenticación ====================
+
+class LoginView(TokenObtainPairView):
+    """Login JWT limitado por IP y por cuenta antes de verificar la contraseña"""
+    throttle_classes = LIMITES_LOGIN
+
+
 # ==================== Password Reset Views ====================
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LIMITES_RESET)
 def request_password_reset(request):
     """Solicitar código de recuperación de contraseña"""
     email = request.data.get('email', '').lower().strip()
@@ -403,24 +594,24 @@ def request_password_reset(request):
             'message': 'Si el email existe, recibirás un código de recuperación'
         })
     
-    # Invalidar códigos anteriores
-    PasswordResetCode.objects.filter(usuario=usuario, usado=False).update(usado=True)
-    
     # Generar código de 6 dígitos
-    codigo = ''.join(random.choices(string.digits, k=6))
-    
-    # Crear código con expiración de 15 minutos
-    reset_code = PasswordResetCode.objects.create(
-        usuario=usuario,
-        codigo=codigo,
-        fecha_expiracion=timezone.now() + timedelta(minutes=15)
-    )
-    
-    # Enviar email
-    try:
-        send_mail(
-            subject='Código de Recuperación - Bananera HG',
-            message=f'''
+    codigo = ''.join(secrets.choice(string.digits) for _ in range(6))
+
+    with transaction.atomic():
+        # Invalidar códigos anteriores
+        PasswordResetCode.objects.filter(usuario=usuario, usado=False).update(usado=True)
+
+        # Crear código con expiración de 15 minutos
+        PasswordResetCode.objects.create(
+            usuario=usuario,
+            codigo=PasswordResetCode.resumen(codigo),
+            fecha_expiracion=timezone.now() + timedelta(minutes=15)
+        )
+
+        # El envío real lo hace `manage.py enviar_correos`
+        encolar_correo(
+            asunto='Código de Recuperación - Bananera HG',
+            mensaje=f'''
 Hola {usuario.nombre},
 
 Tu código de recuperación de contraseña es: {codigo}
@@ -432,14 +623,10 @@ Si no solicitaste este código, ignora este mensaje.
 Saludos,
 Bananera HG
             ''',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
+            destinatarios=[email],
+            sensible=True,
         )
-    except Exception as e:
-        # En desarrollo, mostrar el código en consola
-        print(f"[DEV] Código de recuperación para {email}: {codigo}")
-    
+
     return Response({
         'message': 'Si el email existe, recibirás un código de recuperación'
     })
@@ -447,6 +634,7 @@ Bananera HG
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LIMITES_RESET)
 def verify_reset_code(request):
     """Verificar código de recuperación"""
     email = request.data.get('email', '').lower().strip()
@@ -462,7 +650,7 @@ def verify_reset_code(request):
         usuario = Usuario.objects.get(email=email)
         reset_code = PasswordResetCode.objects.filter(
             usuario=usuario,
-            codigo=codigo,
+            codigo=PasswordResetCode.resumen(codigo),
             usado=False,
             fecha_expiracion__gt=timezone.now()
         ).first()
@@ -487,6 +675,7 @@ def verify_reset_code(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(LIMITES_RESET)
 def reset_password(request):
     """Restablecer contraseña con código"""
     email = request.data.get('email', '').lower().strip()
@@ -509,7 +698,7 @@ def reset_password(request):
         usuario = Usuario.objects.get(email=email)
         reset_code = PasswordResetCode.objects.filter(
             usuario=usuario,
-            codigo=codigo,
+            codigo=PasswordResetCode.resumen(codigo),
             usado=False,
             fecha_expiracion__gt=timezone.now()
         ).first()
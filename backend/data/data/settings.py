@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import importlib.util
+import os
+import sys
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,6 +50,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'bananera.middleware.MetricasMiddleware',
+    'bananera.middleware.DetectorConsultasMiddleware',
+    'bananera.middleware.CompresionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -53,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bananera.middleware.LecturaReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'data.urls'
@@ -78,10 +87,82 @@ WSGI_APPLICATION = 'data.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# SQLite por defecto (ajustado con SQLITE_PRAGMAS en cada conexión nueva, ver
+# bananera/conexiones.py); PostgreSQL con DATABASE_ENGINE=postgresql.
+
+if os.environ.get('DATABASE_ENGINE', 'sqlite') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'bananera_db'),
+            'USER': os.environ.get('DATABASE_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', 'localhost'),
+            'PORT': os.environ.get('DATABASE_PORT', '5432'),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DATABASE_POOL_MAX'):
+        # Pool de psycopg 3 (incompatible con CONN_MAX_AGE)
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DATABASE_POOL_MIN', 2)),
+            'max_size': int(os.environ['DATABASE_POOL_MAX']),
+            'timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DATABASE_CONN_MAX_AGE', 600))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Toma el bloqueo de escritura al iniciar la transacción en vez
+                # de fallar al intentar promoverla a mitad de camino
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+
+# Réplica de solo lectura para listados y reportes (ver bananera/enrutador.py).
+# SQLite local: DATABASE_REPLICA_PATH + `manage.py sincronizar_replica`.
+# PostgreSQL: DATABASE_REPLICA_HOST apuntando al servidor en streaming.
+
+if os.environ.get('DATABASE_REPLICA_PATH') or os.environ.get('DATABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+        DATABASES['replica']['NAME'] = os.environ['DATABASE_REPLICA_PATH']
+    else:
+        DATABASES['replica']['HOST'] = os.environ['DATABASE_REPLICA_HOST']
+
+DATABASE_ROUTERS = ['bananera.enrutador.EnrutadorReplica']
+
+# Segundos que un cliente lee de la primaria después de escribir
+REPLICA_LECTURA_PRIMARIA_SEGUNDOS = 5
+
+# Por conexión. El modo WAL (lectores y escritor concurrentes) se guarda en
+# el archivo y lo fija la migración 0015; la espera por bloqueo es 'timeout'
+SQLITE_PRAGMAS = {
+    'synchronous': 'normal',        # seguro con WAL, sin fsync por transacción
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,           # negativo = KiB (64 MB por conexión)
+}
+
+
+# Cache
+# Compartida entre procesos (archivos locales por defecto, Redis/Memcached vía entorno)
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        'TIMEOUT': 600,
     }
 }
 
@@ -134,22 +215,53 @@ CORS_ALLOWED_ORIGINS = [
     'http://127.0.0.1:3000',
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'x-leer-de')
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'bananera.autenticacion.JWTAuthenticationCacheada',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON de siempre; columnar por Accept o ?format= (ver bananera/formatos.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'bananera.formatos.ColumnarRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # Proxies de confianza delante de Django. Con 0 la IP del cliente es
+    # REMOTE_ADDR y X-Forwarded-For se ignora (lo puede falsear cualquiera)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Token bucket de bananera/throttles.py: capacidad/período de recarga
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_cuenta': '5/min',
+        'reset_ip': '10/min',
+        'reset_cuenta': '5/min',
+    },
 }
 
+# JSON con orjson si está instalado (pip install orjson): mismos bytes, más rápido
+if importlib.util.find_spec('orjson'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'bananera.formatos.OrjsonRenderer'
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = 'bananera.formatos.OrjsonParser'
+
+# MessagePack solo si el paquete está instalado (pip install msgpack)
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('bananera.formatos.MessagePackRenderer')
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -158,8 +270,36 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Detector de consultas N+1 (bananera/detector_consultas.py):
+# 'fallar' en pruebas, 'advertir' con DEBUG, desactivado en producción
+EJECUTANDO_PRUEBAS = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+DETECTOR_CONSULTAS = os.environ.get(
+    'DETECTOR_CONSULTAS',
+    'fallar' if EJECUTANDO_PRUEBAS else 'advertir' if DEBUG else '',
+)
+DETECTOR_CONSULTAS_UMBRAL = 5
+
+# Métricas por ruta (bananera/metricas.py): un archivo por worker en este directorio
+METRICAS_DIR = os.environ.get('METRICAS_DIR', str(BASE_DIR / '.metricas'))
+# Token del scraper ("Authorization: Bearer <token>"); sin él, /api/metrics
+# solo responde a usuarios staff
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN', '')
+
+# Compresión de respuestas (bananera/compresion.py): brotli si está instalado
+# (pip install brotli), si no gzip; por debajo de este tamaño no compensa
+COMPRESION_MINIMA_BYTES = int(os.environ.get('COMPRESION_MINIMA_BYTES', 1024))
+
+# Días que se conservan los datos purgables (comando purgar_datos): los valores
+# por defecto están en POLITICAS de bananera/retencion.py; aquí solo se
+# sustituyen, p. ej. {'alertas_leidas': 180}
+RETENCION_DIAS = {}
+
 # Email Settings
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Los correos se encolan en CorreoSaliente y los envía `manage.py enviar_correos`.
+# En desarrollo/pruebas: EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend
+# (con EMAIL_FILE_PATH) o django.core.mail.backends.locmem.EmailBackend
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / '.correos'))
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
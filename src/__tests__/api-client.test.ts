@@ -168,6 +168,24 @@ describe('ApiClient', () => {
 
       expect(result.data).toHaveLength(1);
     });
+
+    it('should fetch simplified finca map for a zoom and bbox', async () => {
+      const mockMapa = { type: 'FeatureCollection', zoom: 11, features: [] };
+
+      (global.fetch as jest.Mock).mockResolvedValueOnce({
+        ok: true,
+        status: 200,
+        json: async () => mockMapa,
+      });
+
+      const result = await apiClient.getMapaFincas(12, [-80, -2.2, -79.8, -2]);
+
+      expect(global.fetch).toHaveBeenCalledWith(
+        expect.stringContaining('/fincas/mapa/?zoom=12&bbox=-80%2C-2.2%2C-79.8%2C-2'),
+        expect.any(Object)
+      );
+      expect(result.data.zoom).toBe(11);
+    });
   });
 
   describe('POST Requests', () => {
@@ -1,9 +1,59 @@
 "use client";
 
+import { useEffect, useMemo, useState } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/src/components/ui/card";
 import { MapPin } from "lucide-react";
+import { apiClient } from "@/src/lib/api-client";
+
+// Nivel 11: contornos de finca ya simplificados por el backend (pocos cientos de bytes)
+const ZOOM_MINI_MAPA = 11;
+const ANCHO = 300;
+const ALTO = 200;
+
+type Anillo = number[][];
+
+interface Feature {
+  id: string;
+  properties: { nombre: string; lote: string | null };
+  geometry: { type: "Polygon" | "MultiPolygon"; coordinates: any };
+}
+
+function poligonos(geometry: Feature["geometry"]): Anillo[][] {
+  return geometry.type === "Polygon" ? [geometry.coordinates] : geometry.coordinates;
+}
 
 export function MiniMap() {
+  const [features, setFeatures] = useState<Feature[]>([]);
+
+  useEffect(() => {
+    apiClient.getMapaFincas(ZOOM_MINI_MAPA).then((response) => {
+      if (response.data?.features) setFeatures(response.data.features);
+    });
+  }, []);
+
+  const trazos = useMemo(() => {
+    const puntos = features.flatMap((f) => poligonos(f.geometry).flatMap((p) => p[0]));
+    if (!puntos.length) return [];
+    const lons = puntos.map((p) => p[0]);
+    const lats = puntos.map((p) => p[1]);
+    const [x1, x2, y1, y2] = [Math.min(...lons), Math.max(...lons), Math.min(...lats), Math.max(...lats)];
+    // Equirectangular corregida por la latitud media: suficiente a escala de finca
+    const kx = Math.cos((((y1 + y2) / 2) * Math.PI) / 180);
+    const escala = Math.min(ANCHO / ((x2 - x1) * kx || 1), ALTO / (y2 - y1 || 1)) * 0.9;
+    const dx = (ANCHO - (x2 - x1) * kx * escala) / 2;
+    const dy = (ALTO - (y2 - y1) * escala) / 2;
+    const punto = ([lon, lat]: number[]) =>
+      `${(dx + (lon - x1) * kx * escala).toFixed(1)},${(dy + (y2 - lat) * escala).toFixed(1)}`;
+
+    return features.map((f) => ({
+      id: f.id,
+      nombre: f.properties.lote ? `${f.properties.nombre} · Lote ${f.properties.lote}` : f.properties.nombre,
+      d: poligonos(f.geometry)
+        .flatMap((p) => p.map((anillo) => `M${anillo.map(punto).join("L")}Z`))
+        .join(""),
+    }));
+  }, [features]);
+
   return (
     <Card>
       <CardHeader className="pb-2">
@@ -13,9 +63,19 @@ export function MiniMap() {
         </CardTitle>
       </CardHeader>
       <CardContent>
-        <div className="h-[200px] bg-muted rounded-md flex items-center justify-center text-muted-foreground text-sm">
-          Mapa de fincas
-        </div>
+        {trazos.length ? (
+          <svg viewBox={`0 0 ${ANCHO} ${ALTO}`} className="h-[200px] w-full bg-muted rounded-md">
+            {trazos.map((t) => (
+              <path key={t.id} d={t.d} fillRule="evenodd" className="fill-primary/20 stroke-primary" strokeWidth={1}>
+                <title>{t.nombre}</title>
+              </path>
+            ))}
+          </svg>
+        ) : (
+          <div className="h-[200px] bg-muted rounded-md flex items-center justify-center text-muted-foreground text-sm">
+            Mapa de fincas
+          </div>
+        )}
       </CardContent>
     </Card>
   );
@@ -113,6 +113,17 @@ class ApiClient {
     return this.request('/fincas/', { method: 'POST', body: JSON.stringify(data) });
   }
 
+  // GeoJSON simplificado para el zoom pedido (bbox: [lon1, lat1, lon2, lat2])
+  async getMapaFincas(zoom: number, bbox?: [number, number, number, number]): Promise<ApiResponse<any>> {
+    const params = new URLSearchParams({ zoom: String(zoom) });
+    if (bbox) params.set('bbox', bbox.join(','));
+    return this.request(`/fincas/mapa/?${params.toString()}`);
+  }
+
+  async ubicarPunto(lon: number, lat: number): Promise<ApiResponse<{ finca: string | null; nombre: string | null; lote: string | null }>> {
+    return this.request(`/fincas/ubicar/?lon=${lon}&lat=${lat}`);
+  }
+
   // Usuarios
   async getUsuarios(): Promise<ApiResponse<any[]>> {
     return this.request('/usuarios/');
@@ -232,9 +243,57 @@ class ApiClient {
     return this.request(`/alertas/${query}`);
   }
 
+  async getConteoAlertas(): Promise<ApiResponse<{ total: number; por_prioridad: Record<string, number> }>> {
+    return this.request('/alertas/no_leidas/');
+  }
+
   async marcarAlertaLeida(id: string): Promise<ApiResponse<any>> {
     return this.request(`/alertas/${id}/`, { method: 'PATCH', body: JSON.stringify({ leida: true }) });
   }
+
+  // Eventos en tiempo real (SSE, requiere el backend servido con ASGI).
+  // EventSource no admite cabeceras: se pide un ticket de un solo uso y, si la
+  // conexión cae, otro ticket para reanudar desde el último evento recibido.
+  // Devuelve la función que cancela la suscripción.
+  suscribirEventos(onEvento: (tipo: string, datos: any) => void): () => void {
+    let fuente: EventSource | null = null;
+    let reintento: ReturnType<typeof setTimeout> | undefined;
+    let ultimo = '';
+    let cancelada = false;
+
+    const conectar = async () => {
+      if (cancelada || typeof window === 'undefined' || !this.token) return;
+      const respuesta = await this.request<{ ticket: string }>('/async/eventos/ticket/', { method: 'POST' });
+      if (cancelada) return;
+      if (!respuesta.data) {
+        if (respuesta.status !== 401) reintento = setTimeout(conectar, 5000);
+        return;
+      }
+      const desde = ultimo ? `&desde=${encodeURIComponent(ultimo)}` : '';
+      fuente = new EventSource(
+        `${API_BASE_URL}/async/eventos/?ticket=${encodeURIComponent(respuesta.data.ticket)}${desde}`
+      );
+      ['alerta', 'stock', 'cosecha', 'enfunde'].forEach((tipo) => {
+        fuente?.addEventListener(tipo, (evento) => {
+          const mensaje = evento as MessageEvent;
+          ultimo = mensaje.lastEventId || ultimo;
+          onEvento(tipo, JSON.parse(mensaje.data));
+        });
+      });
+      fuente.onerror = () => {
+        // El ticket ya se usó: el navegador no puede reconectar por su cuenta
+        fuente?.close();
+        reintento = setTimeout(conectar, 3000);
+      };
+    };
+
+    conectar();
+    return () => {
+      cancelada = true;
+      clearTimeout(reintento);
+      fuente?.close();
+    };
+  }
 }
 
 export const apiClient = new ApiClient();
@@ -1,7 +1,7 @@
 /**
  * Servicio de Gemini AI para el agente de notificaciones inteligente
  * Usa la API gratuita de Google Gemini
- * Consulta directamente las APIs de Django para tener contexto completo
+ * Consulta el resumen de datos calculado por Django (/api/agente/digest/)
  */
 
 const GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent';
@@ -11,16 +11,52 @@ export interface GeminiConfig {
   apiKey: string;
 }
 
+/**
+ * Resumen calculado por Django en GET /api/agente/digest/
+ * (ver backend/data/bananera/digest.py)
+ */
 export interface NotificationContext {
-  insumos: any[];
-  cosechas: any[];
-  enfundes: any[];
-  empleados: any[];
-  prestamos: any[];
-  recuperacionCintas: any[];
-  rolesPago: any[];
-  alertas: any[];
-  fincas: any[];
+  version: string;
+  fecha: string;
+  fincas: { nombre: string; hectareas: number }[];
+  inventario: {
+    total: number;
+    stock_bajo: number;
+    stock_critico: number;
+    bajo: { nombre: string; stock_actual: number; stock_minimo: number; unidad_medida: string; finca_nombre: string | null }[];
+    critico: { nombre: string; stock_actual: number; stock_minimo: number; unidad_medida: string; finca_nombre: string | null }[];
+  };
+  produccion: {
+    total_cosechas: number;
+    promedio_cajas: number;
+    ultimas: { semana: number; cajas_producidas: number; finca_nombre: string }[];
+    por_finca: { finca_nombre: string; promedio_cajas: number; promedio_ratio: number }[];
+  };
+  enfundes: {
+    registros: number;
+    total_enfundes: number;
+    matas_caidas: number;
+    porcentaje_matas_caidas: number;
+    fincas_elevadas: { finca_nombre: string; porcentaje: number }[];
+  };
+  recuperacion: {
+    registros: number;
+    bajas: number;
+    promedio: number;
+    peores: { finca_nombre: string; porcentaje: number }[];
+  };
+  personal: {
+    activos: number;
+    inactivos: number;
+    roles_pendientes: number;
+    total_por_pagar: number;
+    prestamos_activos: number;
+    deuda_prestamos: number;
+  };
+  alertas: {
+    criticas: number;
+    recientes: { titulo: string; mensaje: string; prioridad: string }[];
+  };
 }
 
 export interface SmartNotification {
@@ -58,8 +94,11 @@ class GeminiService {
     return !!this.getApiKey();
   }
 
+  private digestCache: NotificationContext | null = null;
+
   /**
-   * Obtiene todos los datos directamente desde las APIs de Django
+   * Obtiene el resumen de datos calculado por Django (unos pocos KB).
+   * Usa ETag para no volver a descargarlo si los datos no cambiaron.
    */
   async fetchDataFromBackend(): Promise<NotificationContext | null> {
     const token = typeof window !== 'undefined' ? localStorage.getItem('accessToken') : null;
@@ -68,59 +107,29 @@ class GeminiService {
       return null;
     }
 
-    const headers = { 
+    const headers: Record<string, string> = {
       'Authorization': `Bearer ${token}`,
       'Content-Type': 'application/json'
     };
+    if (this.digestCache) {
+      headers['If-None-Match'] = `"${this.digestCache.version}"`;
+    }
 
     try {
-      console.log('[Gemini] Consultando APIs de Django...');
-      
-      const [
-        insumosRes, cosechasRes, enfundesRes, empleadosRes, 
-        prestamosRes, recuperacionesRes, rolesRes, alertasRes, fincasRes
-      ] = await Promise.all([
-        fetch(`${API_URL}/insumos/`, { headers }),
-        fetch(`${API_URL}/cosechas/`, { headers }),
-        fetch(`${API_URL}/enfundes/`, { headers }),
-        fetch(`${API_URL}/empleados/`, { headers }),
-        fetch(`${API_URL}/prestamos/`, { headers }),
-        fetch(`${API_URL}/recuperaciones/`, { headers }),
-        fetch(`${API_URL}/roles-pago/`, { headers }),
-        fetch(`${API_URL}/alertas/`, { headers }),
-        fetch(`${API_URL}/fincas/`, { headers }),
-      ]);
-
-      const insumos = insumosRes.ok ? await insumosRes.json() : [];
-      const cosechas = cosechasRes.ok ? await cosechasRes.json() : [];
-      const enfundes = enfundesRes.ok ? await enfundesRes.json() : [];
-      const empleados = empleadosRes.ok ? await empleadosRes.json() : [];
-      const prestamos = prestamosRes.ok ? await prestamosRes.json() : [];
-      const recuperacionCintas = recuperacionesRes.ok ? await recuperacionesRes.json() : [];
-      const rolesPago = rolesRes.ok ? await rolesRes.json() : [];
-      const alertas = alertasRes.ok ? await alertasRes.json() : [];
-      const fincas = fincasRes.ok ? await fincasRes.json() : [];
-
-      console.log('[Gemini] Datos obtenidos:', {
-        insumos: insumos.length,
-        cosechas: cosechas.length,
-        enfundes: enfundes.length,
-        empleados: empleados.length,
-        prestamos: prestamos.length,
-        fincas: fincas.length,
-      });
+      console.log('[Gemini] Consultando resumen de Django...');
+      const response = await fetch(`${API_URL}/agente/digest/`, { headers });
+
+      if (response.status === 304 && this.digestCache) {
+        return this.digestCache;
+      }
+      if (!response.ok) {
+        console.error('[Gemini] Error obteniendo resumen:', response.status);
+        return null;
+      }
 
-      return {
-        insumos,
-        cosechas,
-        enfundes,
-        empleados,
-        prestamos,
-        recuperacionCintas,
-        rolesPago,
-        alertas,
-        fincas,
-      };
+      this.digestCache = await response.json();
+      console.log('[Gemini] Resumen obtenido:', this.digestCache?.version);
+      return this.digestCache;
     } catch (error) {
       console.error('[Gemini] Error obteniendo datos del backend:', error);
       return null;
@@ -197,82 +206,49 @@ class GeminiService {
   }
 
   private buildPrompt(context: NotificationContext): string {
-    // Analizar datos - soporta tanto snake_case (Django) como camelCase (frontend)
-    const getStock = (i: any) => i.stock_actual ?? i.stockActual ?? 0;
-    const getStockMin = (i: any) => i.stock_minimo ?? i.stockMinimo ?? 0;
-    const getFinca = (i: any) => i.finca_nombre ?? i.finca ?? 'Sin finca';
-    const getCajas = (c: any) => c.cajas_producidas ?? c.cajasProducidas ?? 0;
-    const getMatasCaidas = (e: any) => e.matas_caidas ?? e.matasCaidas ?? 0;
-    const getCantidadEnfundes = (e: any) => e.cantidad_enfundes ?? e.cantidadEnfundes ?? 0;
-    const getPorcentajeRecuperacion = (r: any) => r.porcentaje_recuperacion ?? r.porcentajeRecuperacion ?? 0;
-    const getActivo = (e: any) => e.activo ?? true;
-    const getSaldoPendiente = (p: any) => p.saldo_pendiente ?? p.saldoPendiente ?? 0;
-
-    const stockBajo = context.insumos.filter(i => getStock(i) <= getStockMin(i));
-    const stockCritico = context.insumos.filter(i => getStock(i) <= getStockMin(i) * 0.5);
-    
-    const ultimasCosechas = context.cosechas.slice(0, 10);
-    const produccionPromedio = ultimasCosechas.length > 0 
-      ? ultimasCosechas.reduce((sum, c) => sum + getCajas(c), 0) / ultimasCosechas.length 
-      : 0;
-
-    const empleadosActivos = context.empleados.filter(e => getActivo(e));
-    const empleadosInactivos = context.empleados.filter(e => !getActivo(e));
-    const prestamosActivos = context.prestamos.filter(p => p.estado === 'activo' || p.estado === 'pendiente');
-    const totalDeudaPrestamos = prestamosActivos.reduce((sum, p) => sum + getSaldoPendiente(p), 0);
-    
-    const recuperacionBaja = context.recuperacionCintas.filter(r => getPorcentajeRecuperacion(r) < 80);
-    
-    const matasCaidasTotal = context.enfundes.reduce((sum, e) => sum + getMatasCaidas(e), 0);
-    const enfundesTotales = context.enfundes.reduce((sum, e) => sum + getCantidadEnfundes(e), 0);
-    const porcentajeMatasCaidas = enfundesTotales > 0 ? (matasCaidasTotal / enfundesTotales) * 100 : 0;
-
-    // Roles de pago pendientes
-    const rolesPendientes = context.rolesPago.filter(r => r.estado === 'pendiente');
-    const totalPorPagar = rolesPendientes.reduce((sum, r) => sum + (r.total_pagar ?? r.netoAPagar ?? 0), 0);
-
-    // Alertas existentes del sistema
-    const alertasCriticas = context.alertas.filter(a => a.prioridad === 'critica' || a.prioridad === 'alta');
+    const { inventario, produccion, enfundes, recuperacion, personal, alertas } = context;
 
     return `Eres un asistente experto en gestión de bananeras en Ecuador. Analiza los siguientes datos REALES del sistema y genera notificaciones inteligentes y accionables.
 
 DATOS ACTUALES DEL SISTEMA (${new Date().toLocaleDateString('es-EC')}):
 
 🏢 FINCAS REGISTRADAS: ${context.fincas.length}
-${context.fincas.slice(0, 5).map((f: any) => `  • ${f.nombre}: ${f.hectareas ?? 0} hectáreas`).join('\n')}
+${context.fincas.slice(0, 5).map(f => `  • ${f.nombre}: ${f.hectareas} hectáreas`).join('\n')}
 
 📦 INVENTARIO:
-- Total insumos: ${context.insumos.length}
-- Insumos con stock bajo (≤ mínimo): ${stockBajo.length}
-${stockBajo.slice(0, 5).map(i => `  • ${i.nombre}: ${getStock(i)}/${getStockMin(i)} ${i.unidad_medida ?? i.unidadMedida ?? 'unidades'} (${getFinca(i)})`).join('\n') || '  Sin alertas de stock bajo'}
-- Insumos CRÍTICOS (≤ 50% del mínimo): ${stockCritico.length}
-${stockCritico.slice(0, 3).map(i => `  ⚠️ ${i.nombre}: SOLO ${getStock(i)} unidades (${getFinca(i)})`).join('\n') || '  Sin alertas críticas'}
+- Total insumos: ${inventario.total}
+- Insumos con stock bajo (≤ mínimo): ${inventario.stock_bajo}
+${inventario.bajo.map(i => `  • ${i.nombre}: ${i.stock_actual}/${i.stock_minimo} ${i.unidad_medida} (${i.finca_nombre ?? 'Sin finca'})`).join('\n') || '  Sin alertas de stock bajo'}
+- Insumos CRÍTICOS (≤ 50% del mínimo): ${inventario.stock_critico}
+${inventario.critico.map(i => `  ⚠️ ${i.nombre}: SOLO ${i.stock_actual} unidades (${i.finca_nombre ?? 'Sin finca'})`).join('\n') || '  Sin alertas críticas'}
 
 🍌 PRODUCCIÓN - COSECHAS:
-- Total cosechas registradas: ${context.cosechas.length}
-- Producción promedio: ${produccionPromedio.toFixed(0)} cajas/cosecha
-${ultimasCosechas.slice(0, 5).map(c => `  • Semana ${c.semana}: ${getCajas(c)} cajas - ${getFinca(c)}`).join('\n') || '  Sin datos de cosechas'}
+- Total cosechas registradas: ${produccion.total_cosechas}
+- Producción promedio: ${produccion.promedio_cajas.toFixed(0)} cajas/cosecha
+${produccion.ultimas.map(c => `  • Semana ${c.semana}: ${c.cajas_producidas} cajas - ${c.finca_nombre}`).join('\n') || '  Sin datos de cosechas'}
+${produccion.por_finca.map(f => `  • Promedio anual ${f.finca_nombre}: ${f.promedio_cajas.toFixed(0)} cajas, ratio ${f.promedio_ratio.toFixed(2)}`).join('\n')}
 
 🌱 ENFUNDES:
-- Total registros: ${context.enfundes.length}
-- Total enfundes realizados: ${enfundesTotales.toLocaleString()}
-- Matas caídas: ${matasCaidasTotal.toLocaleString()} (${porcentajeMatasCaidas.toFixed(1)}% del total)
-${porcentajeMatasCaidas > 3 ? '  ⚠️ ALERTA: Porcentaje de matas caídas superior al 3% recomendado' : ''}
+- Total registros: ${enfundes.registros}
+- Total enfundes realizados: ${enfundes.total_enfundes.toLocaleString()}
+- Matas caídas: ${enfundes.matas_caidas.toLocaleString()} (${enfundes.porcentaje_matas_caidas.toFixed(1)}% del total)
+${enfundes.porcentaje_matas_caidas > 3 ? '  ⚠️ ALERTA: Porcentaje de matas caídas superior al 3% recomendado' : ''}
+${enfundes.fincas_elevadas.map(f => `  ⚠️ ${f.finca_nombre}: ${f.porcentaje.toFixed(1)}% de matas caídas`).join('\n')}
 
 🎗️ RECUPERACIÓN DE CINTAS:
-- Total registros: ${context.recuperacionCintas.length}
-- Con recuperación < 80%: ${recuperacionBaja.length}
-${recuperacionBaja.slice(0, 3).map(r => `  • ${r.finca_nombre ?? r.fincaNombre ?? 'Finca'}: ${getPorcentajeRecuperacion(r).toFixed(1)}%`).join('\n') || '  Todas las recuperaciones están en rango óptimo'}
+- Total registros: ${recuperacion.registros}
+- Con recuperación < 80%: ${recuperacion.bajas}
+${recuperacion.peores.map(r => `  • ${r.finca_nombre}: ${r.porcentaje.toFixed(1)}%`).join('\n') || '  Todas las recuperaciones están en rango óptimo'}
 
 👷 PERSONAL Y NÓMINA:
-- Empleados activos: ${empleadosActivos.length}
-- Empleados inactivos: ${empleadosInactivos.length}
-- Roles de pago pendientes: ${rolesPendientes.length} (Total: $${totalPorPagar.toLocaleString()})
-- Préstamos activos: ${prestamosActivos.length} (Deuda total: $${totalDeudaPrestamos.toLocaleString()})
+- Empleados activos: ${personal.activos}
+- Empleados inactivos: ${personal.inactivos}
+- Roles de pago pendientes: ${personal.roles_pendientes} (Total: $${personal.total_por_pagar.toLocaleString()})
+- Préstamos activos: ${personal.prestamos_activos} (Deuda total: $${personal.deuda_prestamos.toLocaleString()})
 
 🔔 ALERTAS DEL SISTEMA:
-- Alertas críticas/altas activas: ${alertasCriticas.length}
-${alertasCriticas.slice(0, 3).map((a: any) => `  • ${a.titulo}: ${a.mensaje ?? a.descripcion ?? ''}`).join('\n') || '  Sin alertas críticas'}
+- Alertas críticas/altas activas: ${alertas.criticas}
+${alertas.recientes.map(a => `  • ${a.titulo}: ${a.mensaje}`).join('\n') || '  Sin alertas críticas'}
 
 INSTRUCCIONES:
 1. Genera entre 3 y 6 notificaciones basadas en los problemas MÁS IMPORTANTES detectados
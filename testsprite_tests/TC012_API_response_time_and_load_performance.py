@@ -1,118 +1,47 @@
-import asyncio
-from playwright import async_api
-from playwright.async_api import expect
-
-async def run_test():
-    pw = None
-    browser = None
-    context = None
-    
-    try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / 'backend' / 'data'
+
+
+def copiar_base(destino):
+    # backup() copia una instantánea consistente aunque la base esté en WAL y en uso
+    origen = Path(os.environ.get('DATABASE_PATH', BACKEND / 'db.sqlite3'))
+    with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+
+
+def run_test():
+    # La prueba de carga mide la API directamente (RNF-001 a RNF-003) sobre
+    # el servidor Django local; ver bananera/management/commands/prueba_carga.py.
+    # Crea registros sintéticos, así que corre sobre una copia temporal de la
+    # base (y con caché y métricas propias), nunca sobre la de desarrollo.
+    with tempfile.TemporaryDirectory() as carpeta:
+        base = Path(carpeta) / 'carga.sqlite3'
+        copiar_base(base)
+        entorno = {
+            **os.environ,
+            'DATABASE_ENGINE': 'sqlite',
+            'DATABASE_PATH': str(base),
+            'CACHE_LOCATION': str(Path(carpeta) / 'cache'),
+            'METRICAS_DIR': str(Path(carpeta) / 'metricas'),
+        }
+        entorno.pop('DATABASE_REPLICA_PATH', None)
+        subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput'], cwd=BACKEND, env=entorno, check=True)
+        resultado = subprocess.run(
+            [sys.executable, 'manage.py', 'prueba_carga', '--usuarios', '50', '--segundos', '30',
+             '--sintetico', '5000'],
+            cwd=BACKEND, env=entorno,
+        )
+    if resultado.returncode != 0:
+        raise AssertionError(
+            "Test case failed: API endpoints exceeded the 500ms p95 budget, the dashboard "
+            "bootstrap exceeded 3 seconds, or requests failed with 50 concurrent users."
         )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
-        context.set_default_timeout(5000)
-        
-        # Open a new page in the browser context
-        page = await context.new_page()
-        
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:3000", wait_until="commit", timeout=10000)
-        
-        # Wait for the main page to reach DOMContentLoaded state (optional for stability)
-        try:
-            await page.wait_for_load_state("domcontentloaded", timeout=3000)
-        except async_api.Error:
-            pass
-        
-        # Iterate through all iframes and wait for them to load as well
-        for frame in page.frames:
-            try:
-                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
-            except async_api.Error:
-                pass
-        
-        # Interact with the page elements to simulate user flow
-        # -> Input admin email and password, then click login button to proceed to dashboard.
-        frame = context.pages[-1]
-        # Input admin email
-        elem = frame.locator('xpath=html/body/div[2]/div/div[2]/form/div/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('admin@bananerahg.com')
-        
-
-        frame = context.pages[-1]
-        # Input admin password
-        elem = frame.locator('xpath=html/body/div[2]/div/div[2]/form/div[2]/input').nth(0)
-        await page.wait_for_timeout(3000); await elem.fill('123456')
-        
-
-        frame = context.pages[-1]
-        # Click login button
-        elem = frame.locator('xpath=html/body/div[2]/div/div[2]/form/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Perform API calls for CRUD operations and dashboard data retrieval to measure API response times and verify they are under 500ms.
-        await page.goto('http://localhost:3000/api/test/crud', timeout=10000)
-        await asyncio.sleep(3)
-        
-
-        # -> Return to dashboard page to locate correct API endpoints or navigation to API testing tools.
-        frame = context.pages[-1]
-        # Click 'Volver al dashboard' to return to dashboard page
-        elem = frame.locator('xpath=html/body/div[2]/div/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Explore navigation or configuration sections to locate API endpoints or documentation for performance testing.
-        frame = context.pages[-1]
-        # Click 'Configuración' to explore settings for API endpoints or documentation
-        elem = frame.locator('xpath=html/body/div[2]/div/nav/div[6]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
-
-        # -> Click on 'Usuarios' submenu to check if it provides API endpoint info or testing options.
-        frame = context.pages[-1]
-        # Click 'Usuarios' submenu under Configuración
-        elem = frame.locator('xpath=html/body/div[2]/div/nav/div[6]/div/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # -> Click 'Nuevo Usuario' button to initiate a user creation process and observe API calls for performance measurement.
-        frame = context.pages[-1]
-        # Click 'Nuevo Usuario' button to start user creation process
-        elem = frame.locator('xpath=html/body/div[2]/div[2]/main/div/div[2]/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
 
-        # --> Assertions to verify final state
-        frame = context.pages[-1]
-        try:
-            await expect(frame.locator('text=API Response Time Exceeded Threshold').first).to_be_visible(timeout=1000)
-        except AssertionError:
-            raise AssertionError("Test case failed: API endpoints did not respond within the required performance threshold of 500ms and initial page load was not under 3 seconds as specified in the test plan.")
-        await asyncio.sleep(5)
-    
-    finally:
-        if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
-            
-asyncio.run(run_test())
-    
\ No newline at end of file
+run_test()